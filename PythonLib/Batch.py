@@ -0,0 +1,194 @@
+'''
+    Batch:
+
+    Runs SimulateLiquid, SimulateHybrid or DesignLiquid from the command line without the GUI, e.g. on machines without a display.
+    The inputs of each run are built from the same input definitions as the pages (SimulateLiquidInputs, SimulateHybridInputs and
+    DesignLiquidInputs), without widgets: every input starts from its default and is then set from an input file and from --set, then
+    validated and built just as the page would. Input files are either workspaces saved from a page with "Save Workspace" (.mat), or
+    .json files of the inputs to change, keyed by their dotted path (as in the MATLAB structs) with values as they'd be typed into the
+    page:
+
+        {"inputs.ox.V_l": "3.5 [L]", "inputs.ox_pressurant.active": 1, "inputs.ox_pressurant.gas_properties": "nitrogen"}
+
+    From the PropSim folder:
+
+        python -m PythonLib.Batch SimulateLiquid case1.json case2.json SimulateLiquid_workspace.mat --output Outputs/batch
+        python -m PythonLib.Batch SimulateHybrid --set "inputs.ox.V_l=16 [L]"
+
+    With no input files, the defaults are run. Every page runs on the Python backend (DesignLiquid on its Python version, see
+    DesignLiquid) unless --backend MATLAB is given. The workspace and solution of each run are saved to
+    <output>/<input file>_results.mat, laid out like a workspace saved from the page, and a summary of each run (of the designed
+    engine for DesignLiquid) is written to <output>/batch_summary.csv as it finishes.
+
+    Neither tkinter nor matplotlib is imported.
+'''
+
+import os
+import io
+import sys
+import csv
+import json
+import time
+import argparse
+import warnings
+import scipy.io
+
+from . import SimulateLiquidInputs, SimulateHybridInputs, DesignLiquidInputs
+from . import MatlabWorkspace
+from .PerformanceCode import performance_code
+from .DesignLiquid import design_liquid
+from .Sweep import SUMMARY_FIELDS, summarize, split_assignment
+
+NATIVE_FUNCTIONS = {'PerformanceCode': performance_code, 'DesignLiquid': design_liquid} # Python versions of the MATLAB functions
+
+# Input definitions of each page: (module with prebuild() etc., sections, input structs, MATLAB function, backends)
+PAGES = {
+    'SimulateLiquid': (SimulateLiquidInputs, SimulateLiquidInputs.SimLiqSections, SimulateLiquidInputs.SimLiqInputStructs,
+                       'PerformanceCode', ['Python', 'MATLAB']),
+    'SimulateHybrid': (SimulateHybridInputs, SimulateHybridInputs.SimHybSections, SimulateHybridInputs.SimHybInputStructs,
+                       'PerformanceCode', ['Python', 'MATLAB']),
+    'DesignLiquid': (DesignLiquidInputs, DesignLiquidInputs.DesLiqSections, DesignLiquidInputs.DesLiqInputStructs,
+                     'DesignLiquid', ['Python', 'MATLAB'])
+}
+
+def input_path(inputvar):
+    ''' Return the dotted path of an input variable, e.g. 'inputs.ox.V_l'. '''
+    return inputvar.structname + '.' + inputvar.name if inputvar.structname else inputvar.name
+
+def load_inputs(page, filename = None, settings = {}):
+    ''' Set the inputs of page to their defaults, then to the values of an input file (a saved .mat workspace or a .json file of
+        values keyed by dotted path) if given, then to settings (a dict of values keyed by dotted path). Returns a list of the errors
+        found validating the inputs (empty if they're valid).
+    '''
+    sections = PAGES[page][1]
+    for section in sections:
+        section.make_headless() # start from the defaults
+    if filename and filename.casefold().endswith('.mat'):
+        workspace = scipy.io.loadmat(filename, simplify_cells = True)
+        for section in sections:
+            section.load_from_native(workspace)
+        values = {}
+    elif filename:
+        with open(filename) as jsonfile:
+            values = json.load(jsonfile)
+    else:
+        values = {}
+    values = dict(values, **settings)
+
+    inputvars = {input_path(inputvar): inputvar for section in sections for inputvar in section.inputvars}
+    err_list = ['Error: ' + page + ' has no input ' + path for path in values if path not in inputvars]
+    for path, value in values.items():
+        if path in inputvars:
+            inputvars[path].put(value)
+    for section in sections:
+        section.update_linkedvars()
+        err_list += section.validate()
+    return err_list
+
+def build_native(page):
+    ''' Build the inputs of page (see load_inputs) into a native workspace, returning it. '''
+    module, sections = PAGES[page][:2]
+    workspace = {}
+    module.prebuild_native(workspace)
+    for section in sections:
+        section.build_native(workspace)
+    module.postbuild_native(workspace)
+    return workspace
+
+def build_matlab(page, matlabeng):
+    ''' Build the inputs of page (see load_inputs) in the MATLAB workspace of matlabeng, in bulk (see MatlabWorkspace). '''
+    module, sections = PAGES[page][:2]
+    MatlabWorkspace.build_workspace(matlabeng, sections, module.prebuild_native, module.postbuild, module.MATLAB_OBJECTS)
+
+def run_file(page, filename, output, backend = 'Python', settings = {}, matlabeng = None, stdout = None):
+    ''' Run page on the inputs of filename (None for the defaults) with settings applied, and save the workspace and solution to
+        the output directory. Returns a dict of SUMMARY_FIELDS (of the designed engine for DesignLiquid, NaN if the
+        run failed), 'message' (the error or last warning of the run) and 'results' (the file the results were saved to).
+    '''
+    name = os.path.splitext(os.path.basename(filename))[0] if filename else page + '_defaults'
+    results = os.path.join(output, name + '_results.mat')
+    summary = dict.fromkeys(SUMMARY_FIELDS, float('nan'))
+    summary['message'] = ''
+    summary['results'] = ''
+
+    err_list = load_inputs(page, filename, settings)
+    if err_list:
+        summary['message'] = '; '.join(err_list)
+        return summary
+
+    runout = io.StringIO()
+    with warnings.catch_warnings(record = True) as caught:
+        warnings.simplefilter('always')
+        try:
+            if backend == 'Python':
+                workspace = build_native(page)
+                function = NATIVE_FUNCTIONS[PAGES[page][3]]
+                solution = function(*(workspace[structname] for structname in PAGES[page][2]), stdout = runout)
+                scipy.io.savemat(results, dict(workspace, output = solution, printstr = runout.getvalue()))
+                record = solution['output'] if PAGES[page][3] == 'DesignLiquid' else solution
+            else:
+                build_matlab(page, matlabeng)
+                matlabeng.eval(PAGES[page][3] + '(' + ','.join(PAGES[page][2]) + ') ;', nargout = 0, stdout = runout, stderr = runout)
+                matlabeng.eval('output = ans ;', nargout = 0)
+                matlabeng.workspace['printstr'] = runout.getvalue()
+                matlabeng.save(os.path.abspath(results), nargout = 0)
+                record = MatlabWorkspace.MatlabResult(matlabeng, 'output') # only the summarised fields are fetched
+                record = record['output'] if PAGES[page][3] == 'DesignLiquid' else record
+            if record is not None:
+                summary.update(summarize(record))
+            summary['results'] = results
+            summary['message'] = str(caught[-1].message) if caught else ''
+        except Exception as err: # a failed run shouldn't stop the batch
+            summary['message'] = '%s: %s' % (type(err).__name__, err)
+    print(runout.getvalue(), end = '', file = stdout)
+    return summary
+
+def run_batch(page, filenames, output, backend = 'Python', settings = {}, stdout = None):
+    ''' Run page on each input file of filenames (or on the defaults if there are none), saving results to the output directory
+        and streaming a summary of each run to output/batch_summary.csv. Returns the list of summaries (see run_file).
+    '''
+    if backend not in PAGES[page][4]:
+        raise ValueError(page + ' can only run with the ' + ' or '.join(PAGES[page][4]) + ' backend.')
+    os.makedirs(output, exist_ok = True)
+    matlabeng = None
+    if backend == 'MATLAB':
+        try:
+            import matlab.engine
+        except ImportError:
+            raise RuntimeError('The MATLAB engine for Python is not installed.')
+        matlabeng = matlab.engine.start_matlab()
+        matlabeng.addpath(os.path.abspath('Supporting Functions'), nargout = 0)
+
+    summaries = []
+    try:
+        with open(os.path.join(output, 'batch_summary.csv'), 'w', newline = '') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['input'] + list(SUMMARY_FIELDS) + ['results', 'message'])
+            for n_run, filename in enumerate(filenames or [None], 1):
+                print('Run %d/%d: %s' % (n_run, len(filenames or [None]), filename or 'defaults'), file = stdout, flush = True)
+                start = time.time()
+                summary = run_file(page, filename, output, backend, settings, matlabeng, stdout)
+                summaries.append(summary)
+                writer.writerow([filename or 'defaults'] + [summary[field] for field in SUMMARY_FIELDS] +
+                                [summary['results'], summary['message']])
+                csvfile.flush()
+                print('Impulse %.0f N*s, Isp %.1f s, burn time %.2f s (%.1f s) %s' % (summary['impulse'], summary['Isp'],
+                      summary['burn_time'], time.time() - start, summary['message']), file = stdout, flush = True)
+    finally:
+        if matlabeng is not None:
+            matlabeng.quit()
+    return summaries
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Run PropSim pages without the GUI.')
+    parser.add_argument('page', choices = list(PAGES), help = 'page to run')
+    parser.add_argument('inputs', nargs = '*', help = 'input files: .mat workspaces saved from the page, or .json files of inputs')
+    parser.add_argument('--set', action = 'append', default = [], type = split_assignment, metavar = 'FIELD=VALUE',
+                        help = 'set an input for every run, as typed into the page (e.g. "inputs.ox.V_l=3.5 [L]")')
+    parser.add_argument('--backend', choices = ['Python', 'MATLAB'], help = 'backend to run on (default: Python if the page supports it)')
+    parser.add_argument('--output', default = './Outputs/batch', help = 'directory to write results to')
+    args = parser.parse_args()
+
+    summaries = run_batch(args.page, args.inputs, args.output, args.backend or PAGES[args.page][4][0], dict(args.set))
+    print('Results saved in ' + args.output)
+    sys.exit(1 if any(summary['message'] and not summary['results'] for summary in summaries) else 0)
@@ -2,6 +2,7 @@
     CmdPane:
 
     An Entry object that handles user input and passes it straight to MATLAB, while also including it in the application printRedirector.
+    Commands run on the engine of the active SimPage's workspace (see EnginePool.command_engine()), so they see the page's last run.
 '''
  
 import tkinter as tk
@@ -12,10 +13,14 @@ import threading
 MAX_OLD_LINES = 10 # number of old lines to store for accessing w/ up + down arrows
 
 class CmdPane(ttk.Frame):
-    def __init__(self, parent, matlabeng):
+    def __init__(self, parent, engine_pool, get_simpage):
+        ''' engine_pool is the EnginePool of MATLAB engines (None if MATLAB isn't available), and get_simpage() returns the active
+            SimPage, whose workspace commands run in.
+        '''
         super().__init__(parent)
         self.subframe = tk.Frame(self, bg='white', relief = 'sunken')
-        self.matlabeng = matlabeng
+        self.engine_pool = engine_pool
+        self.get_simpage = get_simpage
         matlab_lab = ttk.Label(self, text = 'MATLAB Cmd Line\t')
         matlab_lab.grid(row=0,column=0,sticky='nsew')
         self.subframe.grid(row=0,column=1,sticky='nsew')
@@ -63,7 +68,14 @@ class CmdPane(ttk.Frame):
             print('clc')
             return
         print('>> '+myline) # print to GUI
-        cmd_thread = threading.Thread(target = lambda: self._cmd_thread(myline.strip()), name = 'cmd_thread')
+        pooled = self.engine_pool.command_engine(self.get_simpage()) if self.engine_pool is not None else None
+        if pooled is None:
+            print('MATLAB engine is not available.')
+            return
+        if self.engine_pool.acquire(pooled = pooled, wait = False) is None:
+            print('MATLAB engine %d is busy. Please try again when the run finishes.' % pooled.index)
+            return
+        cmd_thread = threading.Thread(target = lambda: self._cmd_thread(pooled, myline.strip()), name = 'cmd_thread')
         cmd_thread.start()
 
     def on_up(self):
@@ -83,15 +95,17 @@ class CmdPane(ttk.Frame):
             self.line_index = 0 # this is the line we're on (even if we're editing an old line, that is now the "current line")
         self.change_flag = False # clear flag
 
-    def _cmd_thread(self, cmd):
+    def _cmd_thread(self, pooled, cmd):
+        ''' Run cmd on pooled (acquired from the engine pool), releasing it when done. '''
         output = StringIO()
         errout = StringIO()
         try:
             self.entry.unbind("<Return>") # prevent additional commands from being sent
-            self.matlabeng.eval(cmd, nargout = 0, stdout = output, stderr = errout)
+            pooled.engine.eval(cmd, nargout = 0, stdout = output, stderr = errout)
         except:
             pass # errors are caught in errout, which will be output differently from runtime errors
         finally:
+            self.engine_pool.release(pooled)
             errs = errout.getvalue()
             if errs != None and errs != '':
                 errs = errs.split('\n') # First line is "error using eval", which we don't need to print
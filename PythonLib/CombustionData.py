@@ -0,0 +1,227 @@
+'''
+    CombustionData:
+
+    Python version of CombustionDataProcess.m from Combustion Data. Parses the text output of an RPA Lite v1.2 nested analysis (a row
+    of results for each O/F ratio and chamber pressure, pressure varying fastest) into the CombData struct used by the integrators: the
+    OF, Pc, Tc, M, gamma and c_star tables over the (n_Pc, n_OF) grid, with OF_range, Pc_range, n_OF and n_Pc.
+
+    The file is read a line at a time, keeping only the columns that are used, and the rows are checked to form a complete grid: the
+    same ascending chamber pressures for each ascending O/F ratio. Tables can be saved as a .mat file (for MATLAB) or as a compact
+    binary .comb table, which is read by memory-mapping it:
+
+        header (HEADER_FORMAT, padded to HEADER_SIZE bytes): magic, format version, item size of the tables (4 for float32 or 8 for
+            float64), n_Pc, n_OF, OF_range and Pc_range
+        Pc axis (n_Pc float64), OF axis (n_OF float64)
+        Tc, M, gamma and c_star tables (TABLE_FIELDS), each n_Pc x n_OF in row-major order
+
+    load_comb_data() in Integration reads either format through table_cache, a process-wide TableCache: tables stay loaded between
+    builds and are shared by every page, and a file is only read again once it changes. From the PropSim folder,
+
+        python -m PythonLib.CombustionData "Combustion Data"
+
+    converts every RPA .txt file in the folder to a .comb table (--mat writes .mat files too, --dtype float32 halves their size).
+'''
+
+import os
+import glob
+import struct
+import argparse
+import threading
+from collections import OrderedDict
+import numpy as np
+
+PSI_TO_PA = 6894.76 # 1 psi in Pa, as used by CombustionDataProcess.m
+N_COLUMNS = 15 # columns of an RPA nested analysis row
+COLUMNS = {'OF': 0, 'Pc': 1, 'Tc': 5, 'M': 6, 'gamma': 7, 'c_star': 9} # column of each CombData field
+SCALES = {'Pc': PSI_TO_PA, 'M': 1e-3} # conversions of the RPA units to SI (psi to Pa, g/mol to kg/mol)
+TABLE_FIELDS = ('Tc', 'M', 'gamma', 'c_star') # tables stored in a .comb file, in order
+
+MAGIC = b'PSCOMB\0\0'
+FORMAT_VERSION = 1 # version of the .comb format, increased whenever the layout changes
+HEADER_FORMAT = '<8sHHII4d' # magic, version, item size, n_Pc, n_OF, OF_range, Pc_range
+HEADER_SIZE = 64 # bytes reserved for the header, so the tables are aligned
+COMB_EXTENSION = '.comb'
+CACHE_BUDGET = 256*2**20 # memory the tables kept by table_cache may use [bytes]
+
+def parse_rpa(filename):
+    ''' Parse the RPA nested analysis text file filename into a CombData dict. Raises ValueError if a row can't be read or the rows
+        don't form a complete O/F by chamber pressure grid.
+    '''
+    columns = {field: [] for field in COLUMNS}
+    with open(filename) as rpafile:
+        for line_number, line in enumerate(rpafile, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue # comments and separators
+            values = line.split()
+            if len(values) != N_COLUMNS:
+                raise ValueError('%s, line %d: expected %d columns, found %d.' % (filename, line_number, N_COLUMNS, len(values)))
+            try:
+                for field, column in COLUMNS.items():
+                    columns[field].append(float(values[column]))
+            except ValueError:
+                raise ValueError('%s, line %d: could not read %r.' % (filename, line_number, line))
+
+    OF = np.array(columns['OF'])
+    if len(OF) == 0:
+        raise ValueError(filename + ' contains no nested analysis results.')
+    n_Pc = int(np.argmax(OF != OF[0])) or len(OF) # rows in the first block of equal O/F
+    n_OF = len(OF)//n_Pc
+    if n_OF*n_Pc != len(OF):
+        raise ValueError('%s: %d rows is not a multiple of the %d chamber pressures of the first O/F ratio.' % (filename, len(OF), n_Pc))
+
+    # The i-th row of each block is the i-th pressure of the j-th O/F ratio (CombustionDataProcess.m reshapes column-major)
+    comb_data = {field: (np.array(values)*SCALES.get(field, 1)).reshape(n_OF, n_Pc).T for field, values in columns.items()}
+    OF_axis = comb_data['OF'][0, :]
+    Pc_axis = comb_data['Pc'][:, 0]
+    if np.any(comb_data['OF'] != OF_axis) or np.any(comb_data['Pc'] != Pc_axis[:, np.newaxis]):
+        raise ValueError(filename + ': the rows do not form a grid, each O/F ratio must have the same chamber pressures.')
+    if np.any(np.diff(OF_axis) <= 0) or np.any(np.diff(Pc_axis) <= 0):
+        raise ValueError(filename + ': O/F ratios and chamber pressures must be in ascending order.')
+    comb_data.update(OF_range = np.array([OF_axis[0], OF_axis[-1]]), Pc_range = np.array([Pc_axis[0], Pc_axis[-1]]),
+                     n_OF = n_OF, n_Pc = n_Pc)
+    return comb_data
+
+def save_table(filename, comb_data, dtype = np.float64):
+    ''' Save a CombData dict to a .comb table, storing the tables as dtype (float32 or float64). '''
+    dtype = np.dtype(dtype)
+    if dtype not in (np.dtype(np.float32), np.dtype(np.float64)):
+        raise ValueError('Combustion tables must be float32 or float64.')
+    n_Pc, n_OF = int(comb_data['n_Pc']), int(comb_data['n_OF'])
+    header = struct.pack(HEADER_FORMAT, MAGIC, FORMAT_VERSION, dtype.itemsize, n_Pc, n_OF, *comb_data['OF_range'],
+                         *comb_data['Pc_range'])
+    with open(filename, 'wb') as combfile:
+        combfile.write(header.ljust(HEADER_SIZE, b'\0'))
+        combfile.write(np.ascontiguousarray(comb_data['Pc'][:, 0], dtype = '<f8').tobytes())
+        combfile.write(np.ascontiguousarray(comb_data['OF'][0, :], dtype = '<f8').tobytes())
+        for field in TABLE_FIELDS:
+            combfile.write(np.ascontiguousarray(comb_data[field], dtype = dtype.newbyteorder('<')).tobytes())
+
+def load_table(filename):
+    ''' Load a .comb table as a CombData dict. The tables are read-only views of a memory map of the file, and OF and Pc are
+        broadcast from the axes.
+    '''
+    with open(filename, 'rb') as combfile:
+        header = combfile.read(struct.calcsize(HEADER_FORMAT))
+    if len(header) < struct.calcsize(HEADER_FORMAT) or header[:len(MAGIC)] != MAGIC:
+        raise ValueError(filename + ' is not a combustion table.')
+    magic, version, itemsize, n_Pc, n_OF, OF_min, OF_max, Pc_min, Pc_max = struct.unpack(HEADER_FORMAT, header)
+    if version != FORMAT_VERSION:
+        raise ValueError('%s is a version %d combustion table, expected version %d. Convert its RPA file again.' % (filename,
+                         version, FORMAT_VERSION))
+    dtype = np.dtype('<f4' if itemsize == 4 else '<f8')
+    data = np.memmap(filename, dtype = np.uint8, mode = 'r', offset = HEADER_SIZE)
+    offset = 8*(n_Pc + n_OF)
+    Pc_axis = data[:8*n_Pc].view('<f8')
+    OF_axis = data[8*n_Pc:offset].view('<f8')
+    comb_data = {'OF_range': np.array([OF_min, OF_max]), 'Pc_range': np.array([Pc_min, Pc_max]), 'n_OF': n_OF, 'n_Pc': n_Pc,
+                 'OF': np.broadcast_to(OF_axis, (n_Pc, n_OF)), 'Pc': np.broadcast_to(Pc_axis[:, np.newaxis], (n_Pc, n_OF))}
+    size = n_Pc*n_OF*dtype.itemsize
+    for ii, field in enumerate(TABLE_FIELDS):
+        comb_data[field] = data[offset + ii*size:offset + (ii + 1)*size].view(dtype).reshape(n_Pc, n_OF)
+    return comb_data
+
+def read_comb_data(filename):
+    ''' Read the CombData struct of a .mat file (as created by CombustionDataProcess.m) or a .comb table into a dict, without
+        caching (see TableCache). The arrays are read-only, so the tables can be shared.
+    '''
+    if filename.casefold().endswith(COMB_EXTENSION):
+        return load_table(filename)
+    import scipy.io
+    comb_data = scipy.io.loadmat(filename, simplify_cells = True)['CombData']
+    for value in comb_data.values():
+        if isinstance(value, np.ndarray):
+            value.setflags(write = False)
+    return comb_data
+
+class TableCache():
+    ''' Least recently used cache of combustion tables, keyed by the absolute path, modification time and size of their file, and
+        limited to budget bytes of arrays (the most recently used table is always kept). Counts hits and misses, see report().
+    '''
+    def __init__(self, budget = CACHE_BUDGET):
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0 # size of the arrays of the cached tables [bytes]
+        self._tables = OrderedDict() # key: (table, nbytes), least recently used first
+        self._lock = threading.Lock()
+
+    def load(self, filename):
+        ''' Return the CombData dict of filename, reading it (see read_comb_data) only if it isn't cached or its file changed. '''
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._tables:
+                self._tables.move_to_end(key)
+                self.hits += 1
+                return self._tables[key][0]
+        table = read_comb_data(filename)
+        nbytes = sum(value.nbytes for value in table.values() if isinstance(value, np.ndarray))
+        with self._lock:
+            self.misses += 1
+            for old_key in [old_key for old_key in self._tables if old_key[0] == path]: # older versions of the file
+                self._remove(old_key)
+            self._tables[key] = (table, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.budget and len(self._tables) > 1:
+                self._remove(next(iter(self._tables)))
+                self.evictions += 1
+        return table
+
+    def _remove(self, key):
+        ''' Remove a table from the cache. '''
+        self.nbytes -= self._tables.pop(key)[1]
+
+    def clear(self):
+        ''' Remove every table from the cache. '''
+        with self._lock:
+            self._tables.clear()
+            self.nbytes = 0
+
+    def report(self):
+        ''' Return a printable summary of the cache's hits, misses and size. '''
+        return 'Combustion table cache: %d hits, %d misses, %d evictions, %d tables (%.1f of %.0f MB)' % (self.hits, self.misses,
+               self.evictions, len(self._tables), self.nbytes/2**20, self.budget/2**20)
+
+table_cache = TableCache()
+
+def convert(filename, dtype = np.float64, mat = False):
+    ''' Convert an RPA text file to a .comb table alongside it (and a .mat file with mat). Returns the names of the files written. '''
+    comb_data = parse_rpa(filename)
+    root = os.path.splitext(filename)[0]
+    save_table(root + COMB_EXTENSION, comb_data, dtype)
+    written = [root + COMB_EXTENSION]
+    if mat:
+        import scipy.io
+        scipy.io.savemat(root + '.mat', {'CombData': comb_data})
+        written.append(root + '.mat')
+    return written
+
+def convert_directory(directory, dtype = np.float64, mat = False, stdout = None):
+    ''' Convert every RPA .txt file in directory (see convert()), printing the result of each to stdout. Files that can't be parsed
+        are reported and skipped. Returns the names of the files written.
+    '''
+    written = []
+    for filename in sorted(glob.glob(os.path.join(directory, '*.txt'))):
+        try:
+            written += convert(filename, dtype, mat)
+            print('Converted ' + filename, file = stdout)
+        except ValueError as err:
+            print('Skipped %s: %s' % (filename, err), file = stdout)
+    return written
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Convert RPA nested analysis results to combustion tables.')
+    parser.add_argument('paths', nargs = '+', help = 'RPA .txt files, or folders of them')
+    parser.add_argument('--dtype', choices = ['float32', 'float64'], default = 'float64', help = 'precision of the stored tables')
+    parser.add_argument('--mat', action = 'store_true', help = 'also write CombData .mat files for MATLAB')
+    args = parser.parse_args()
+
+    for path in args.paths:
+        if os.path.isdir(path):
+            convert_directory(path, args.dtype, args.mat)
+        else:
+            convert(path, args.dtype, args.mat)
+            print('Converted ' + path)
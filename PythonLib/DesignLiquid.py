@@ -0,0 +1,360 @@
+'''
+    DesignLiquid:
+
+    Python version of DesignLiquid.m from Supporting Functions. Sizes a liquid engine to meet the goals (GOALS: maximum thrust, OF
+    ratio, total impulse, minimum fuel and oxidizer injector pressure drops as fractions of tank pressure, and the ratio of the
+    oxidizer to fuel drain times) for the design (tank pressure, oxidizer ullage and expansion ratio), by adjusting the variables
+    VARIABLES: the liquid volumes of both tanks, both injector areas, the throat diameter and the fuel tank's ullage volume.
+
+    DesignLiquid.m updates the variables with a hand-written proportional rule, one PerformanceCode run per iteration. Here the
+    variables (as logarithms) are solved for the goals (as relative errors, see residuals()) with a quasi-Newton method instead:
+    the Jacobian is found by finite differences, running the base design and every perturbed design at once on a pool of worker
+    processes, and is then kept up to date with Broyden updates from each new run, so only one run per round has to wait for the
+    last. The Jacobian is recomputed if a step fails to reduce the errors.
+
+    Converged designs are archived (ARCHIVE_FILE, with their Jacobians), and a new design warm-starts from the closest archived
+    design with the same fixed inputs (closest in goals and design), skipping the first finite-difference round. Each evaluated
+    design point is kept for the rest of the design (see DesignEvaluator), so no point is ever run twice. From the PropSim folder,
+
+        python -m PythonLib.DesignLiquid DesignLiquid_workspace.mat [--set goal.total_impulse=20000] [--processes N]
+
+    designs the engine of a workspace saved from the DesignLiquid page.
+'''
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import warnings
+import numpy as np
+import scipy.io
+
+from .PerformanceCode import performance_code
+from .N2OProperties import n2o_find_t
+from .FindG import CACHE_DIR
+from .RunCache import value_hash, code_version
+from .Sweep import apply_case, get_field, load_workspace, split_assignment
+from .WorkerPool import WorkerPool
+
+GOALS = ('max_thrust', 'OF', 'total_impulse', 'min_fuel_dp', 'min_ox_dp', 'ox_to_fuel_time')
+VARIABLES = ('ox.V_l', 'fuel.V_l', 'ox.injector_area', 'fuel.injector_area', 'd_throat', 'fuel.V_ullage') # fuel.V_ullage is
+                                                                                 # fuel.V_tank - fuel.V_l
+DESIGN_FIELDS = ('p_tanks', 'ox_ullage', 'exp_ratio')
+INPUT_STRUCTS = ('initial_inputs', 'goal', 'design', 'options') # structs of a DesignLiquid workspace
+MODE = {'type': 'liquid', 'combustion_on': 1, 'flight_on': 0}
+RUN_OPTIONS = {'dt': 0.005, 'print_on': False, 'RAS_on': False, 'output_on': False, 'plots_on': False} # options of design runs
+DT_THRUST_FILTER = 0.1 # time constant of the filter removing thrust spikes before finding the maximum thrust [s]
+PARAM_TOL = 0.005 # relative error of every goal at convergence
+MAX_ITER = 100 # maximum rounds of runs
+FD_STEP = 0.02 # finite-difference step of the logarithm of each variable
+FD_RETRIES = 2 # times the step of a variable whose perturbed design fails to run is shrunk
+FD_SHRINK = 0.25 # factor the step of such a variable is shrunk by
+MAX_STEP = 0.3 # largest change of the logarithm of a variable in one step
+MAX_BACKTRACK = 4 # times a step is halved before giving up on it
+ARCHIVE_FILE = os.path.join(CACHE_DIR, 'DesignLiquid.json') # converged designs, for warm starts
+ARCHIVE_SIZE = 200 # designs kept in the archive
+PROCESSES = None # worker processes (None for one per variable, up to one per core)
+
+def enforce_design(initial_inputs, design):
+    ''' Return initial_inputs with the design enforced, as DesignLiquid.m does: the oxidizer temperature giving a vapor pressure of
+        p_tanks, the fuel pressurant set to p_tanks and the design expansion ratio.
+    '''
+    return apply_case(initial_inputs, {'ox.T_tank': float(n2o_find_t(design['p_tanks'])),
+                                       'fuel_pressurant.set_pressure': design['p_tanks'], 'exp_ratio': design['exp_ratio']})
+
+def initial_variables(inputs):
+    ''' Return the logarithms of the VARIABLES of inputs. '''
+    fuel_ullage = max(inputs['fuel']['V_tank'] - inputs['fuel']['V_l'], 0.01*inputs['fuel']['V_l'])
+    return np.log([fuel_ullage if name == 'fuel.V_ullage' else get_field(inputs, name) for name in VARIABLES])
+
+def apply_variables(inputs, design, x):
+    ''' Return inputs with the VARIABLES set to exp(x), sizing the oxidizer tank for the design ullage. '''
+    values = dict(zip(VARIABLES, np.exp(x)))
+    case = {name: float(values[name]) for name in VARIABLES[:-1]}
+    case['ox.V_tank'] = float(values['ox.V_l']/(1 - design['ox_ullage']))
+    case['fuel.V_tank'] = float(values['fuel.V_l'] + values['fuel.V_ullage'])
+    return apply_case(inputs, case)
+
+def find_max_thrust(record, dt_filter = DT_THRUST_FILTER):
+    ''' Return the maximum thrust, filtering out spikes shorter than dt_filter with a moving average (as MATLAB's filter()). '''
+    n_filter = int(np.ceil(dt_filter/np.mean(np.diff(record['time']))))
+    return float(np.max(np.convolve(record['F_thrust'], np.full(n_filter, 1/n_filter))[:len(record['F_thrust'])]))
+
+def _drain_time(mass, time):
+    ''' Return the time mass reaches zero, extrapolating linearly from the last samples if it doesn't. '''
+    empty = np.nonzero(mass <= 0)[0]
+    if len(empty) and empty[0] > 0:
+        ii = empty[0]
+        return float(np.interp(0, [mass[ii], mass[ii - 1]], [time[ii], time[ii - 1]]))
+    if mass[-1] == mass[-2]:
+        return float(time[-1])
+    return float(time[-1] - mass[-1]*(time[-1] - time[-2])/(mass[-1] - mass[-2]))
+
+def find_t_liqs(record):
+    ''' Return the liquid drain times (t_fuel_liq, t_ox_liq) of a run. '''
+    t_fuel_liq = record['t_fuel_liq']
+    if np.isnan(t_fuel_liq):
+        t_fuel_liq = _drain_time(record['m_fuel'], record['time'])
+    t_ox_liq = record['t_ox_liq']
+    if np.isnan(t_ox_liq):
+        dm_tol = 1e-3
+        if record['m_lox'][-1] < dm_tol:
+            t_ox_liq = float(record['time'][np.argmax(record['m_lox'] < dm_tol)])
+        else:
+            t_ox_liq = _drain_time(record['m_lox'], record['time'])
+    return float(t_fuel_liq), float(t_ox_liq)
+
+def parameters(record):
+    ''' Return the achieved value of each of GOALS in a run. '''
+    t_fuel_liq, t_ox_liq = find_t_liqs(record)
+    return {'max_thrust': find_max_thrust(record), 'OF': float(record['OF']), 'total_impulse': float(record['impulse']),
+            'min_fuel_dp': float(np.min(record['fuel_pressure_drop'])), 'min_ox_dp': float(np.min(record['ox_pressure_drop'])),
+            'ox_to_fuel_time': t_ox_liq/t_fuel_liq}
+
+def residuals(params, goal):
+    ''' Return the relative error of each of GOALS, (achieved - goal)/goal. '''
+    return np.array([params[name]/goal[name] - 1 for name in GOALS])
+
+class DesignEvaluator():
+    ''' Runs designs: the initial inputs with the design enforced and the VARIABLES set. Every evaluated point is kept, so a point is
+        never run twice.
+    '''
+    def __init__(self, initial_inputs, goal, design, mode = MODE, options = RUN_OPTIONS):
+        self.inputs = enforce_design(initial_inputs, design)
+        self.goal = goal
+        self.design = design
+        self.mode = mode
+        self.options = dict(options)
+        self.points = {} # rounded x : (residuals, parameters)
+
+    def point_key(self, x):
+        return tuple(np.round(x, 12))
+
+    def evaluate(self, x):
+        ''' Run the design with variables x, returning (residuals, parameters). Failed runs have NaN residuals. '''
+        key = self.point_key(x)
+        if key not in self.points:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                try:
+                    record = performance_code(apply_variables(self.inputs, self.design, x), self.mode, None, self.options,
+                                              stdout = io.StringIO())
+                    params = parameters(record)
+                    self.points[key] = (residuals(params, self.goal), params)
+                except Exception as err: # a failed design is just a bad point
+                    self.points[key] = (np.full(len(GOALS), np.nan), {'message': '%s: %s' % (type(err).__name__, err)})
+        return self.points[key]
+
+class DesignPool():
+    ''' Evaluates batches of design points on a pool of worker processes, keeping every result in the evaluator so points are never
+        run twice. Use as a context manager, which shuts the workers down.
+    '''
+    def __init__(self, evaluator, processes = None):
+        self.evaluator = evaluator
+        # each worker gets a copy of the evaluator, so the inputs are sent once per worker rather than once per point
+        self.workers = WorkerPool(evaluator.evaluate, processes = processes or min(os.cpu_count() or 1, len(VARIABLES) + 1))
+        self.processes = self.workers.processes
+        self.rounds = 0 # batches evaluated, i.e. runs that had to happen one after another
+        self.runs = 0 # points run
+
+    def __enter__(self):
+        self.workers.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.workers.__exit__(*exc_info)
+
+    def evaluate(self, points):
+        ''' Evaluate a list of points at once, returning their (residuals, parameters) in order. '''
+        new = [(ii, x) for ii, x in enumerate(points) if self.evaluator.point_key(x) not in self.evaluator.points]
+        if new:
+            self.rounds += 1
+            self.runs += len(new)
+            for ii, result in self.workers.imap([x for _, x in new]):
+                self.evaluator.points[self.evaluator.point_key(new[ii][1])] = result
+        return [self.evaluator.evaluate(x) for x in points] # (already evaluated)
+
+def finite_difference_jacobian(pool, x, r = None):
+    ''' Return (r, J): the residuals at x and their Jacobian with respect to x by forward differences, running x (unless its
+        residuals r are given) and every perturbed point at once. The column of a perturbed design that fails to run (e.g. at
+        the edge of the feasible designs) is retried with its step shrunk by FD_SHRINK, up to FD_RETRIES times, and a
+        RuntimeError is raised if it still fails. If x itself fails to run, J is NaN.
+    '''
+    n = len(x)
+    results = pool.evaluate(([x] if r is None else []) + [x + FD_STEP*np.eye(n)[ii] for ii in range(n)])
+    if r is None:
+        r = results.pop(0)[0]
+    if not np.all(np.isfinite(r)):
+        return r, np.full((len(r), n), np.nan) # solve_design() reports the failed run
+    steps = np.full(n, FD_STEP)
+    J = np.column_stack([(result[0] - r)/FD_STEP for result in results])
+    failed = dict(zip(range(n), results))
+    for n_retry in range(FD_RETRIES + 1):
+        failed = {ii: failed[ii] for ii in failed if not np.all(np.isfinite(J[:, ii]))}
+        if not failed:
+            return r, J
+        if n_retry == FD_RETRIES:
+            break
+        steps[list(failed)] *= FD_SHRINK
+        results = pool.evaluate([x + steps[ii]*np.eye(n)[ii] for ii in failed])
+        failed = dict(zip(failed, results))
+        for ii, result in failed.items():
+            J[:, ii] = (result[0] - r)/steps[ii]
+    ii, result = next(iter(failed.items()))
+    raise RuntimeError('The design failed to run: %s (perturbing %s)' % (result[1].get('message', 'unknown error'), VARIABLES[ii]))
+
+def archive_key(evaluator):
+    ''' Return the key of the fixed inputs of a design in the archive: everything but the goals, the design and the variables. '''
+    inputs = apply_case(evaluator.inputs, dict.fromkeys(VARIABLES[:-1] + ('ox.V_tank', 'fuel.V_tank', 'ox.T_tank',
+                                                                         'fuel_pressurant.set_pressure', 'exp_ratio')))
+    return value_hash((inputs, evaluator.mode, evaluator.options, code_version()))
+
+def archive_point(goal, design):
+    ''' Return the coordinates of a design in the archive, in which the closest design is found. '''
+    return np.log([goal[name] for name in GOALS] + [design[name] for name in DESIGN_FIELDS])
+
+def load_archive():
+    ''' Return the list of archived designs, each a dict of 'key', 'point', 'x' and 'jacobian'. '''
+    try:
+        with open(ARCHIVE_FILE) as archivefile:
+            return json.load(archivefile)
+    except (OSError, ValueError):
+        return []
+
+def warm_start(key, point):
+    ''' Return (x, J) of the closest archived design with the key, or None if there is none. '''
+    matches = [entry for entry in load_archive() if entry['key'] == key]
+    if not matches:
+        return None
+    closest = min(matches, key = lambda entry: np.linalg.norm(np.array(entry['point']) - point))
+    return np.array(closest['x']), np.array(closest['jacobian'])
+
+def archive_entry(key, point, x, J):
+    ''' Return the archive entry of a converged design. '''
+    return {'key': key, 'point': list(point), 'x': list(x), 'jacobian': J.tolist()}
+
+def archive_designs(entries):
+    ''' Add converged designs (see archive_entry()) to the archive in one write, replacing any at the same points and dropping the
+        oldest beyond ARCHIVE_SIZE. The archive is rewritten without a lock, so designs running in parallel (e.g. in the workers of
+        OptimizeLiquidMass) return their entries to the parent process to archive rather than calling this themselves.
+    '''
+    if not entries:
+        return
+    archive = load_archive()
+    for new in entries:
+        archive = [entry for entry in archive if not (entry['key'] == new['key'] and np.allclose(entry['point'], new['point']))]
+        archive.append(new)
+    os.makedirs(os.path.dirname(ARCHIVE_FILE), exist_ok = True)
+    tmp_file = ARCHIVE_FILE + '.%d.tmp' % os.getpid()
+    with open(tmp_file, 'w') as archivefile:
+        json.dump(archive[-ARCHIVE_SIZE:], archivefile)
+    os.replace(tmp_file, ARCHIVE_FILE)
+
+def solve_design(evaluator, processes = None, warm = True, stdout = sys.stdout, archive = archive_designs):
+    ''' Solve for the variables meeting the goals of evaluator. Returns (x, parameters, converged). A converged design is passed
+        to archive (as a list of one archive entry); pass e.g. a list's extend to collect the entry instead of writing it.
+    '''
+    key = archive_key(evaluator)
+    point = archive_point(evaluator.goal, evaluator.design)
+    start = warm_start(key, point) if warm else None
+    x = initial_variables(evaluator.inputs)
+    with DesignPool(evaluator, processes) as pool:
+        if start is not None:
+            print('Warm start from the closest converged design.', file = stdout, flush = True)
+            x, J = start
+            r = pool.evaluate([x])[0][0]
+            if not np.all(np.isfinite(r)):
+                x = initial_variables(evaluator.inputs)
+                start = None
+        if start is None:
+            r, J = finite_difference_jacobian(pool, x)
+        fresh = start is None # whether J is a finite-difference Jacobian at x
+        converged = False
+        for iteration in range(MAX_ITER):
+            print('Round %d: errors %s' % (pool.rounds, ', '.join('%s %.2f%%' % (name, 100*error) for name, error in zip(GOALS, r))),
+                  file = stdout, flush = True)
+            if not np.all(np.isfinite(r)):
+                raise RuntimeError('The design failed to run: ' + evaluator.evaluate(x)[1].get('message', 'unknown error'))
+            if np.max(np.abs(r)) < PARAM_TOL:
+                converged = True
+                break
+            dx = -np.linalg.lstsq(J, r, rcond = None)[0]
+            dx *= min(1, MAX_STEP/np.max(np.abs(dx))) # limit the step
+            for n_backtrack in range(MAX_BACKTRACK + 1):
+                r_new = pool.evaluate([x + dx])[0][0]
+                if np.all(np.isfinite(r_new)) and np.linalg.norm(r_new) < np.linalg.norm(r):
+                    break
+                if not fresh:
+                    break # the Jacobian is out of date, rather than the step too long
+                dx /= 2
+            if np.all(np.isfinite(r_new)) and np.linalg.norm(r_new) < np.linalg.norm(r):
+                J += np.outer(r_new - r - J @ dx, dx)/(dx @ dx) # Broyden update
+                x, r = x + dx, r_new
+                fresh = False
+            elif not fresh:
+                r, J = finite_difference_jacobian(pool, x, r)
+                fresh = True
+            else:
+                break # no step from a fresh Jacobian reduces the errors
+        print('%s after %d round(s) of runs (%d runs).' % ('Converged' if converged else 'Did not converge', pool.rounds, pool.runs),
+              file = stdout, flush = True)
+    if converged:
+        try:
+            archive([archive_entry(key, point, x, J)])
+        except OSError as err:
+            warnings.warn('Could not archive the design: ' + str(err))
+    return x, evaluator.evaluate(x)[1], converged
+
+def print_results(inputs, stdout = sys.stdout):
+    ''' Print the design, as PrintResults in DesignLiquid.m. '''
+    psi_to_Pa = 6894.75729 # 1 psi in Pa
+    L_to_m3 = 1e-3 # 1 L in m^3
+    print('Converged Results:', file = stdout)
+    print('Nozzle Throat Diameter: %.3f cm' % (inputs['d_throat']*1e2), file = stdout)
+    print('Fuel Injector CdA: %.3g mm^2' % (inputs['fuel']['injector_area']*1e6), file = stdout)
+    print('Oxidizer Injector CdA: %.3g mm^2' % (inputs['ox']['injector_area']*1e6), file = stdout)
+    print('Fuel Tank Size: %.3g L tank, %.3g L liquid' % (inputs['fuel']['V_tank']/L_to_m3, inputs['fuel']['V_l']/L_to_m3),
+          file = stdout)
+    print('Oxidizer Tank Size: %.3g L tank, %.3g L liquid' % (inputs['ox']['V_tank']/L_to_m3, inputs['ox']['V_l']/L_to_m3),
+          file = stdout)
+    print('Fuel Tank Initial Pressure: %.3g psi' % (inputs['fuel_pressurant']['set_pressure']/psi_to_Pa), file = stdout)
+    print('Oxidizer Tank Initial Temperature: %.3g K' % inputs['ox']['T_tank'], file = stdout)
+
+def design_liquid(initial_inputs, goal, design, options = None, processes = None, warm = True, stdout = sys.stdout):
+    ''' Design a liquid engine meeting the goals (see GOALS) for the design (see DESIGN_FIELDS), starting from initial_inputs.
+        Returns perf_results, as DesignLiquid.m: a dict of the designed inputs, mode, test_data, options and the output record of
+        the designed engine.
+    '''
+    options = options or {}
+    evaluator = DesignEvaluator(initial_inputs, goal, design)
+    start = time.time()
+    x, params, converged = solve_design(evaluator, processes or PROCESSES, warm, stdout)
+    inputs = apply_variables(evaluator.inputs, design, x)
+    print_results(inputs, stdout)
+    print('Design time: %.1f s' % (time.time() - start), file = stdout)
+
+    run_options = dict(RUN_OPTIONS, output_on = True, print_on = True)
+    run_options.update({name: options[name] for name in ('RAS_on', 'RAS_name') if name in options})
+    test_data = {'test_plots_on': 0, 'test_data_file': '', 't_offset': 0}
+    output = performance_code(inputs, MODE, test_data, run_options, stdout = stdout)
+    return {'inputs': inputs, 'mode': MODE, 'test_data': test_data, 'options': options, 'output': output}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Design a liquid engine for the goals of a saved DesignLiquid workspace.')
+    parser.add_argument('workspace', help = '.mat workspace saved from the DesignLiquid page with the Python backend')
+    parser.add_argument('--set', action = 'append', default = [], type = split_assignment, metavar = 'FIELD=VALUE',
+                        help = 'change a goal, design or initial input, in base units (e.g. goal.total_impulse=20000)')
+    parser.add_argument('--processes', type = int, help = 'worker processes (default: one per variable, up to one per core)')
+    parser.add_argument('--cold', action = 'store_true', help = "don't warm-start from archived designs")
+    parser.add_argument('--output', help = '.mat file to save the designed workspace to')
+    args = parser.parse_args()
+
+    workspace = load_workspace(args.workspace, INPUT_STRUCTS, 'initial_inputs')
+    workspace = apply_case(workspace, {field: float(value) for field, value in args.set})
+    perf_results = design_liquid(workspace['initial_inputs'], workspace['goal'], workspace['design'], workspace.get('options'),
+                                 args.processes, not args.cold)
+    if args.output:
+        scipy.io.savemat(args.output, perf_results)
+        print('Saved ' + args.output)
@@ -0,0 +1,177 @@
+'''
+    EnginePool:
+
+    A pool of MATLAB engines, so that several SimPages (or several runs of one page) can run at once. The engines are started in the
+    background when the pool is created, each with Supporting Functions on the path and the persistent tables of FindG and N2O_FindT
+    already built, so no run pays for starting MATLAB or building the tables.
+
+    A SimPage builds its MATLAB workspace on an engine it owns, and runs on that engine. Engines are handed out by acquire(): an idle
+    engine the page already owns if there is one, otherwise an idle engine no page owns, otherwise the idle engine least recently
+    used by another page (whose workspace that page then has to rebuild, see SimPage.engine_lost()). The command line runs on the
+    engine of the active page's workspace (see command_engine()), acquired like a run so the two never share an engine at once. The
+    pool keeps track of how long each engine has been busy, which report() prints as its utilisation.
+'''
+
+import os
+import threading
+import time
+
+try:
+    import matlab.engine
+except ImportError:
+    matlab = None # the pool can't be used without MATLAB
+
+POOL_SIZE = 2 # number of engines started by the MainWindow
+WARMUP_COMMANDS = ["FindG(290, 4e6, 3e6) ;", "N2O_FindT(3e6) ;"] # build the persistent tables of each engine
+
+class PooledEngine():
+    ''' A MATLAB engine of an EnginePool, with its owner and usage statistics. '''
+    def __init__(self, index):
+        self.index = index # number of this engine in the pool (from 1)
+        self.engine = None # the MATLAB engine, set once it has started
+        self.owner = None # SimPage whose workspace is built on this engine, if any
+        self.busy = False # whether the engine is building or running
+        self.busy_since = None # time the current use started
+        self.busy_time = 0.0 # total time spent busy by finished uses [s]
+        self.uses = 0 # number of finished uses
+        self.last_used = 0.0 # time the last use finished
+        self.ready_time = None # time the engine finished starting up
+
+    def utilisation(self):
+        ''' Return the fraction of the time since the engine started that it has been busy. '''
+        if self.ready_time is None:
+            return 0.0
+        now = time.time()
+        busy_time = self.busy_time + (now - self.busy_since if self.busy else 0.0)
+        return busy_time/max(now - self.ready_time, 1e-9)
+
+class EnginePool():
+    def __init__(self, size = POOL_SIZE, library = 'Supporting Functions'):
+        ''' Start size engines in the background, adding library (relative to the working directory) to each one's path. '''
+        if matlab is None:
+            raise RuntimeError('The MATLAB engine for Python is not installed.')
+        self.library = os.path.abspath(library)
+        self.engines = [PooledEngine(i + 1) for i in range(size)]
+        self.errors = [] # errors raised while starting engines
+        self._condition = threading.Condition()
+        for pooled in self.engines:
+            threading.Thread(target = self._start, args = (pooled,), name = 'engine_start_%d' % pooled.index, daemon = True).start()
+
+    def _start(self, pooled):
+        ''' Start and warm up an engine (run in a background thread). '''
+        try:
+            engine = matlab.engine.start_matlab(background = True).result()
+            engine.addpath(self.library, nargout = 0)
+            for command in WARMUP_COMMANDS:
+                engine.eval(command, nargout = 0)
+        except Exception as err: # report the failure, but let the other engines start
+            with self._condition:
+                self.errors.append(err)
+                self.engines.remove(pooled)
+                self._condition.notify_all()
+            return
+        with self._condition:
+            pooled.engine = engine
+            pooled.ready_time = time.time()
+            self._condition.notify_all()
+
+    def primary(self, timeout = None):
+        ''' Wait for the first engine to start and return it (the MainWindow waits for it at startup). Returns None if no engine could start. '''
+        with self._condition:
+            self._condition.wait_for(lambda: not self.engines or any(pooled.engine for pooled in self.engines), timeout)
+            return next((pooled.engine for pooled in self.engines if pooled.engine), None)
+
+    def command_engine(self, owner = None):
+        ''' Return the PooledEngine of owner's workspace (the active page) for the command line, or the first engine to start if owner
+            has none, or None if no engine has started.
+        '''
+        with self._condition:
+            owned = [pooled for pooled in self.engines if pooled.engine and owner is not None and pooled.owner is owner]
+            started = [pooled for pooled in self.engines if pooled.engine]
+            return (owned or started or [None])[0]
+
+    def _choose(self, owner, pooled):
+        ''' Return the engine acquire() should hand out, or None if none is available yet. '''
+        if pooled is not None:
+            return pooled if pooled.engine and not pooled.busy else None
+        idle = [candidate for candidate in self.engines if candidate.engine and not candidate.busy]
+        for preferred in ([c for c in idle if c.owner is owner and owner is not None], [c for c in idle if c.owner is None], idle):
+            if preferred:
+                return min(preferred, key = lambda candidate: candidate.last_used)
+        return None
+
+    def acquire(self, owner = None, pooled = None, wait = True, timeout = None):
+        ''' Mark an engine as busy and return it (a PooledEngine), or None if wait is False (or the timeout passes) and no engine is
+            free. With pooled, that particular engine is acquired; otherwise an idle engine is chosen, preferring one owner already
+            owns. The engine becomes owner's, and the other idle engines owner owned are freed for other pages. Engines of owner
+            that are still busy (e.g. with a run, whose results are read from its workspace) stay owner's until a later acquire()
+            finds them idle. Whenever an engine stops being a page's, the page is told with engine_lost(pooled) first.
+        '''
+        lost = [] # (last owner, engine) of the engines changing owner, told once the pool is unlocked
+        with self._condition:
+            if wait:
+                self._condition.wait_for(lambda: not self.engines or self._choose(owner, pooled) is not None, timeout)
+            chosen = self._choose(owner, pooled)
+            if chosen is None:
+                return None
+            now = time.time()
+            freed = [] # idle engines owner owned, held busy until owner has been told
+            if owner is not None:
+                for other in self.engines:
+                    if other.owner is owner and other is not chosen and not other.busy:
+                        other.busy = True
+                        other.busy_since = now
+                        freed.append(other)
+                        lost.append((owner, other))
+                if chosen.owner is not None and chosen.owner is not owner:
+                    lost.append((chosen.owner, chosen))
+                chosen.owner = owner
+            chosen.busy = True
+            chosen.busy_since = now
+        for lost_owner, lost_engine in lost:
+            if hasattr(lost_owner, 'engine_lost'):
+                # let the last owner keep what it needs of the workspace before it is replaced (the engine is busy, so nothing else
+                # uses it)
+                lost_owner.engine_lost(lost_engine)
+        if freed:
+            with self._condition:
+                for other in freed:
+                    other.owner = None
+                    other.busy = False
+                self._condition.notify_all()
+        return chosen
+
+    def release(self, pooled):
+        ''' Mark an engine acquired with acquire() as idle again. It stays with its owner. '''
+        with self._condition:
+            now = time.time()
+            pooled.busy = False
+            pooled.busy_time += now - pooled.busy_since
+            pooled.uses += 1
+            pooled.last_used = now
+            self._condition.notify_all()
+
+    def utilisation(self):
+        ''' Return a list with a dict of the state and utilisation of each engine. '''
+        with self._condition:
+            return [{'engine': pooled.index, 'ready': pooled.engine is not None, 'busy': pooled.busy, 'uses': pooled.uses,
+                     'owner': getattr(pooled.owner, 'name', None), 'utilisation': pooled.utilisation()} for pooled in self.engines]
+
+    def report(self):
+        ''' Return a printable summary of the utilisation of each engine. '''
+        lines = []
+        for state in self.utilisation():
+            status = ('busy' if state['busy'] else 'idle') if state['ready'] else 'starting'
+            lines.append('MATLAB engine %d: %-8s %3.0f%% utilised, %d uses%s' % (state['engine'], status, 100*state['utilisation'],
+                         state['uses'], ', workspace of ' + state['owner'] if state['owner'] else ''))
+        return '\n'.join(lines)
+
+    def close(self):
+        ''' Quit all engines. '''
+        with self._condition:
+            engines = [pooled.engine for pooled in self.engines if pooled.engine]
+        for engine in engines:
+            try:
+                engine.quit()
+            except Exception:
+                pass # the engine may already have exited
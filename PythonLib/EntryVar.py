@@ -5,9 +5,6 @@
     (assumes that the input unit has already been validated).
 '''
 
-import tkinter as tk
-import tkinter.ttk as ttk
-
 from .InputVar import InputVar
 from .units import units
 
@@ -27,6 +24,10 @@ class EntryVar(InputVar):
         ''' Set current value of self.var. '''
         if not isinstance(val, str):
             val = str(val)
+        if self.widget is None: # no widget to display the value in preferred units, so keep it exact
+            self.var.set(val)
+            self.numeric_val = None # parsed by validate()
+            return
         splitstr = val.strip('] ')
         splitstr = splitstr.split('[')
         if len(splitstr) == 1 and len(self.baseunit.split('*')) == 1: # if no unit and base unit isn't composite, convert to preferred unit from base unit
@@ -43,12 +44,18 @@ class EntryVar(InputVar):
         ''' Return the base type of this input var. '''
         return self.baseunit
 
+    def value(self):
+        ''' Return the value of this variable in its baseunit. '''
+        if self.numeric_val is None:
+            return float(self.defaultval.split('[')[0].strip()) # if entry is disabled, plug in a default value (won't matter except for the options struct)
+        return units.convert(self.numeric_val, self.parsed_unit, self.baseunit) # convert to baseunit
+
     def build(self, matlabeng):
         ''' Build this variable in the MATLAB engine's workspace. '''
         if self.numeric_val is None:
             myval = self.defaultval.split('[')[0].strip() # if entry is disabled, plug in a default value (won't matter except for the options struct)
         else:
-            myval = units.convert(self.numeric_val, self.parsed_unit, self.baseunit) # convert to baseunit
+            myval = self.value()
         if self.structname:
             matlabeng.eval(self.structname + '.' + self.name + '=' + str(myval) + ' ;', nargout = 0) # use eval to make struct variable in MATLAB workspace
         else:
@@ -56,6 +63,8 @@ class EntryVar(InputVar):
 
     def makewidget(self, parent):
         ''' Create the tk widget for this input, using parent as the parent widget. '''
+        import tkinter as tk
+        import tkinter.ttk as ttk
         self.var = tk.StringVar(parent, self.defaultval) # a Tk variable storing current status of this variable
         self.widget = ttk.Entry(parent, style = 'EntryVar.TEntry', textvariable=self.var)#, validate='focus', validatecommand=lambda *a: 'invalid' not in self.widget.state()) 
         self.widget.bind("<FocusOut>", lambda e: self.validate())
@@ -64,7 +73,7 @@ class EntryVar(InputVar):
     def validate(self):
         ''' Parse the user input, separating it into a value and a unit. Set the self.numeric_val and self.parsed_unit vars based on findings. '''
         # basic string format is <value> [<unit>] or just <value>. Handle both cases:
-        if 'disabled' in self.widget.state():
+        if self.is_disabled():
             return True # if entry is disabled, don't bother validating
         splitstr = self.get()
         splitstr = splitstr.strip('] ') # remove closing brace and leading/trailing whitespace
@@ -101,7 +110,8 @@ class EntryVar(InputVar):
 
     def set_err(self):
         ''' Change the style to reflect that an error was found during parsing. '''
-        self.widget.state(['invalid'])
+        if self.widget is not None:
+            self.widget.state(['invalid'])
 
     def on_entry(self):
         ''' Change the style back to the default when the user clicks in this entry. This stops error color-changes from being permanent. '''
@@ -0,0 +1,177 @@
+'''
+    FastInterp:
+
+    Python versions of FastInterp1.m, FastInterp2.m and FastInterp3.m from Supporting Functions. All three interpolate linearly on
+    equally-spaced grids, finding the bracketing samples arithmetically instead of searching for them. Grids are passed as 1-D axis
+    vectors rather than MATLAB meshgrid arrays, but the value arrays keep MATLAB's meshgrid layout:
+
+    - fast_interp2: V[i_y, i_x]
+    - fast_interp3: V[i_y, i_x, i_z]
+
+    fast_interp2 and fast_interp3 are built on GridInterpolant, a multilinear interpolant on equally-spaced grids of any dimension.
+    A GridInterpolant precomputes the grid spacing and stacks several value arrays sampled on the same grid, so one lookup
+    interpolates all of them (e.g. the four combustion properties), and it accepts arrays of query points as well as scalars.
+    Compare it with scipy's RegularGridInterpolator with:
+
+        python -m PythonLib.FastInterp
+
+    Also provides interp1(), the equivalent of MATLAB's interp1(x, v, xq, 'linear', 'extrap') for non-uniform grids, and interp3(),
+    the non-uniform counterpart of fast_interp3().
+'''
+
+import time
+import itertools
+import numpy as np
+
+class GridInterpolant:
+    ''' Multilinear interpolant of one or more value arrays sampled on the same equally-spaced grid. axes are the axis vectors of
+        the grid, in the order of the dimensions of the value arrays, and values is a list of the value arrays. Queries outside of
+        the grid extrapolate linearly from the edge cells, like the FastInterp functions.
+    '''
+    def __init__(self, axes, values):
+        self.axes = [np.asarray(axis, dtype = float) for axis in axes]
+        self.shape = tuple(len(axis) for axis in self.axes)
+        if min(self.shape) < 2:
+            raise ValueError('Each grid axis needs at least two samples.')
+        for V in values:
+            if np.shape(V) != self.shape:
+                raise ValueError('Value array of shape %s does not match the grid %s.' % (np.shape(V), self.shape))
+        if len(values) == 1: # a view, so large (e.g. memory-mapped) tables aren't copied
+            self.values = np.asarray(values[0], dtype = float)[..., np.newaxis]
+        else:
+            self.values = np.stack([np.asarray(V, dtype = float) for V in values], axis = -1) # [grid indices..., value]
+        self._origins = [float(axis[0]) for axis in self.axes]
+        self._inv_steps = [(len(axis) - 1)/float(axis[-1] - axis[0]) for axis in self.axes]
+        self._strides = [int(np.prod(self.shape[i + 1:])) for i in range(len(self.shape))] # of the flattened grid
+
+    def __call__(self, *points):
+        ''' Interpolate all value arrays at a point, given one coordinate per axis. With scalar coordinates, returns a list of the
+            interpolated values; with arrays, returns an array of the broadcast query shape with a trailing axis of values.
+        '''
+        if all(isinstance(q, (float, int, np.number)) for q in points):
+            # scalar query: weight the corners of the cell around the point (in the cell's C order), then take a single dot
+            # product with the cell's values, which keeps the number of small numpy operations to a minimum
+            cell = []
+            weights = [1.0]
+            for q, origin, inv_step, n in zip(points, self._origins, self._inv_steps, self.shape):
+                i_q = (q - origin)*inv_step
+                i_lo = min(max(int(i_q), 0), n - 2)
+                cell.append(slice(i_lo, i_lo + 2))
+                frac = i_q - i_lo
+                weights = [weight*corner for weight in weights for corner in (1 - frac, frac)]
+            return np.dot(weights, self.values[tuple(cell)].reshape(len(weights), -1)).tolist()
+
+        # batched query: find the flat index of each point's cell once, then accumulate its weighted corners, which are at fixed
+        # offsets from it
+        points = np.broadcast_arrays(*[np.asarray(q, dtype = float) for q in points])
+        i_flat = 0
+        fracs = []
+        for q, origin, inv_step, n, stride in zip(points, self._origins, self._inv_steps, self.shape, self._strides):
+            i_q = (q - origin)*inv_step
+            i_lo = np.clip(i_q.astype(np.intp), 0, n - 2)
+            i_flat = i_flat + i_lo*stride
+            fracs.append(i_q - i_lo)
+        values = self.values.reshape(-1, self.values.shape[-1]) # a view unless the values were a non-contiguous view
+        V_q = 0.0
+        for corner in itertools.product((0, 1), repeat = len(points)):
+            weight = 1.0
+            for is_hi, frac in zip(corner, fracs):
+                weight = weight*(frac if is_hi else 1 - frac)
+            V_q = V_q + weight[..., np.newaxis]*values[i_flat + sum(is_hi*stride for is_hi, stride in zip(corner, self._strides))]
+        return V_q
+
+def fast_interp1(X, V, X_q):
+    ''' Linearly interpolate V, sampled on the equally-spaced vector X, at the point(s) X_q. Extrapolates linearly outside of X. '''
+    n_x = len(X)
+    dx = (X[-1] - X[0])/(n_x - 1)
+    i_x = (np.asarray(X_q, dtype=float) - X[0])/dx # fractional 0-based index of each query
+    i_x_lo = np.clip(np.floor(i_x), 0, n_x - 2).astype(int)
+    frac = i_x - i_x_lo
+    V = np.asarray(V)
+    V_q = (1.0 - frac)*V[i_x_lo] + frac*V[i_x_lo + 1]
+    if V_q.ndim == 0:
+        return float(V_q)
+    return V_q
+
+def fast_interp2(X, Y, V, X_q, Y_q):
+    ''' Bilinear interpolation of V[i_y, i_x] at the scalar point (X_q, Y_q). X and Y are equally-spaced axis vectors. '''
+    return GridInterpolant((Y, X), [V])(Y_q, X_q)[0]
+
+def fast_interp3(X, Y, Z, V, X_q, Y_q, Z_q):
+    ''' Trilinear interpolation of V[i_y, i_x, i_z] at the scalar point (X_q, Y_q, Z_q). X, Y and Z are equally-spaced axis vectors. '''
+    return GridInterpolant((Y, X, Z), [V])(Y_q, X_q, Z_q)[0]
+
+def interp1(X, V, X_q):
+    ''' Equivalent of MATLAB's interp1(X, V, X_q, 'linear', 'extrap') for a monotonically increasing (not necessarily uniform) X. '''
+    X = np.asarray(X, dtype=float)
+    V = np.asarray(V, dtype=float)
+    X_q = np.asarray(X_q, dtype=float)
+    i_x_lo = np.clip(np.searchsorted(X, X_q, side='right') - 1, 0, len(X) - 2)
+    frac = (X_q - X[i_x_lo])/(X[i_x_lo + 1] - X[i_x_lo])
+    V_q = (1.0 - frac)*V[i_x_lo] + frac*V[i_x_lo + 1]
+    if V_q.ndim == 0:
+        return float(V_q)
+    return V_q
+
+def bracket(X, X_q):
+    ''' Return the (0-based) index of the sample of the increasing vector X below the scalar X_q, and the fraction of the way
+        X_q is towards the next sample. Queries outside of X use the end intervals (so interpolation extrapolates).
+    '''
+    i_x_lo = min(max(int(np.searchsorted(X, X_q, side='right')) - 1, 0), len(X) - 2)
+    return i_x_lo, (X_q - X[i_x_lo])/(X[i_x_lo + 1] - X[i_x_lo])
+
+def interp3(X, Y, Z, V, X_q, Y_q, Z_q):
+    ''' Trilinear interpolation of V[i_y, i_x, i_z] at the scalar point (X_q, Y_q, Z_q), like fast_interp3() but for increasing,
+        not necessarily equally-spaced, axis vectors X, Y and Z.
+    '''
+    i_x_lo, f_x = bracket(X, X_q)
+    i_y_lo, f_y = bracket(Y, Y_q)
+    i_z_lo, f_z = bracket(Z, Z_q)
+    V_q = V[i_y_lo:i_y_lo + 2, i_x_lo:i_x_lo + 2, i_z_lo:i_z_lo + 2]
+    V_q = (1 - f_z)*V_q[:, :, 0] + f_z*V_q[:, :, 1]
+    V_q = (1 - f_x)*V_q[:, 0] + f_x*V_q[:, 1]
+    return float((1 - f_y)*V_q[0] + f_y*V_q[1])
+
+def benchmark(n_scalar = 2000, n_batch = 100000, stdout = None):
+    ''' Time GridInterpolant against scipy's RegularGridInterpolator for scalar lookups of four values on a 2-D grid (like the
+        combustion data) and batched lookups on a 200 x 200 x 200 grid (like the injector mass flux table), printing the time per
+        query and the largest difference between the two. Returns a dict of the timings [s per query].
+    '''
+    from scipy.interpolate import RegularGridInterpolator
+    rng = np.random.default_rng(0)
+    timings = {}
+
+    def run(label, func, queries):
+        start = time.perf_counter()
+        result = func(queries)
+        timings[label] = (time.perf_counter() - start)/len(queries)
+        print('%-40s %10.1f ns per query' % (label + ':', timings[label]*1e9), file = stdout)
+        return np.asarray(result, dtype = float)
+
+    # scalar lookups of 4 values on a 2-D grid
+    axes = (np.linspace(1e5, 5e6, 50), np.linspace(1, 15, 100))
+    values = [rng.random((50, 100)) for _ in range(4)]
+    queries = np.column_stack([rng.uniform(axis[0], axis[-1], n_scalar) for axis in axes])
+    fused = GridInterpolant(axes, values)
+    separate = [GridInterpolant(axes, [V]) for V in values]
+    scipy_fused = RegularGridInterpolator(axes, np.stack(values, axis = -1))
+    print('Scalar lookups of 4 values on a 50 x 100 grid', file = stdout)
+    expected = run('GridInterpolant, fused', lambda Q: [fused(*q) for q in Q.tolist()], queries)
+    run('GridInterpolant, one per value', lambda Q: [[interp(*q)[0] for interp in separate] for q in Q.tolist()], queries)
+    actual = run('RegularGridInterpolator, fused', lambda Q: [scipy_fused(q)[0] for q in Q], queries)
+    print('Largest difference: %.1e' % np.max(np.abs(actual - expected)), file = stdout)
+
+    # batched lookups on a 3-D grid
+    axes = tuple(np.linspace(0, 1, 200) for _ in range(3))
+    V = rng.random((200, 200, 200))
+    queries = rng.random((n_batch, 3))
+    interp = GridInterpolant(axes, [V])
+    scipy_interp = RegularGridInterpolator(axes, V)
+    print('Batched lookups on a 200 x 200 x 200 grid', file = stdout)
+    expected = run('GridInterpolant', lambda Q: interp(Q[:, 0], Q[:, 1], Q[:, 2])[:, 0], queries)
+    actual = run('RegularGridInterpolator', scipy_interp, queries)
+    print('Largest difference: %.1e' % np.max(np.abs(actual - expected)), file = stdout)
+    return timings
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,239 @@
+'''
+    FindG:
+
+    Python version of FindG.m from Supporting Functions. Finds the injector mass flux of two-phase nitrous oxide by interpolating
+    in a table of TwoPhaseN2OFlow results over upstream temperature, normalized upstream pressure and normalized downstream pressure.
+    The table is built on first use and kept for the rest of the session (the equivalent of the MATLAB persistent variables).
+
+    Built tables are also saved to CACHE_DIR as .npy files, in a folder named after the grid and a hash of everything the table
+    depends on (grid ranges, resolution, spacing and the N2O property model). Later sessions, and other processes, memory-map the
+    saved table read-only instead of rebuilding it.
+
+    The temperature slices of the table are independent, so they are calculated by a pool of worker processes, which write their
+    slices straight into the memory-mapped table files (only slice indices are sent to the workers). In a daemonic process (a
+    worker of a Sweep or MonteCarlo pool, which can't have children) the table is built serially. The resolution (GRID_SIZE) and the
+    spacing of the downstream pressure axis (P_DOWN_SPACING) can be changed before the table is first used, or set for every process
+    with the environment variables PROPSIM_FINDG_SIZE and PROPSIM_FINDG_SPACING. To build the table ahead of time, run from the
+    PropSim folder:
+
+        python -m PythonLib.FindG [--size N] [--spacing uniform|refined] [--processes N]
+
+    The defaults of --size and --spacing are the table get_table() loads; a table built with other values is only used by sessions
+    run with the environment variables set to them.
+'''
+
+import os
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import warnings
+import multiprocessing
+import numpy as np
+
+from .N2OProperties import n2o_properties, properties_hash, T_MIN, T_MAX
+from .TwoPhaseN2OFlow import two_phase_n2o_flow, P_UP_NORM_RANGE, P_DOWN_NORM_RANGE
+from .FastInterp import GridInterpolant, interp3
+
+GRID_SIZE = int(os.environ.get('PROPSIM_FINDG_SIZE', 200)) # number of grid points along each dimension
+P_DOWN_SPACING = os.environ.get('PROPSIM_FINDG_SPACING', 'uniform') # spacing of the downstream pressure axis, see p_down_norm_axis
+PROCESSES = None # number of worker processes used to build the table (None for one per core)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Cache') # folder of saved tables
+TABLE_ARRAYS = ('T', 'p_1_norm', 'p_2_norm', 'G', 'G_crit', 'p_down_norm_crit') # arrays of the table, each saved to <name>.npy
+
+_table = None # mass flux table, built on first use
+_p_2_uniform = True # whether the table's downstream pressure axis is equally spaced (so G can use a GridInterpolant)
+_G_interpolant = None # interpolant of G, if the table is equally spaced
+_crit_interpolant = None # interpolant of G_crit and p_down_norm_crit
+_worker_table = None # table mapped by a worker process
+
+def p_down_norm_axis(n, spacing = None):
+    ''' Return the n-point normalized downstream pressure axis of the table. With 'uniform' spacing the points are equally spaced;
+        'refined' spacing shrinks quadratically towards p_down_norm = 1, where the mass flux rises as the square root of the pressure
+        drop and the critical pressure ratios of low upstream pressures lie, at the expense of low downstream pressures (where the
+        flow is choked and the mass flux is constant).
+    '''
+    spacing = spacing or P_DOWN_SPACING
+    u = np.linspace(0, 1, n)
+    if spacing == 'uniform':
+        x = u
+    elif spacing == 'refined':
+        x = 1 - (1 - u)**2
+    else:
+        raise ValueError('Unknown downstream pressure spacing: ' + str(spacing))
+    return P_DOWN_NORM_RANGE[0] + (P_DOWN_NORM_RANGE[1] - P_DOWN_NORM_RANGE[0])*x
+
+def build_table(n = None, spacing = None, processes = None, path = None):
+    ''' Build the injector mass flux table on an n x n x n grid. Returns a dict with the axis vectors ('T', 'p_1_norm', 'p_2_norm'),
+        the mass flux 'G' (indexed [p_1_norm, T, p_2_norm], as the MATLAB meshgrid) and the critical flow tables 'G_crit' and
+        'p_down_norm_crit' (indexed [p_1_norm, T]). Defaults are taken from GRID_SIZE, P_DOWN_SPACING and PROCESSES.
+        If path is given (an existing folder), the arrays are written to .npy files there and the returned table maps them;
+        otherwise the table is held in memory.
+    '''
+    n = n or GRID_SIZE
+    processes = min(processes or PROCESSES or os.cpu_count() or 1, n)
+    if multiprocessing.current_process().daemon:
+        processes = 1 # daemonic processes (pool workers) aren't allowed to have children
+    if path is None and processes > 1:
+        # workers share the table through files, so build it in a temporary folder and read it back into memory
+        tmp_path = tempfile.mkdtemp(prefix = 'FindG_')
+        try:
+            mapped = build_table(n, spacing, processes, tmp_path)
+            table = {name: np.array(mapped[name]) for name in TABLE_ARRAYS}
+            del mapped # unmap the files, so they can be deleted
+            return table
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors = True)
+
+    table = {'T': np.linspace(T_MIN, T_MAX, n),
+             'p_1_norm': np.linspace(P_UP_NORM_RANGE[0], P_UP_NORM_RANGE[1], n),
+             'p_2_norm': p_down_norm_axis(n, spacing)}
+    shapes = {'G': (n, n, n), 'G_crit': (n, n), 'p_down_norm_crit': (n, n)}
+    if path is None:
+        table.update({name: np.zeros(shape) for name, shape in shapes.items()})
+    else:
+        for name, axis in table.items():
+            np.save(os.path.join(path, name + '.npy'), axis)
+        for name, shape in shapes.items():
+            np.lib.format.open_memmap(os.path.join(path, name + '.npy'), mode = 'w+', shape = shape).flush()
+        table = load_table(path, 'r+')
+
+    print('Calculating Oxidizer Mass Flux Array...')
+    if processes == 1:
+        for ii in range(n):
+            _fill_slice(table, ii)
+    else:
+        # spawn (rather than fork) workers, which is safe when building from one of the GUI's threads
+        with multiprocessing.get_context('spawn').Pool(processes, initializer = _init_worker, initargs = (path,)) as pool:
+            chunks = [list(range(start, n, processes)) for start in range(processes)] # interleaved, to balance the work
+            pool.map(_fill_slices, chunks)
+        table = load_table(path, 'r+') # the workers' writes are in the files, re-map them to be sure they are seen
+    for name in shapes:
+        if isinstance(table[name], np.memmap):
+            table[name].flush()
+    return table
+
+def _fill_slice(table, ii):
+    ''' Calculate the ii-th temperature slice of the table. '''
+    # TwoPhaseN2OFlow is evaluated on the same pressure grid, so its results drop straight into the table
+    crit_flow, mass_flux = two_phase_n2o_flow(table['T'][ii], p_up_norm = table['p_1_norm'], p_down_norm = table['p_2_norm'])
+    table['G_crit'][:, ii] = crit_flow['G_crit']
+    table['p_down_norm_crit'][:, ii] = crit_flow['p_down_norm_crit']
+    table['G'][:, ii, :] = mass_flux['G'].T
+
+def _init_worker(path):
+    ''' Map the table being built in a worker process. '''
+    global _worker_table
+    _worker_table = load_table(path, 'r+')
+
+def _fill_slices(indices):
+    ''' Calculate the temperature slices of the table at indices in a worker process. '''
+    for ii in indices:
+        _fill_slice(_worker_table, ii)
+    for name in ('G', 'G_crit', 'p_down_norm_crit'):
+        _worker_table[name].flush()
+
+def table_path(n = None, spacing = None):
+    ''' Return the cache folder of the n x n x n table. Its name includes a hash of the grid ranges, the resolution, the spacing and
+        the N2O property model, so a table is never reused after any of them change.
+    '''
+    n = n or GRID_SIZE
+    key = repr((n, spacing or P_DOWN_SPACING, (T_MIN, T_MAX), P_UP_NORM_RANGE, P_DOWN_NORM_RANGE)) + properties_hash()
+    return os.path.join(CACHE_DIR, 'FindG_%d_%s' % (n, hashlib.sha1(key.encode()).hexdigest()[:16]))
+
+def load_table(path, mode = 'r'):
+    ''' Memory-map a saved table (read-only by default). Raises OSError or ValueError if it is missing or unreadable. '''
+    return {name: np.load(os.path.join(path, name + '.npy'), mmap_mode = mode) for name in TABLE_ARRAYS}
+
+def build_saved_table(path, n = None, spacing = None, processes = None):
+    ''' Build a table and save it to the folder path, returning it mapped read-only. The table is built in a temporary folder and
+        renamed into place, so other processes never see a partly-written table; if another process saved the same table first,
+        its copy is used.
+    '''
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    tmp_path = tempfile.mkdtemp(prefix = '.tmp_', dir = os.path.dirname(path))
+    try:
+        os.chmod(tmp_path, 0o755) # mkdtemp makes the folder private, but the table is meant to be shared
+        build_table(n, spacing, processes, tmp_path) # discard the result, so the files are unmapped before the rename
+        os.rename(tmp_path, path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors = True)
+        if not os.path.isdir(path):
+            raise
+    return load_table(path)
+
+def get_table(cache = True):
+    ''' Return the session's mass flux table: the saved table if there is one (see table_path), otherwise a newly built table,
+        which is then saved. Pass cache = False to always build the table and not save it.
+    '''
+    global _table, _p_2_uniform, _G_interpolant, _crit_interpolant
+    if _table is None:
+        path = table_path()
+        if cache and os.path.isdir(path):
+            try:
+                _table = load_table(path)
+            except (OSError, ValueError) as err:
+                warnings.warn('Could not load mass flux table from %s (%s), rebuilding it.' % (path, err))
+        if _table is None and cache:
+            try:
+                _table = build_saved_table(path)
+            except (OSError, ValueError) as err:
+                warnings.warn('Could not save mass flux table to %s (%s).' % (path, err))
+        if _table is None:
+            _table = build_table()
+        dp_2 = np.diff(_table['p_2_norm'])
+        _p_2_uniform = bool(np.allclose(dp_2, dp_2[0]))
+        if _p_2_uniform:
+            _G_interpolant = GridInterpolant((_table['p_1_norm'], _table['T'], _table['p_2_norm']), [_table['G']])
+        _crit_interpolant = GridInterpolant((_table['p_1_norm'], _table['T']), [_table['G_crit'], _table['p_down_norm_crit']])
+    return _table
+
+def find_g(T_up, p_up, p_down, p_vap = None):
+    ''' Find the injector mass flux for upstream temperature T_up [K], upstream pressure p_up [Pa] and downstream pressure p_down [Pa].
+        Returns (G, G_crit, p_down_crit): mass flux [kg/m^2*s], critical mass flux for the upstream pressure [kg/m^2*s], and the
+        critical downstream pressure for the upstream pressure [Pa]. p_vap may pass in the vapor pressure at T_up if already known.
+    '''
+    table = get_table()
+    if p_vap is None:
+        p_vap = n2o_properties(T_up)['Pvap']
+    T_range = (table['T'][0], table['T'][-1])
+    p_1_range = (table['p_1_norm'][0], table['p_1_norm'][-1])
+    p_2_range = (table['p_2_norm'][0], table['p_2_norm'][-1])
+
+    # Interpolation error catching
+    if T_up > T_range[1] or T_up < T_range[0]:
+        warnings.warn('T_up = %f out of range: [%f, %f]' % (T_up, T_range[0], T_range[1]))
+        T_up = max(min(T_up, T_range[1]), T_range[0])
+    elif p_up/p_vap > p_1_range[1] or p_up/p_vap < p_1_range[0]:
+        warnings.warn('p_up/p_vap = %f out of range: [%f, %f]' % (p_up/p_vap, p_1_range[0], p_1_range[1]))
+        p_up = max(min(p_up, p_vap*p_1_range[1]), p_vap*p_1_range[0])
+    elif p_down/p_up > p_2_range[1] or p_down/p_up < p_2_range[0]:
+        warnings.warn('p_down/p_up = %f out of range: [%f, %f]' % (p_down/p_up, p_2_range[0], p_2_range[1]))
+        p_down = max(min(p_down, p_up*p_2_range[1]), p_up*p_2_range[0])
+
+    # Interpolation
+    if _p_2_uniform:
+        G = _G_interpolant(p_up/p_vap, T_up, p_down/p_up)[0]
+    else:
+        G = interp3(table['T'], table['p_1_norm'], table['p_2_norm'], table['G'], T_up, p_up/p_vap, p_down/p_up)
+    G_crit, p_down_norm_crit = _crit_interpolant(p_up/p_vap, T_up)
+    p_down_crit = p_down_norm_crit*p_up
+    return G, G_crit, p_down_crit
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Build and save the injector mass flux table.')
+    parser.add_argument('--size', type = int, default = GRID_SIZE,
+                        help = 'grid points along each dimension (default %d; simulations use the table of PROPSIM_FINDG_SIZE)' % GRID_SIZE)
+    parser.add_argument('--spacing', choices = ('uniform', 'refined'), default = P_DOWN_SPACING,
+                        help = 'spacing of the downstream pressure axis (default %s; simulations use the table of PROPSIM_FINDG_SPACING)'
+                        % P_DOWN_SPACING)
+    parser.add_argument('--processes', type = int, default = PROCESSES, help = 'worker processes (default: one per core)')
+    args = parser.parse_args()
+    path = table_path(args.size, args.spacing)
+    if os.path.isdir(path):
+        print('Mass flux table already saved in ' + os.path.normpath(path))
+    else:
+        start = time.perf_counter()
+        build_saved_table(path, args.size, args.spacing, args.processes)
+        print('Mass flux table saved in %s (%.1f s)' % (os.path.normpath(path), time.perf_counter() - start))
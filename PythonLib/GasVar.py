@@ -7,8 +7,6 @@
     TODO: Add more common gases!
 '''
 
-import tkinter as tk
-import tkinter.ttk as ttk
 from .InputVar import InputVar
 
 # gases available in GasVar dropdown - cv is in J/kg/K, molecular mass in kg/mol
@@ -17,6 +15,8 @@ gas_library =  {'nitrogen'   :{'c_v': 743.0, 'molecular_mass':0.0280134},
                 }
 
 class GasVar(InputVar):
+    matlab_constructor = 'Gas()' # built as a Gas object from the fields of value() by bulk builds
+
     def __init__(self, name, defaultval, baseunit='gas', structname = None, description = ''):
         super().__init__(name, defaultval, baseunit, structname, description) # use parent constructor
     
@@ -43,6 +43,10 @@ class GasVar(InputVar):
         ''' Return the base type of this input var. '''
         return self.baseunit
 
+    def value(self):
+        ''' Return the properties of the selected gas as a dict, with the fields of a MATLAB Gas object. '''
+        return dict(gas_library[self.get()])
+
     def build(self, matlabeng):
         ''' Build this variable in the MATLAB engine's workspace. '''
         ''' NOTE: This assumes that a Pressurant object has already been created and assigned to the struct name. '''
@@ -55,6 +59,8 @@ class GasVar(InputVar):
 
     def makewidget(self, parent):
         ''' Create the tk widget for this input, using parent as the parent widget. '''
+        import tkinter as tk
+        import tkinter.ttk as ttk
         self.var = tk.StringVar(parent, self.defaultval) # a Tk variable storing current status of this variable (0/False is off, 1/True is on)
         self.widget = ttk.OptionMenu(parent, self.var, self.defaultval, *(gas_library.keys())) # create dropdown of gas names        
 
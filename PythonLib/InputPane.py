@@ -12,18 +12,18 @@ import tkinter as tk
 import tkinter.ttk as ttk
 
 class InputPane(ttk.Notebook):
-    def __init__(self, mainframe, mainwindow, matlabeng, simpages):
+    def __init__(self, mainframe, mainwindow, engine_pool, simpages):
         super().__init__(mainframe)
         self.mainframe = mainframe
         self.mainwindow = mainwindow
         self.plotPane = mainwindow.plotPane
-        self.matlabeng = matlabeng
+        self.engine_pool = engine_pool # EnginePool of MATLAB engines (None if MATLAB isn't available)
         self.simpages = simpages
 
         self.curr_tab = None # index of current tab, None initially to prevent prompting for save on startup
 
         for page in simpages:
-            page.makewidget(self, self.matlabeng) # create each SimPage with self as the parent
+            page.makewidget(self, self.engine_pool) # create each SimPage with self as the parent
             self.add(page, text = page.name) # create a tab for this frame, with name as the tab name
 
         self.bind("<<NotebookTabChanged>>", lambda event: self.ontabchange() )
@@ -10,18 +10,35 @@
     - a struct name, corresponding to which struct in MATLAB this variable belongs (None or '' means the variable isn't part of a struct)
 
     In addition to the methods described above, InputVars should have a build(matlabeng) function that constructions that variable in the workspace 
-    of the matlab engine passed as a function argument. They should also have a makewidget(parent) function that constructs a tkinter widget, using the
+    of the matlab engine passed as a function argument, and a value() function returning the value that would be built as a Python object (used by
+    build_native(workspace) to construct the variable in a native workspace of nested dicts for the Python backend, which is also how
+    MATLAB workspaces are built in bulk, see MatlabWorkspace). They should also have a makewidget(parent) function that constructs a tkinter widget, using the
     passed argument as the parent widget. Finally, inheritors should have a validate() function that confirms if the user input for that value is consistent 
     (return a string describing the err if not).
 
     All children inherit the function make_tooltip(widget), which creates a tooltip linked to the widget passed as an argument. When users hover their mouse over
     that widget, a pop-up window appears providing a description of that InputVar.
+
+    InputVars can also be used without Tk (see Batch): make_headless() stores the value in a PlainVar instead of a Tk variable, and the variable
+    has no widget. tkinter is only imported by the functions that make widgets, so input definitions can be imported on machines without a display.
 '''
-from .ToolTip import ToolTip
 
 MAX_TOOLTIP_LINELEN = 40
 
+class PlainVar():
+    ''' Stand-in for a Tk variable, storing the value of an InputVar without a widget. '''
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
 class InputVar():
+    matlab_constructor = None # MATLAB constructor of the classdef object this variable is built as, if any (see MatlabWorkspace)
+
     def __init__(self, name, defaultval, baseunit, structname = None, description = ''):
         self.name = name
         self.defaultval = defaultval
@@ -31,6 +48,8 @@ class InputVar():
         self.var = None # a Tk variable storing current status of this variable
         self.widget = None # a Tk widget
         self.tooltip = None # a Tooltip object, initialized with maketooltip()
+        self.enabled = True # whether the variable is enabled by the ToggleVars linked to it
+        self.modified = True # whether the value has changed since the variable was last built (see Section.make_modified())
 
     def get(self):
         ''' Accesses the current value of self.var and returns it. '''
@@ -48,16 +67,40 @@ class InputVar():
         ''' Build this variable in the MATLAB engine's workspace. '''
         raise NotImplementedError()
 
+    def value(self):
+        ''' Return the value this variable is built with, as a Python object. '''
+        raise NotImplementedError()
+
+    def build_native(self, workspace):
+        ''' Build this variable in a native workspace, a dict of nested dicts mirroring the MATLAB structs (e.g. workspace['inputs']['ox']). '''
+        path = (self.structname + '.' + self.name if self.structname else self.name).split('.')
+        struct = workspace
+        for key in path[:-1]:
+            struct = struct.setdefault(key, {})
+        struct[path[-1]] = self.value()
+
     def makewidget(self, parent):
         ''' Create the tk widget for this input, using parent as the parent widget. '''
         raise NotImplementedError()
 
+    def make_headless(self):
+        ''' Store the value of this input without a widget, starting from the default value. '''
+        self.var = PlainVar(self.defaultval)
+        self.widget = None
+
+    def is_disabled(self):
+        ''' Return whether this input is disabled (by a ToggleVar linked to it). '''
+        if self.widget is None:
+            return not self.enabled
+        return 'disabled' in self.widget.state()
+
     def validate(self):
         ''' Confirm whether the user input is valid or not. '''
         raise NotImplementedError()
 
     def maketooltip(self, tip_widget):
         ''' Create a tooltip that is linked to a tip_widget. makewidget() must be called first! '''
+        from .ToolTip import ToolTip
         if self.get_type().lower() not in ('gas','boolean','file'):
             descrip_str = self.name + '       ( unit: [' + self.get_type() + '] )\n'
         else:
@@ -0,0 +1,801 @@
+'''
+    Integration:
+
+    Python version of Integration.m (with StateVector.m, LiquidStateVector.m, HybridStateVector.m and Gas.m) from Supporting Functions,
+    used as the native backend of SimPages that support it. Integrates the differential equations of the rocket engine with scipy's stiff
+    BDF solver (the counterpart of ode15s), stopping when a propellant runs out, and produces the same record fields as the MATLAB code.
+
+    The hybrid state is kept in a flat float64 array (see HybridStateVector), and the grain regression and geometry kernels are compiled
+    with Numba when it is installed.
+
+    The inputs and mode arguments are nested dicts mirroring the MATLAB structs (e.g. inputs['ox']['V_tank'], mode['combustion_on']),
+    with pressurants as dicts of the Pressurant properties and gas_properties as dicts of the Gas properties (see GasVar).
+'''
+
+import math
+import warnings
+import numpy as np
+from scipy.integrate import solve_ivp
+try:
+    from numba import njit
+except ImportError:
+    njit = None # Numba is optional, kernels run as plain Python without it
+
+from .N2OProperties import n2o_properties
+from .FindG import find_g
+from .NozzleCalc import nozzle_calc
+from .FastInterp import GridInterpolant, interp1
+from .CombustionData import table_cache
+from .VanDerWaals import pvdw
+
+## Constants
+R_U = 8.3144621 # Universal gas constant [J/mol*K]
+M_N2O = 0.044013 # Molecular mass of nitrous oxide [kg/mol]
+R_N2O = R_U/M_N2O # Specific gas constant of nitrous oxide [J/kg*K]
+A_N2O = 0.38828/M_N2O**2 # van der Waal's constant a for N2O [Pa*(kg/m^3)^-2]
+B_N2O = 44.15/M_N2O*1e-6 # van der Waal's constant b for N2O [m^3/kg]
+G_0 = 9.80665 # standard gravitational acceleration [m/s^2]
+
+M_AIR = 0.02897 # mean molecular mass of air [kg/mol]
+RHO_AIR = 1.225 # density of air [kg/m^3]
+GAMMA_AIR = 1.4 # ratio of specific heats of air
+
+DM_LOX_TOL = 1e-2 # liquid oxidizer mass over which liquid/gas injector flow is blended [kg]
+VAP_CONST = 1e2 # vaporization constant
+DPVAP_DT = 5e4 # approximate slope of vapor pressure w.r.t. temperature [Pa/K]
+DP_TOL = 1e5 # pressure difference over which pressurant flow is tapered to zero [Pa]
+COMB_FIELDS = ('Tc', 'M', 'gamma', 'c_star') # combustion data interpolated by combustion_calc, in order of the interpolant's values
+MAX_STEP = 0.01 # maximum integrator step [s]
+PROGRESS_INTERVAL = 0.1 # simulated time between progress reports [s]
+PROGRESS_FORMAT = 'Progress: t = %.2f s of %.2f s' # progress report, as printed by ProgressFunction in Integration.m
+
+RECORD_FIELDS = ['F_thrust', 'p_cc', 'p_oxtank', 'p_oxpresstank', 'p_fueltank', 'p_fuelpresstank', 'p_oxmanifold', 'T_oxtank',
+                 'T_cc', 'area_core', 'gamma_ex', 'm_lox', 'm_gox', 'm_fuel', 'p_crit', 'm_dot_ox_crit', 'M_e', 'p_exit', 'p_shock']
+
+class Gas():
+    ''' Properties of a pressurant gas, built from a gas_properties dict with c_v [J/kg*K] and molecular_mass [kg/mol]. '''
+    def __init__(self, c_v, molecular_mass):
+        self.c_v = float(c_v)
+        self.molecular_mass = float(molecular_mass)
+        self.R_specific = 8.3144598/self.molecular_mass # (Gas.m uses a slightly different universal gas constant)
+        self.c_p = self.c_v + self.R_specific
+        self.gamma = self.c_p/self.c_v
+
+class StateVector():
+    ''' Value of engine state common to liquid and hybrid engines, allowing access to derived variables by name. '''
+    def __init__(self, inputs, mode):
+        self.inputs = inputs
+        self.mode = mode
+
+        # Tanks
+        self.m_lox = 0.0
+        self.m_gox = 0.0
+        self.m_oxtank_press = 0.0 # mass of pressurant in oxidizer tank
+        self.m_oxpresstank = 0.0 # mass of pressurant in oxidizer pressurant tank
+        self.T_oxtank = 0.0
+        self.N2O_properties = None
+
+        # Combustion chamber
+        self.m_cc = 0.0 # mass of gas
+        self.M_cc = 0.0 # molecular mass of gas
+        self.gamma_cc = 0.0 # ratio of specific heats of gas
+        self.T_cc = 0.0 # temperature of gas
+
+    @property
+    def V_lox(self):
+        ''' Volume of liquid oxidizer. '''
+        return self.m_lox/self.N2O_properties['rho_l']
+
+    @property
+    def V_ox_ullage(self):
+        ''' Ullage volume in oxidizer tank. '''
+        return self.inputs['ox']['V_tank'] - self.V_lox
+
+    @property
+    def p_oxtank(self):
+        ''' Oxidizer tank pressure. '''
+        return self.p_gox + self.p_oxtank_press
+
+    @property
+    def oxtank_m_cv(self):
+        ''' Thermal capacity of oxidizer tank (constant volume). '''
+        return (self.m_lox*self.N2O_properties['cv_l'] + self.m_gox*self.N2O_properties['cv_g']
+                + self.m_oxtank_press*self.inputs['ox_pressurant']['gas_properties'].c_v)
+
+    @property
+    def oxtank_m_cp(self):
+        ''' Thermal capacity of oxidizer tank (constant pressure). '''
+        return (self.m_lox*self.N2O_properties['cp_l'] + self.m_gox*self.N2O_properties['cp_g']
+                + self.m_oxtank_press*self.inputs['ox_pressurant']['gas_properties'].c_p)
+
+    @property
+    def p_gox(self):
+        ''' Oxidizer tank partial pressure of oxidizer. '''
+        return pvdw(self.T_oxtank, self.m_gox/self.V_ox_ullage, R_N2O, A_N2O, B_N2O)
+
+    @property
+    def p_oxmanifold(self):
+        ''' Pressure in the oxidizer injector manifold. '''
+        # Calculate height difference between liquid level and manifold
+        dh_lox = self.inputs['ox']['h_offset_tank'] + self.V_lox/(math.pi*(self.inputs['ox']['tank_id']/2)**2)
+        if self.mode['flight_on']:
+            # accel_net is undefined at this point in StateVector.m, so flight simulation cannot run in MATLAB either
+            raise NotImplementedError('Flight simulation (mode.flight_on) is not supported by the integrator.')
+        return self.p_oxtank + G_0*self.N2O_properties['rho_l']*dh_lox
+
+    @property
+    def p_oxtank_press(self):
+        ''' Oxidizer tank partial pressure of pressurant. '''
+        return self.m_oxtank_press*self.inputs['ox_pressurant']['gas_properties'].R_specific*self.T_oxtank/self.V_ox_ullage
+
+    @property
+    def p_oxpresstank(self):
+        ''' Pressure in oxidizer pressurant tank. '''
+        return presstank_pressure(self.m_oxpresstank, self.inputs['ox_pressurant'], self.inputs['T_amb'])
+
+    @property
+    def T_oxpresstank(self):
+        ''' Temperature in oxidizer pressurant tank. '''
+        return presstank_temperature(self.p_oxpresstank, self.inputs['ox_pressurant'], self.inputs['T_amb'])
+
+    @property
+    def gamma_ox_ullage(self):
+        ''' Ullage gas ratio of specific heats. '''
+        gas = self.inputs['ox_pressurant']['gas_properties']
+        return ((self.m_gox*self.N2O_properties['cp_g'] + self.m_oxtank_press*gas.c_p)
+                /(self.m_gox*self.N2O_properties['cv_g'] + self.m_oxtank_press*gas.c_v))
+
+    @property
+    def p_cc(self):
+        ''' Pressure in the combustion chamber. '''
+        return (self.m_cc/self.V_cc)*(R_U/self.M_cc)*self.T_cc
+
+class LiquidStateVector(StateVector):
+    ''' State of a liquid rocket. '''
+    def __init__(self, inputs, mode):
+        super().__init__(inputs, mode)
+        self.T_fueltank_press = 0.0 # fuel tank temperature
+        self.m_fueltank_press = 0.0 # mass of pressurant in fuel tank
+        self.m_fuelpresstank = 0.0 # mass of pressurant in fuel pressurant tank
+        self.m_fuel = 0.0 # fuel mass, kg
+
+    @property
+    def p_fueltank(self):
+        ''' Fuel tank pressure. '''
+        return (self.m_fueltank_press*self.inputs['fuel_pressurant']['gas_properties'].R_specific
+                *self.T_fueltank_press/self.V_fuel_ullage)
+
+    @property
+    def p_fuelpresstank(self):
+        ''' Pressure in fuel pressurant tank. '''
+        return presstank_pressure(self.m_fuelpresstank, self.inputs['fuel_pressurant'], self.inputs['T_amb'])
+
+    @property
+    def T_fuelpresstank(self):
+        ''' Temperature in fuel pressurant tank. '''
+        return presstank_temperature(self.p_fuelpresstank, self.inputs['fuel_pressurant'], self.inputs['T_amb'])
+
+    @property
+    def V_fuel(self):
+        ''' Volume of fuel. '''
+        return self.m_fuel/self.inputs['fuel']['rho']
+
+    @property
+    def V_fuel_ullage(self):
+        ''' Ullage volume in fuel tank. '''
+        return self.inputs['fuel']['V_tank'] - self.V_fuel
+
+    @property
+    def V_cc(self):
+        ''' Combustion chamber volume. '''
+        return math.pi/4*self.inputs['d_cc']**2*self.inputs['length_cc']
+
+    def column_vector(self):
+        ''' Create state vector for the integrator. '''
+        return np.array([self.m_lox, self.m_gox, self.m_oxtank_press, self.m_oxpresstank, self.m_fueltank_press,
+                         self.m_fuelpresstank, self.T_oxtank, self.T_fueltank_press, self.m_fuel, self.m_cc, self.M_cc,
+                         self.gamma_cc, self.T_cc])
+
+    @classmethod
+    def from_column_vector(cls, x, inputs, mode):
+        ''' Create a state from an integrator state vector. '''
+        obj = cls(inputs, mode)
+        (obj.m_lox, obj.m_gox, obj.m_oxtank_press, obj.m_oxpresstank, obj.m_fueltank_press, obj.m_fuelpresstank, obj.T_oxtank,
+         obj.T_fueltank_press, obj.m_fuel, obj.m_cc, obj.M_cc, obj.gamma_cc, obj.T_cc) = (float(v) for v in x)
+        obj.N2O_properties = n2o_properties(obj.T_oxtank)
+        return obj
+
+class _StateIndex():
+    ''' Descriptor exposing one element of a state vector's flat array as an attribute. '''
+    def __init__(self, index):
+        self.index = index
+
+    def __get__(self, obj, objtype = None):
+        if obj is None:
+            return self
+        return obj.x[self.index]
+
+    def __set__(self, obj, value):
+        obj.x[self.index] = value
+
+# Indices of the hybrid state vector
+I_M_LOX, I_M_GOX, I_M_OXTANK_PRESS, I_M_OXPRESSTANK, I_T_OXTANK, I_M_FUEL, I_M_CC, I_M_MOL_CC, I_GAMMA_CC, I_T_CC = range(10)
+N_HYBRID_STATES = 10
+
+class HybridStateVector(StateVector):
+    ''' State of a hybrid rocket, stored in a flat float64 array x (in the order of HybridStateVector.m's column vector) and accessed
+        by name through the StateVector attributes.
+    '''
+    m_lox = _StateIndex(I_M_LOX)
+    m_gox = _StateIndex(I_M_GOX)
+    m_oxtank_press = _StateIndex(I_M_OXTANK_PRESS)
+    m_oxpresstank = _StateIndex(I_M_OXPRESSTANK)
+    T_oxtank = _StateIndex(I_T_OXTANK)
+    m_fuel = _StateIndex(I_M_FUEL) # fuel mass, kg
+    m_cc = _StateIndex(I_M_CC)
+    M_cc = _StateIndex(I_M_MOL_CC)
+    gamma_cc = _StateIndex(I_GAMMA_CC)
+    T_cc = _StateIndex(I_T_CC)
+
+    def __init__(self, inputs, mode, x = None):
+        self.x = np.zeros(N_HYBRID_STATES) if x is None else x
+        if x is None:
+            super().__init__(inputs, mode)
+        else: # keep the values of x
+            self.inputs = inputs
+            self.mode = mode
+            self.N2O_properties = None
+
+    @property
+    def V_cc(self):
+        ''' Combustion chamber volume, less the volume of the fuel grain. '''
+        fuel = self.inputs['fuel']
+        return grain_geometry(self.m_fuel, fuel['rho'], fuel['grain_od'], fuel['grain_length'], self.inputs['d_cc'],
+                              self.inputs['length_cc'])[1]
+
+    @property
+    def rad_port(self):
+        ''' Radius of the grain port. '''
+        fuel = self.inputs['fuel']
+        return grain_geometry(self.m_fuel, fuel['rho'], fuel['grain_od'], fuel['grain_length'], self.inputs['d_cc'],
+                              self.inputs['length_cc'])[0]
+
+    def column_vector(self):
+        ''' Create state vector for the integrator. '''
+        return self.x.copy()
+
+    @classmethod
+    def from_column_vector(cls, x, inputs, mode):
+        ''' Create a state from an integrator state vector (without copying it). '''
+        obj = cls(inputs, mode, np.asarray(x, dtype = np.float64))
+        obj.N2O_properties = n2o_properties(float(x[I_T_OXTANK]))
+        return obj
+
+class Recorder():
+    ''' Records variables that are not part of the state during integration (the equivalent of the MATLAB global recording
+        variables), at most once per output time step.
+    '''
+    def __init__(self, tspan, fields = RECORD_FIELDS):
+        self.dt = np.mean(np.diff(tspan))
+        self.n_rec = 0
+        self.time_rec = []
+        self.values = {field: [] for field in fields}
+
+    def record(self, time, **values):
+        ''' Record values at time if a new output time step has been reached. '''
+        if math.floor(time/self.dt) > self.n_rec and (self.n_rec == 0 or time > self.time_rec[-1]):
+            self.time_rec.append(time)
+            for field in self.values:
+                self.values[field].append(values[field])
+            self.n_rec += 1
+
+    def output(self, tspan, inputs, mode):
+        ''' Output values of recorded variables at tspan, along with performance summaries. '''
+        record = {}
+        for field in self.values:
+            record[field] = interp1(self.time_rec, self.values[field], tspan)
+
+        A_star = math.pi/4*inputs['d_throat']**2
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            record['time'] = tspan
+            record['m_ox'] = record['m_lox'] + record['m_gox']
+            record['impulse'] = trapz(tspan, record['F_thrust'])
+            record['m_dot_ox'] = -np.concatenate(([0], np.diff(record['m_ox'])/np.diff(tspan)))
+            record['m_dot_fuel'] = -np.concatenate(([0], np.diff(record['m_fuel'])/np.diff(tspan)))
+            record['OF_i'] = record['m_dot_ox']/record['m_dot_fuel']
+            record['OF'] = trapz(tspan, record['m_dot_ox'])/trapz(tspan, record['m_dot_fuel'])
+            record['m_dot_prop'] = record['m_dot_ox'] + record['m_dot_fuel']
+            record['c_star_i'] = record['p_cc']*A_star/record['m_dot_prop']
+            record['c_star'] = trapz(tspan, record['p_cc'])*A_star/trapz(tspan, record['m_dot_prop'])
+            record['c_f_i'] = record['F_thrust']/(A_star*record['p_cc'])
+            record['c_f'] = record['impulse']/(trapz(tspan, record['p_cc'])*A_star)
+            record['Isp_i'] = record['F_thrust']/record['m_dot_prop']
+            record['Isp'] = record['impulse']/trapz(tspan, record['m_dot_prop'])
+
+            record['ox_pressure_drop'] = (record['p_oxmanifold'] - record['p_cc'])/record['p_oxtank']
+            if mode['type'] == 'liquid':
+                record['fuel_pressure_drop'] = (record['p_fueltank'] - record['p_cc'])/record['p_fueltank']
+        return record
+
+def integration(inputs, mode, tspan, progress = None):
+    ''' Integrate the engine model over tspan. Returns (tout, record), where record is a dict of the recorded variables at tout.
+        If progress is a file, the simulated time is printed to it (in PROGRESS_FORMAT) every PROGRESS_INTERVAL.
+    '''
+    inputs = prepare_inputs(inputs, mode)
+
+    ## State Vector Initialization
+    if mode['type'] == 'hybrid':
+        state_0, x0 = initialize_hybrid_state(inputs, mode)
+        model = hybrid_model
+        from_column_vector = HybridStateVector.from_column_vector
+    elif mode['type'] == 'liquid':
+        state_0, x0 = initialize_liquid_state(inputs, mode)
+        model = liquid_model
+        from_column_vector = LiquidStateVector.from_column_vector
+    else:
+        raise ValueError("The integrator does not support mode.type '" + str(mode['type']) + "'.")
+
+    ## Solution
+    recorder = Recorder(tspan)
+    odefun = lambda t, y: model(t, y, inputs, mode, recorder)
+    if progress is not None:
+        odefun = _reporting_progress(odefun, tspan[-1], progress)
+    # Hybrids burn until injector flow ends; past that point the chamber model switches to c_star = 1 and becomes too discontinuous
+    # for the BDF solver, which then accepts spurious steps
+    events = [terminal_function(ii, from_column_vector, inputs, mode) for ii in range(3 if mode['type'] == 'hybrid' else 2)]
+    sol = solve_ivp(odefun, (tspan[0], tspan[-1]), x0, method = 'BDF', t_eval = tspan, events = events, max_step = MAX_STEP)
+    if sol.status == -1: # like ode15s, warn and return the solution up to the failure
+        warnings.warn('Integration stopped at t = %.3f s: %s' % (sol.t[-1] if len(sol.t) else tspan[0], sol.message))
+    tout = sol.t
+    t_events = [float(te[0]) if len(te) else math.nan for te in sol.t_events]
+    if sol.status == 1 and (len(tout) == 0 or min(t for t in t_events if not math.isnan(t)) > tout[-1]):
+        tout = np.append(tout, min(t for t in t_events if not math.isnan(t))) # like ode15s, include the terminal event time
+
+    ## Outputs
+    record = recorder.output(tout, inputs, mode)
+    record['m_press'] = 0.0
+    if inputs['ox_pressurant']['active']:
+        record['m_press'] += state_0.m_oxtank_press + state_0.m_oxpresstank
+    if mode['type'] == 'liquid' and inputs['fuel_pressurant']['active']:
+        record['m_press'] += state_0.m_fueltank_press + state_0.m_fuelpresstank
+
+    # Include event times in record (Integration.m looks for event 4 for the oxidizer, which never fires, so t_ox_liq stays NaN)
+    record['t_fuel_liq'] = t_events[1]
+    record['t_ox_liq'] = math.nan
+    return tout, record
+
+def _reporting_progress(odefun, t_final, progress):
+    ''' Wrap odefun to print the simulated time to the file progress whenever it passes the next multiple of PROGRESS_INTERVAL. '''
+    next_report = 0.0
+    def reporting_odefun(t, y):
+        nonlocal next_report
+        if t >= next_report:
+            print(PROGRESS_FORMAT % (t, t_final), file = progress)
+            next_report = t + PROGRESS_INTERVAL
+        return odefun(t, y)
+    return reporting_odefun
+
+def prepare_inputs(inputs, mode):
+    ''' Copy inputs, replacing the gas_properties dict of each pressurant with a Gas object and adding the interpolant of the
+        combustion data (see combustion_interpolant).
+    '''
+    inputs = dict(inputs)
+    if inputs.get('comb_data') is not None:
+        inputs['comb_interpolant'] = combustion_interpolant(inputs['comb_data'])
+    for name in ('ox_pressurant', 'fuel_pressurant'):
+        if name in inputs:
+            pressurant = dict(inputs[name])
+            gas = pressurant['gas_properties']
+            if isinstance(gas, dict):
+                pressurant['gas_properties'] = Gas(gas['c_v'], gas['molecular_mass'])
+            inputs[name] = pressurant
+    return inputs
+
+def hybrid_model(time, x, inputs, mode, recorder):
+    ''' Model engine physics for a hybrid motor, provide state vector derivative. '''
+    state = HybridStateVector.from_column_vector(x, inputs, mode)
+    x_dot = np.zeros(N_HYBRID_STATES)
+
+    ## Calculate Injector Mass Flow Rate
+    m_dot_lox, m_dot_gox, m_dot_oxtank_press, T_dot_drain, p_crit, m_dot_ox_crit = n2o_tank_mdot(inputs, state, time)
+    m_dot_vap, T_dot_vap = n2o_tank_equilibrium(inputs, state)
+
+    x_dot[I_M_LOX] = -m_dot_lox - m_dot_vap
+    x_dot[I_M_GOX] = -m_dot_gox + m_dot_vap
+    x_dot[I_M_OXTANK_PRESS] = -m_dot_oxtank_press
+    x_dot[I_T_OXTANK] = T_dot_drain + T_dot_vap
+
+    m_dot_ox = m_dot_lox + m_dot_gox
+
+    ## Combustion Dynamics
+    if mode['combustion_on']: # for hot fire only
+        m_dot_f, r_dot = hybrid_mdot_fuel(inputs, state, m_dot_ox)
+        F_thrust, OF, M_e, p_exit, p_shock, m_cc_dot, M_cc_dot, gamma_cc_dot, T_cc_dot = \
+            combustion_chamber(inputs, state, m_dot_ox, m_dot_f)
+    else: # no combustion (cold flow)
+        m_dot_f, r_dot = 0.0, 0.0
+        F_thrust, OF, M_e, p_exit, p_shock = 0.0, 0.0, 0.0, inputs['p_amb'], 0.0
+        m_cc_dot, M_cc_dot, gamma_cc_dot, T_cc_dot = 0.0, 0.0, 0.0, 0.0
+    x_dot[I_M_FUEL] = -m_dot_f
+    x_dot[I_M_CC] = m_cc_dot
+    x_dot[I_M_MOL_CC] = M_cc_dot
+    x_dot[I_GAMMA_CC] = gamma_cc_dot
+    x_dot[I_T_CC] = T_cc_dot
+
+    ## Pressurant Flow
+    if inputs['ox_pressurant']['active']:
+        T_dot_press, m_dot_press = pressurant_flow(state.p_oxpresstank, state.T_oxpresstank, state.p_oxtank, state.T_oxtank,
+                                                   state.oxtank_m_cv, inputs['ox_pressurant'])
+    else:
+        T_dot_press, m_dot_press = 0.0, 0.0
+    x_dot[I_T_OXTANK] += T_dot_press
+    x_dot[I_M_OXTANK_PRESS] = m_dot_press
+    x_dot[I_M_OXPRESSTANK] = -m_dot_press
+
+    recorder.record(time, F_thrust = F_thrust, p_cc = state.p_cc, p_oxtank = state.p_oxtank, p_oxpresstank = state.p_oxpresstank,
+                    p_fueltank = math.nan, p_fuelpresstank = math.nan, p_oxmanifold = state.p_oxmanifold,
+                    T_oxtank = state.T_oxtank, T_cc = state.T_cc, area_core = math.pi*state.rad_port**2, gamma_ex = state.gamma_cc,
+                    m_lox = state.m_lox, m_gox = state.m_gox, m_fuel = state.m_fuel, p_crit = p_crit,
+                    m_dot_ox_crit = m_dot_ox_crit, M_e = M_e, p_exit = p_exit, p_shock = p_shock)
+    return x_dot
+
+def liquid_model(time, x, inputs, mode, recorder):
+    ''' Model engine physics for a liquid motor, provide state vector derivative. '''
+    state = LiquidStateVector.from_column_vector(x, inputs, mode)
+    state_dot = LiquidStateVector(inputs, mode)
+
+    ## Calculate Injector Mass Flow Rate
+    m_dot_lox, m_dot_gox, m_dot_oxtank_press, T_dot_drain_ox, p_crit, m_dot_ox_crit = n2o_tank_mdot(inputs, state, time)
+    m_dot_f, T_dot_drain_f = fuel_tank_mdot(inputs, state, time)
+    m_dot_vap, T_dot_vap = n2o_tank_equilibrium(inputs, state)
+
+    state_dot.m_lox = -m_dot_lox - m_dot_vap
+    state_dot.m_gox = -m_dot_gox + m_dot_vap
+    state_dot.m_oxtank_press = -m_dot_oxtank_press
+    state_dot.T_oxtank = T_dot_drain_ox + T_dot_vap
+    state_dot.m_fuel = -m_dot_f
+    state_dot.T_fueltank_press = T_dot_drain_f
+
+    m_dot_ox = m_dot_lox + m_dot_gox
+
+    ## Combustion Dynamics
+    if mode['combustion_on']: # for hot fire only
+        F_thrust, OF, M_e, p_exit, p_shock, m_cc_dot, M_cc_dot, gamma_cc_dot, T_cc_dot = \
+            combustion_chamber(inputs, state, m_dot_ox, m_dot_f)
+    else: # no combustion (cold flow)
+        F_thrust, OF, M_e, p_exit, p_shock = 0.0, 0.0, 0.0, inputs['p_amb'], 0.0
+        m_cc_dot, M_cc_dot, gamma_cc_dot, T_cc_dot = 0.0, 0.0, 0.0, 0.0
+    state_dot.m_cc = m_cc_dot
+    state_dot.M_cc = M_cc_dot
+    state_dot.gamma_cc = gamma_cc_dot
+    state_dot.T_cc = T_cc_dot
+
+    ## Oxidizer Pressurant Flow
+    if inputs['ox_pressurant']['active']:
+        T_dot_press, m_dot_press = pressurant_flow(state.p_oxpresstank, state.T_oxpresstank, state.p_oxtank, state.T_oxtank,
+                                                   state.oxtank_m_cv, inputs['ox_pressurant'])
+    else:
+        T_dot_press, m_dot_press = 0.0, 0.0
+    state_dot.T_oxtank += T_dot_press
+    state_dot.m_oxtank_press = m_dot_press
+    state_dot.m_oxpresstank = -m_dot_press
+
+    ## Fuel Pressurant Flow
+    if inputs['fuel_pressurant']['active']:
+        T_dot_press, m_dot_press = pressurant_flow(state.p_fuelpresstank, state.T_fuelpresstank, state.p_fueltank,
+                                                   state.T_fueltank_press,
+                                                   state.m_fueltank_press*inputs['fuel_pressurant']['gas_properties'].c_v,
+                                                   inputs['fuel_pressurant'])
+    else:
+        T_dot_press, m_dot_press = 0.0, 0.0
+    state_dot.T_fueltank_press += T_dot_press
+    state_dot.m_fueltank_press = m_dot_press
+    state_dot.m_fuelpresstank = -m_dot_press
+
+    recorder.record(time, F_thrust = F_thrust, p_cc = state.p_cc, p_oxtank = state.p_oxtank, p_oxpresstank = state.p_oxpresstank,
+                    p_fueltank = state.p_fueltank, p_fuelpresstank = state.p_fuelpresstank, p_oxmanifold = state.p_oxmanifold,
+                    T_oxtank = state.T_oxtank, T_cc = state.T_cc, area_core = math.nan, gamma_ex = state.gamma_cc,
+                    m_lox = state.m_lox, m_gox = state.m_gox, m_fuel = state.m_fuel, p_crit = p_crit,
+                    m_dot_ox_crit = m_dot_ox_crit, M_e = M_e, p_exit = p_exit, p_shock = p_shock)
+    return state_dot.column_vector()
+
+def terminal_function(index, from_column_vector, inputs, mode):
+    ''' Create the integration event function for index 0 (oxidizer mass) or 1 (fuel mass). Integration stops when either reaches zero.
+        Index 2 (hybrids only) stops integration when the oxidizer manifold pressure falls to the chamber pressure, ending injector flow.
+    '''
+    def event(t, x):
+        state = from_column_vector(x, inputs, mode)
+        if index == 0:
+            return state.m_lox + state.m_gox
+        elif index == 1:
+            return state.m_fuel
+        return state.p_oxmanifold - state.p_cc
+    event.terminal = True
+    event.direction = -1 if index == 2 else 0
+    return event
+
+def initialize_hybrid_state(inputs, mode):
+    ''' Initialize the state vector for a hybrid system. Returns (state_0, x0). '''
+    state_0 = HybridStateVector(inputs, mode)
+    initialize_oxtank(state_0, inputs)
+    fuel = inputs['fuel']
+    state_0.m_fuel = math.pi*((fuel['grain_od']/2)**2 - fuel['port_rad']**2)*fuel['grain_length']*fuel['rho']
+    initialize_combustion_chamber(state_0, inputs)
+    if state_0.V_cc <= 0:
+        raise ValueError('Grain exceeds combustion chamber volume.')
+    return state_0, state_0.column_vector()
+
+def initialize_liquid_state(inputs, mode):
+    ''' Initialize the state vector for a liquid system. Returns (state_0, x0). '''
+    state_0 = LiquidStateVector(inputs, mode)
+    initialize_oxtank(state_0, inputs)
+    initialize_fueltank(state_0, inputs)
+    initialize_combustion_chamber(state_0, inputs)
+    return state_0, state_0.column_vector()
+
+def initialize_oxtank(state, inputs):
+    ''' Initialize oxidizer tank based on inputs. '''
+    state.T_oxtank = inputs['ox']['T_tank']
+    state.N2O_properties = n2o_properties(state.T_oxtank)
+    state.m_lox = state.N2O_properties['rho_l']*inputs['ox']['V_l']
+    state.m_gox = state.N2O_properties['rho_g']*state.V_ox_ullage
+    pressurant = inputs['ox_pressurant']
+    if pressurant['active']:
+        gas = pressurant['gas_properties']
+        state.m_oxtank_press = (pressurant['set_pressure'] - state.p_gox)*state.V_ox_ullage/(gas.R_specific*state.T_oxtank)
+        state.m_oxpresstank = pressurant['storage_initial_pressure']*pressurant['tank_volume']/(gas.R_specific*inputs['T_amb'])
+    else:
+        state.m_oxtank_press = 0.0
+        state.m_oxpresstank = 0.0
+
+def initialize_fueltank(state, inputs):
+    ''' Initialize fuel tank based on inputs. '''
+    state.T_fueltank_press = inputs['T_amb']
+    state.m_fuel = inputs['fuel']['V_l']*inputs['fuel']['rho']
+    pressurant = inputs['fuel_pressurant']
+    if pressurant['active']:
+        gas = pressurant['gas_properties']
+        state.m_fueltank_press = pressurant['set_pressure']*state.V_fuel_ullage/(gas.R_specific*state.T_fueltank_press)
+        state.m_fuelpresstank = pressurant['storage_initial_pressure']*pressurant['tank_volume']/(gas.R_specific*inputs['T_amb'])
+    else:
+        state.m_fueltank_press = 0.0
+        state.m_fuelpresstank = 0.0
+
+def initialize_combustion_chamber(state, inputs):
+    ''' Initialize combustion chamber with ambient air. '''
+    state.m_cc = state.V_cc*RHO_AIR
+    state.M_cc = M_AIR
+    state.gamma_cc = GAMMA_AIR
+    state.T_cc = inputs['T_amb']
+
+def n2o_tank_mdot(inputs, state, time):
+    ''' Calculate flow rate out of the N2O tank, interpolating between liquid and gas flow based on the amount of liquid oxidizer
+        remaining (to avoid hysteresis with a small, steady liquid source in the tank).
+        Returns (m_dot_lox, m_dot_gox, m_dot_oxtank_press, T_dot_drain, p_crit, m_dot_ox_crit).
+    '''
+    throttle = inputs['Throttle'](time)
+    p_oxmanifold = state.p_oxmanifold
+    p_cc = state.p_cc
+    if p_oxmanifold > p_cc and inputs['ox']['Cd_injector']*inputs['ox']['injector_area']*throttle > 0:
+        ## Liquid flow
+        m_dot_ox, m_dot_ox_crit_liq, p_crit_liq = ln2o_mdot(inputs, inputs['ox']['injector_area']*throttle, p_oxmanifold,
+                                                            state.T_oxtank, p_cc, state.N2O_properties)
+        Q_liq = m_dot_ox/state.N2O_properties['rho_l']
+
+        ## Gas flow
+        d_inj = math.sqrt(4/math.pi*inputs['ox']['injector_area']*throttle)
+        m_dot_gas = nozzle_calc(d_inj, d_inj, state.T_oxtank, p_oxmanifold, state.gamma_ox_ullage, M_N2O, p_cc)[4]
+        m_ullage = state.m_gox + state.m_oxtank_press
+        m_dot_gox_gas = m_dot_gas*state.m_gox/m_ullage
+        m_dot_press_gas = m_dot_gas*state.m_oxtank_press/m_ullage
+        Q_gas = m_dot_gas*state.V_ox_ullage/m_ullage
+
+        ## Total flow rate
+        if state.m_lox > DM_LOX_TOL:
+            frac_lox = 1.0
+        else:
+            frac_lox = max(0.0, state.m_lox/DM_LOX_TOL)
+        m_dot_lox = frac_lox*m_dot_ox
+        m_dot_gox = (1 - frac_lox)*m_dot_gox_gas
+        m_dot_oxtank_press = (1 - frac_lox)*m_dot_press_gas
+        p_crit = frac_lox*p_crit_liq
+        m_dot_ox_crit = frac_lox*m_dot_ox_crit_liq
+        Q = frac_lox*Q_liq + (1 - frac_lox)*Q_gas
+    else:
+        m_dot_lox, m_dot_gox, m_dot_oxtank_press = 0.0, 0.0, 0.0
+        p_crit = state.p_oxtank
+        m_dot_ox_crit = 0.0
+        Q = 0.0
+
+    ## Oxidizer tank draining
+    dW = -(state.p_gox + state.p_oxtank_press)*Q # work done on gas by liquid
+    T_dot_drain = dW/state.oxtank_m_cv
+    return m_dot_lox, m_dot_gox, m_dot_oxtank_press, T_dot_drain, p_crit, m_dot_ox_crit
+
+def ln2o_mdot(inputs, A_inj, Pup, Tup, Pdown, N2O_properties = None):
+    ''' Calculate the mass flow rate of liquid nitrous oxide. Returns (m_dot_ox, m_dot_crit, p_crit).
+        N2O_properties may pass in the saturation properties at Tup if they have already been calculated.
+    '''
+    if N2O_properties is None:
+        N2O_properties = n2o_properties(Tup)
+
+    # Set pressure to be a minimum of vapor pressure to address modeling limitation
+    Pvap = N2O_properties['Pvap']
+    Pup = max(Pup, Pvap)
+
+    # Use 2-phase model for low supercharge pressure ratio
+    if Pup/Pvap < 3:
+        G, G_crit, p_down_crit = find_g(Tup, Pup, Pdown, Pvap)
+    else:
+        G = math.sqrt(2*(Pup - Pdown)*N2O_properties['rho_l'])
+        G_crit = 0.0
+        p_down_crit = 0.0
+    Cd = inputs['ox']['Cd_injector']
+    return Cd*A_inj*G, Cd*A_inj*G_crit, p_down_crit
+
+def n2o_tank_equilibrium(inputs, state):
+    ''' Find the vaporization rate establishing equilibrium in the nitrous oxide tank. Returns (m_dot_vap, T_dot_vap). '''
+    # mass flow rate vaporizing (liquid to gas)
+    m_dot_vap = VAP_CONST*(state.N2O_properties['Pvap'] - state.p_gox)*state.oxtank_m_cv/(state.N2O_properties['deltaE_vap']*DPVAP_DT)
+    if m_dot_vap > 0 and state.m_lox < 0:
+        m_dot_vap = 0.0 # no vaporization if liquid oxidizer is gone
+    elif m_dot_vap < 0 and state.m_gox < 0:
+        m_dot_vap = 0.0
+    H_dot_tank_vap = -m_dot_vap*state.N2O_properties['deltaH_vap']
+    T_dot_vap = H_dot_tank_vap/state.oxtank_m_cp
+    return m_dot_vap, T_dot_vap
+
+def combustion_chamber(inputs, state, m_dot_ox, m_dot_f):
+    ''' Model combustion chamber dynamics.
+        Returns (F_thrust, OF, M_e, p_exit, p_shock, m_cc_dot, M_cc_dot, gamma_cc_dot, T_cc_dot).
+    '''
+    p_cc = state.p_cc
+
+    ## Combustion Dynamics
+    if m_dot_ox > 0:
+        OF = m_dot_ox/m_dot_f if m_dot_f != 0 else math.inf
+        gamma_ex, iMW, R_ex, iTc, c_star = combustion_calc(OF, p_cc, inputs, inputs['comb_data'])
+    else: # If combustion chamber pressure is greater than tank pressure
+        gamma_ex, iMW, iTc, OF, c_star = 0.0, 0.0, 0.0, 0.0, 1.0
+
+    ## Solve Flow Through Nozzle
+    area_throat = math.pi*inputs['d_throat']**2/4
+    exit_area = area_throat*inputs['exp_ratio']
+    d_exit = inputs['d_throat']*math.sqrt(inputs['exp_ratio'])
+    if p_cc > inputs['p_amb']:
+        _, p_exit, p_shock, u_exit, _, M_e = nozzle_calc(inputs['d_throat'], d_exit, state.T_cc, p_cc, state.gamma_cc, state.M_cc,
+                                                        inputs['p_amb'])
+        m_dot_ex = p_cc*area_throat/c_star
+    else:
+        p_exit, p_shock, u_exit, m_dot_ex, M_e = inputs['p_amb'], 0.0, 0.0, 0.0, 0.0
+
+    # Account for nozzle efficiency
+    u_exit = u_exit*math.sqrt(inputs['nozzle_efficiency'])
+
+    # Calculate thrust force
+    C_T = inputs['nozzle_correction_factor']*(m_dot_ex*u_exit + (p_exit - inputs['p_amb'])*exit_area)/(area_throat*p_cc)
+    F_thrust = c_star*C_T*m_dot_ex
+
+    ## Combustion chamber properties
+    m_cc_dot = m_dot_ox + m_dot_f - m_dot_ex
+    M_cc_dot = (m_dot_ox + m_dot_f)*(iMW - state.M_cc)/state.m_cc
+    gamma_cc_dot = (m_dot_ox + m_dot_f)*(gamma_ex - state.gamma_cc)/state.m_cc
+    T_cc_dot = (m_dot_ox + m_dot_f)*(iTc - state.T_cc)/state.m_cc
+    return F_thrust, OF, M_e, p_exit, p_shock, m_cc_dot, M_cc_dot, gamma_cc_dot, T_cc_dot
+
+def hybrid_mdot_fuel(inputs, state, m_dot_ox):
+    ''' Calculate mass flow rate of fuel and regression rate of the fuel grain. Returns (m_dot_f, r_dot). '''
+    fuel = inputs['fuel']
+    return grain_regression(m_dot_ox, state.rad_port, fuel['a'], fuel['n'], fuel['grain_length'], fuel['rho'])
+
+def _grain_regression(m_dot_ox, rad_port, a, n, grain_length, rho):
+    ''' Fuel mass flow rate and regression rate (r_dot = a*G^n, G the port oxidizer mass flux). Returns (m_dot_f, r_dot). '''
+    areap = math.pi*rad_port**2
+    r_rate = a*(m_dot_ox/areap)**n
+    r_vol = 2*math.pi*rad_port*r_rate*grain_length
+    return r_vol*rho, r_rate
+
+def _grain_geometry(m_fuel, rho, grain_od, grain_length, d_cc, length_cc):
+    ''' Port radius of the fuel grain and the combustion chamber volume left around it. Returns (rad_port, V_cc). '''
+    V_fuel = m_fuel/rho
+    rad_port = math.sqrt(0.25*grain_od**2 - V_fuel/(math.pi*grain_length))
+    V_cc = math.pi/4*d_cc**2*length_cc - V_fuel
+    return rad_port, V_cc
+
+# Compile the grain kernels if Numba is available
+if njit is not None:
+    grain_regression = njit(cache = True)(_grain_regression)
+    grain_geometry = njit(cache = True)(_grain_geometry)
+else:
+    grain_regression = _grain_regression
+    grain_geometry = _grain_geometry
+
+def fuel_tank_mdot(inputs, state, time):
+    ''' Simulate dynamics of the draining fuel tank. Returns (m_dot_f, T_dot_drain). '''
+    injector_area = inputs['fuel']['Cd_injector']*inputs['fuel']['injector_area']*inputs['Throttle'](time)
+    p_fueltank = state.p_fueltank
+    p_cc = state.p_cc
+    if p_fueltank > p_cc and injector_area > 0:
+        m_dot_f = injector_area*math.sqrt(2*(p_fueltank - p_cc)*inputs['fuel']['rho'])
+    else:
+        m_dot_f = 0.0
+    Q = m_dot_f/inputs['fuel']['rho']
+
+    ## Fuel tank draining
+    dW = -p_fueltank*Q # work done on gas by liquid
+    m_cv = state.m_fueltank_press*inputs['fuel_pressurant']['gas_properties'].c_v
+    T_dot_drain = dW/m_cv if m_cv > 0 else 0.0 # (an unpressurized fuel tank has no gas to cool)
+    return m_dot_f, T_dot_drain
+
+def combustion_calc(OF, Pc, inputs, comb_data):
+    ''' Calculate combustion properties from the combustion data table. Returns (gamma_ex, iMW, R_ex, iTc, c_star). '''
+    # Correct OF ratio or chamber pressure if over boundaries
+    OF = min(max(OF, comb_data['OF_range'][0]), comb_data['OF_range'][1])
+    Pc = min(max(Pc, comb_data['Pc_range'][0]), comb_data['Pc_range'][1])
+
+    # Interpolate chamber temperature and exhaust properties
+    interpolant = inputs.get('comb_interpolant') or combustion_interpolant(comb_data)
+    iTc, iMW, gamma_ex, c_star = interpolant(Pc, OF)
+    R_ex = R_U/iMW
+
+    # Apply c-star efficiency
+    c_star = c_star*inputs['c_star_efficiency']
+    iTc = iTc*inputs['c_star_efficiency']**2
+
+    # Check Tc, MW, gamma_ex for invalid values
+    if not iTc >= 0:
+        raise ValueError('Invalid Tc calculated: Tc = %.3f' % iTc)
+    if not iMW >= 0:
+        raise ValueError('Invalid MW calculated: MW = %.3f' % iMW)
+    if not gamma_ex >= 0:
+        raise ValueError('Invalid gamma_ex calculated: gamma_ex = %.3f' % gamma_ex)
+    return gamma_ex, iMW, R_ex, iTc, c_star
+
+def combustion_interpolant(comb_data):
+    ''' Build the interpolant of the combustion data table, which looks up COMB_FIELDS in one call: interpolant(Pc, OF). '''
+    return GridInterpolant((comb_data['Pc'][:, 0], comb_data['OF'][0, :]), [comb_data[field] for field in COMB_FIELDS])
+
+def pressurant_flow(p_presstank, T_presstank, p_downtank, T_downtank, m_cv_downtank, pressurant):
+    ''' Model flow of pressurant gas from its source tank to a propellant tank. Returns (T_dot_press, m_dot_press). '''
+    gas = pressurant['gas_properties']
+    if p_presstank > pressurant['set_pressure'] and p_downtank < pressurant['set_pressure'] and pressurant['tank_volume'] > 0:
+        # Determine mass flow of pressurant
+        d_reg = math.sqrt(4/math.pi*pressurant['flow_CdA'])
+        m_dot_press = nozzle_calc(d_reg, d_reg, T_presstank, p_presstank, gas.gamma, gas.molecular_mass, p_downtank)[4]
+        # Taper flow rate to zero within pressure tolerance
+        m_dot_press = min(m_dot_press, m_dot_press*(pressurant['set_pressure'] - p_downtank)/DP_TOL)
+
+        # Update tank conditions based on more pressurant flow
+        T_press_down = T_presstank*(p_downtank/p_presstank)**((gas.gamma - 1)/gas.gamma)
+        rho_press_tank = p_downtank/(gas.R_specific*T_press_down)
+        dW = p_downtank*m_dot_press/rho_press_tank
+
+        # Thermal equilibrium within tank
+        T_dot_press = (dW + (T_press_down - T_downtank)*m_dot_press*gas.c_v)/m_cv_downtank
+    else:
+        m_dot_press = 0.0
+        T_dot_press = 0.0
+    return T_dot_press, m_dot_press
+
+def presstank_pressure(m_presstank, pressurant, T_amb):
+    ''' Pressure in a pressurant tank holding m_presstank of gas, assuming isentropic expansion. '''
+    gas = pressurant['gas_properties']
+    m_press_initial = pressurant['storage_initial_pressure']*pressurant['tank_volume']/(gas.R_specific*T_amb)
+    with np.errstate(all = 'ignore'): # overflow and 0/0 (no pressurant tank) give inf and NaN, as in MATLAB
+        return float(pressurant['storage_initial_pressure']*np.power(np.float64(m_presstank)/m_press_initial, gas.gamma))
+
+def presstank_temperature(p_presstank, pressurant, T_amb):
+    ''' Temperature in a pressurant tank at pressure p_presstank, assuming isentropic expansion. '''
+    gamma = pressurant['gas_properties'].gamma
+    with np.errstate(all = 'ignore'):
+        return float(T_amb*np.power(np.float64(p_presstank)/pressurant['storage_initial_pressure'], (gamma - 1)/gamma))
+
+def trapz(x, y):
+    ''' Trapezoidal integration of y over x. '''
+    return float(np.sum(np.diff(x)*(y[1:] + y[:-1])/2))
+
+def load_comb_data(filename):
+    ''' Load the CombData struct from a combustion data .MAT file (as created by CombustionDataProcess.m) into a dict, or from a
+        .comb table. Tables are cached for the whole process, and their arrays are read-only (see CombustionData.TableCache).
+    '''
+    return table_cache.load(filename)
@@ -0,0 +1,95 @@
+'''
+    LevelOfDetail:
+
+    Min/max decimation of the lines plotted in the PlotPane. A line of 100k+ samples (e.g. test data) is drawn as the first and last
+    sample and the minimum and maximum of each of about one bucket of samples per pixel of the axes' width, which looks the same as
+    the full line at that width but redraws, pans and zooms quickly. Peaks are never lost, since every bucket keeps its extremes.
+
+    LODLine keeps the full data of a matplotlib Line2D and re-decimates the part of it in view whenever the x limits of its axes
+    change (on zoom and pan) or its figure is resized, so zooming in shows more detail down to the raw samples.
+'''
+
+import numpy as np
+
+MIN_POINTS = 4000 # lines with fewer points are drawn in full
+BUCKETS_PER_PIXEL = 1 # min/max buckets per pixel of axes width (each bucket draws two points)
+
+def minmax_indices(y, n_buckets):
+    ''' Return the sorted indices of the first and last elements of y and of the minimum and maximum of each of n_buckets buckets of
+        consecutive elements.
+    '''
+    n = len(y)
+    if n <= 2*n_buckets + 2:
+        return np.arange(n)
+    size = -(-n//n_buckets) # samples per bucket, rounded up
+    padded = np.concatenate([y, np.full(size*n_buckets - n, y[-1])]).reshape(n_buckets, size) # pad with the last sample
+    offsets = np.arange(n_buckets)*size
+    with np.errstate(invalid = 'ignore'):
+        indices = np.concatenate([[0, n - 1], offsets + np.argmin(padded, axis = 1), offsets + np.argmax(padded, axis = 1)])
+    return np.unique(np.minimum(indices, n - 1))
+
+def decimate(x, y, n_buckets, x_range = None):
+    ''' Decimate the line (x, y) to about 2*n_buckets points (see minmax_indices), keeping only the part within x_range (a (min, max)
+        tuple, or None for all of it) and one point on either side of it. x must be sorted if x_range is given. Returns (x, y).
+    '''
+    start, stop = 0, len(x)
+    if x_range is not None:
+        start = max(np.searchsorted(x, x_range[0], side = 'left') - 1, 0)
+        stop = min(np.searchsorted(x, x_range[1], side = 'right') + 1, len(x))
+    if stop - start <= 0:
+        return x[:0], y[:0]
+    indices = minmax_indices(y[start:stop], n_buckets) + start
+    return x[indices], y[indices]
+
+class LODLine():
+    ''' Decimates a plotted Line2D, keeping its full data and re-decimating it to the axes' pixel width when they are zoomed,
+        panned or resized.
+    '''
+    def __init__(self, line):
+        self.line = line
+        self.axes = line.axes
+        self._callbacks = [self.axes.callbacks.connect('xlim_changed', lambda ax: self.update())]
+        self.set_data(line.get_xdata(), line.get_ydata())
+        self.update()
+
+    def set_data(self, x, y):
+        ''' Replace the full data of the line. The line shows all of it (e.g. for autoscaling) until the next update(). '''
+        self.x = np.asarray(x, dtype = float)
+        self.y = np.asarray(y, dtype = float)
+        self.is_sorted = bool(np.all(np.diff(self.x) >= 0)) # can only cut the data to the x limits if x is sorted
+        self._view = None # (x limits, width) of the last decimation
+        self.line.set_data(self.x, self.y)
+
+    def update(self):
+        ''' Decimate the data in view to the axes' width, if either has changed since the last decimation. '''
+        x_range = self.axes.get_xlim() if self.is_sorted else None
+        width = max(int(self.axes.bbox.width), 1)
+        if (x_range, width) == self._view:
+            return
+        self._view = (x_range, width)
+        if x_range is not None and x_range[0] > x_range[1]:
+            x_range = x_range[::-1] # inverted axis
+        self.line.set_data(*decimate(self.x, self.y, width*BUCKETS_PER_PIXEL, x_range))
+
+    def disconnect(self):
+        ''' Stop re-decimating, restoring the full data. '''
+        for cid in self._callbacks:
+            self.axes.callbacks.disconnect(cid)
+        self._callbacks = []
+        self.line.set_data(self.x, self.y)
+
+def decimate_figure(fig, lods):
+    ''' Decimate every line of fig with at least MIN_POINTS points that isn't in lods (a dict of Line2D to its LODLine), adding
+        them to lods. The lines are kept decimated to the view as their axes are zoomed and panned, and update_figure() should be
+        called when the figure is resized.
+    '''
+    for ax in fig.axes:
+        for line in ax.get_lines():
+            if line not in lods and len(line.get_xdata()) >= MIN_POINTS:
+                lods[line] = LODLine(line)
+
+def update_figure(fig, lods):
+    ''' Re-decimate the lines of fig in lods (see decimate_figure) to the current view and size of their axes. '''
+    for line, lod in lods.items():
+        if line.figure is fig:
+            lod.update()
@@ -3,14 +3,19 @@
 
     The primary owning window of the application - inherits the tk.Tk object.
 
-    The MainWindow also owns a MATLABengine object from MATLAB's Python API.
+    The MainWindow also owns an EnginePool of MATLAB engines from MATLAB's Python API, which the SimPages build and run on (the first
+    engine to start is also used by the command line when the active page has no workspace on an engine). If the MATLAB engine isn't installed, the application starts without it and
+    pages that support it run on the native Python backend.
 '''
 
 import tkinter as tk
 import tkinter.ttk as ttk
 import sys
-import matlab.engine
 import time
+try:
+    import matlab.engine
+except ImportError:
+    matlab = None # run without MATLAB, using the Python backend
 
 # fun ideas:
 # - have a table that allows you to select which result variables are plotted on which plot name 
@@ -41,6 +46,7 @@ from .CmdPane import CmdPane
 from .PrintRedirector import PrintRedirector
 from .ErrorRedirector import ErrorRedirector
 from .Menubar import MenuBar
+from .EnginePool import EnginePool, POOL_SIZE
 
 # IMPORT SIMPAGES and then add them to the simPages list to have them show up on the application
 from .SimulateLiquidPage import SimulateLiquid
@@ -64,9 +70,14 @@ class MainWindow(tk.Tk):
         self.state('zoomed')
         self.title('PropSim - Stanford Student Space Initiative')
 
-        # Create the matlab engine
-        self.eng = matlab.engine.start_matlab()
-        self.eng.addpath(self.eng.fullfile(self.eng.pwd(), 'Supporting Functions')) # add MATLAB library
+        # Create the matlab engines (the others keep starting in the background once the first is ready)
+        self.engine_pool = None
+        self.eng = None
+        if matlab is not None:
+            self.engine_pool = EnginePool(POOL_SIZE)
+            self.eng = self.engine_pool.primary()
+            if self.eng is None: # no engine could start
+                self.engine_pool = None
 
         # Create styles
         self.style = ttk.Style()
@@ -82,11 +93,11 @@ class MainWindow(tk.Tk):
         self.rightPane = tk.PanedWindow(self.mainframe, orient = 'vertical')
         self.plotPane = PlotPane(self.rightPane, self.eng)
         self.printRedirector = PrintRedirector(self.mainframe)
-        self.cmdPane = CmdPane(self.mainframe, self.eng)
+        self.cmdPane = CmdPane(self.mainframe, self.engine_pool, lambda: self.inputPane.get_simpage())
         self.rightPane.add(self.plotPane)
         self.rightPane.add(self.printRedirector)
 
-        self.inputPane = InputPane(self.mainframe, self, self.eng, simPages)
+        self.inputPane = InputPane(self.mainframe, self, self.engine_pool, simPages)
         self.menubar = MenuBar(self)
 
         # Pack Constituent Widgets
@@ -104,6 +115,8 @@ class MainWindow(tk.Tk):
     def close(self):
         if self.inputPane.promptsave_sim(): # prompt for save before closing window
             self.destroy()
+            if self.engine_pool is not None:
+                self.engine_pool.close()
 
     def run(self):
         ''' Starts the application loop, including the error logger and print redirector. '''
@@ -115,6 +128,8 @@ class MainWindow(tk.Tk):
                 # Send a friendly message to get started
                 print("Welcome to PropSim! This is where all print-out is directed. You can also use the command line below to interact\n"
                     "with the active MATLAB session.")
+                if self.eng is None:
+                    print("MATLAB engine not found, simulations will use the Python backend.")
                 self.mainloop() # start GUI application running, on close will call kill() function above
         sys.stdout = old_stdout
         sys.stderr = old_stderr
\ No newline at end of file
@@ -0,0 +1,185 @@
+'''
+    MatlabWorkspace:
+
+    Builds MATLAB workspaces in bulk. Evaluating one assignment per InputVar (see InputVar.build()) takes a synchronous round trip to
+    the engine for every input, and formats each value as a string, which loses precision. Instead, the inputs are built into a
+    native workspace (nested dicts, see InputVar.build_native()), converted to nested dicts of matlab.double arrays at full float64
+    precision, and pushed to the engine in a single workspace assignment. One eval then unpacks the top-level structs and turns the
+    fields that are MATLAB classdef objects (Pressurant and Gas) into those objects (see SetProperties.m), so a build takes two
+    engine calls, plus those of the page's postbuild(). Inputs modified after a build are set in the built workspace with a single
+    eval (see update_workspace()).
+
+    The classdef objects are given as a dict of dotted path : MATLAB constructor, e.g. {'inputs.ox_pressurant': "Pressurant('oxidizer')"},
+    made of the MATLAB_OBJECTS of the page's inputs module and the objects of its InputVars (see InputVar.matlab_constructor).
+
+    Results come back the other way through a MatlabResult, a read-only dict of a struct in the MATLAB workspace that only fetches the
+    struct's field names up front. Each field is pulled on first access, converted to a NumPy array from the buffer of the MATLAB
+    array (see to_numpy()) and kept, so plotting 5 of the 30 fields of a run only transfers those 5. Nested structs (e.g. the copy of
+    the inputs in a DesignLiquid result) are MatlabResults themselves.
+'''
+
+import numbers
+from collections.abc import Mapping
+import numpy as np
+
+try:
+    import matlab
+except ImportError:
+    matlab = None # workspaces can't be pushed without MATLAB
+
+STAGING_NAME = 'gui_build' # MATLAB variable the workspace is pushed into before being unpacked
+
+def to_matlab(value):
+    ''' Convert a value of a native workspace to the type it is pushed to MATLAB as: dicts to structs, numbers and arrays to
+        matlab.double (so integers like the ToggleVars' aren't made int64) and strings to char arrays.
+    '''
+    if isinstance(value, dict):
+        return {key: to_matlab(item) for key, item in value.items()}
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, numbers.Real):
+        return matlab.double([float(value)])
+    if isinstance(value, (np.ndarray, list, tuple)):
+        array = np.asarray(value, dtype = float)
+        return matlab.double(np.atleast_2d(array).tolist() if array.ndim < 2 else array.tolist())
+    return value
+
+def input_path(inputvar):
+    ''' Return the dotted path of an input variable in the workspace, e.g. 'inputs.ox.V_l'. '''
+    return inputvar.structname + '.' + inputvar.name if inputvar.structname else inputvar.name
+
+def object_paths(sections):
+    ''' Return the classdef objects built by the inputvars of sections, as a dict of dotted path : MATLAB constructor. '''
+    objects = {}
+    for section in sections:
+        for inputvar in section.inputvars:
+            if inputvar.matlab_constructor:
+                objects[input_path(inputvar)] = inputvar.matlab_constructor
+    return objects
+
+def unpack_script(workspace, objects = {}):
+    ''' Return the MATLAB statements that unpack the pushed workspace into its top-level variables, clearing everything else, and
+        make the objects (a dict of dotted path : constructor) from their fields, innermost first.
+    '''
+    statements = ['clearvars -except ' + STAGING_NAME]
+    statements += [name + ' = ' + STAGING_NAME + '.' + name for name in workspace]
+    statements.append('clear ' + STAGING_NAME)
+    for path in sorted(objects, key = lambda path: -path.count('.')):
+        statements.append(path + ' = SetProperties(' + objects[path] + ', ' + path + ')')
+    return ' ; '.join(statements) + ' ;'
+
+def push_workspace(matlabeng, workspace, objects = {}):
+    ''' Replace the MATLAB workspace of matlabeng with a native workspace (a dict of input structs), making the objects (a dict of
+        dotted path : constructor) from their fields. Takes two engine calls.
+    '''
+    matlabeng.workspace[STAGING_NAME] = to_matlab(workspace)
+    matlabeng.eval(unpack_script(workspace, objects), nargout = 0)
+
+def build_workspace(matlabeng, sections, prebuild_native, postbuild, objects = {}):
+    ''' Build sections in the MATLAB workspace of matlabeng in bulk: prebuild_native(workspace) adds the plain values built before the
+        inputs (e.g. mode.type), the sections are built into a native workspace and pushed, and postbuild(matlabeng) is called on the
+        pushed workspace. objects are the classdef objects of the page's inputs module, as a dict of dotted path : constructor.
+        Returns the native workspace.
+    '''
+    workspace = {}
+    prebuild_native(workspace)
+    for section in sections:
+        section.build_native(workspace)
+    push_workspace(matlabeng, workspace, dict(objects, **object_paths(sections)))
+    postbuild(matlabeng)
+    return workspace
+
+def matlab_literal(value):
+    ''' Return a MATLAB expression for a value of a native workspace. Numbers are written with repr(), which round-trips float64
+        exactly, dicts as struct() calls and strings as char arrays.
+    '''
+    if isinstance(value, dict):
+        return 'struct(' + ', '.join("'" + key + "', " + matlab_literal(item) for key, item in value.items()) + ')'
+    if isinstance(value, numbers.Real):
+        return repr(float(value))
+    return "'" + str(value).replace("'", "''") + "'"
+
+def update_script(inputvars, objects = {}):
+    ''' Return the MATLAB statements that set inputvars to their values in a built workspace, making those that are objects (in
+        objects, a dict of dotted path : constructor) from their fields.
+    '''
+    statements = []
+    for inputvar in inputvars:
+        path = input_path(inputvar)
+        literal = matlab_literal(inputvar.value())
+        if path in objects:
+            literal = 'SetProperties(' + objects[path] + ', ' + literal + ')'
+        statements.append(path + ' = ' + literal)
+    return ' ; '.join(statements) + ' ;'
+
+def update_workspace(matlabeng, inputvars, objects = {}):
+    ''' Set inputvars (e.g. those modified since the workspace was built) in the built MATLAB workspace of matlabeng, in one eval.
+        Fields of the classdef objects made by the build (e.g. inputs.ox_pressurant.active) are set in place.
+    '''
+    if inputvars:
+        matlabeng.eval(update_script(inputvars, objects), nargout = 0)
+
+def to_numpy(value):
+    ''' Convert a value returned by the MATLAB engine to NumPy: MATLAB arrays become arrays (vectors 1-D), converted from their
+        column-major buffer rather than element by element. Other values (floats, strings, ...) are returned as they are.
+    '''
+    if type(value).__module__.split('.')[0] != 'matlab': # (the array classes moved between versions of the engine)
+        return value
+    data = getattr(value, '_data', None)
+    if data is not None:
+        array = np.array(data).reshape(value.size, order = 'F')
+    else:
+        array = np.asarray(value)
+    if array.ndim == 2 and 1 in array.shape:
+        array = array.ravel()
+    return array
+
+class MatlabResult(Mapping):
+    ''' A read-only dict of the struct name in the MATLAB workspace of matlabeng (e.g. 'output'), fetching each field when it's first
+        used. The struct must stay in the workspace until every field needed has been fetched, or detach() has been called.
+    '''
+    def __init__(self, matlabeng, name):
+        self.matlabeng = matlabeng
+        self.name = name
+        self.fields = list(matlabeng.eval('fieldnames(' + name + ")'", nargout = 1))
+        self.structs = set()
+        if self.fields:
+            is_struct = np.atleast_1d(to_numpy(matlabeng.eval('structfun(@isstruct, ' + name + ")'", nargout = 1)))
+            self.structs = {field for field, nested in zip(self.fields, is_struct) if nested}
+        self.values = {} # fields fetched so far
+
+    def __getitem__(self, field):
+        if field not in self.values:
+            if field not in self.fields:
+                raise KeyError(field)
+            if self.matlabeng is None:
+                raise KeyError(field + ' was not fetched before ' + self.name + ' was detached from its engine')
+            if field in self.structs:
+                self.values[field] = MatlabResult(self.matlabeng, self.name + '.' + field)
+            else:
+                self.values[field] = to_numpy(self.matlabeng.eval(self.name + '.' + field, nargout = 1))
+        return self.values[field]
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def fetched(self):
+        ''' Return the names of the fields fetched so far. '''
+        return [field for field in self.fields if field in self.values]
+
+    def detach(self):
+        ''' Fetch every field not fetched yet and stop using the engine, e.g. before the struct is cleared from its workspace. '''
+        if self.matlabeng is not None:
+            for field in self.fields:
+                value = self[field]
+                if isinstance(value, MatlabResult):
+                    value.detach()
+            self.matlabeng = None
+        return self
+
+    def to_dict(self):
+        ''' Return the struct as nested dicts of arrays, fetching every field. '''
+        return {field: value.to_dict() if isinstance(value, MatlabResult) else value for field, value in self.items()}
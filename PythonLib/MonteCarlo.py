@@ -0,0 +1,282 @@
+'''
+    MonteCarlo:
+
+    Dispersion analysis with the native Python backend. The inputs of SimulateLiquid or SimulateHybrid are built from the page's
+    input definitions (from their defaults, an input file and settings, as in Batch), then run once per sample, where each sample
+    draws some inputs from a distribution:
+
+        normal:MEAN:STD          normal:STD%           (mean at the built value, STD% of it)
+        uniform:LOW:HIGH         uniform:HALFWIDTH%    (centred on the built value)
+        triangular:LOW:MODE:HIGH triangular:HALFWIDTH% (mode at the built value)
+
+    in base (SI) units, e.g. inputs.ox.Cd_injector=normal:0.8:0.02 or inputs.ox.V_l=uniform:3%.
+
+    The samples are spread over a pool of worker processes (see WorkerPool), and each result is folded into streaming statistics as it arrives, so
+    memory doesn't grow with the number of samples: the mean, standard deviation, minimum, maximum and QUANTILES (see P2Quantile)
+    of the impulse, Isp, OF, burn time, peak chamber pressure and peak thrust of the runs, and the same statistics of the thrust at
+    each step of a time grid (the thrust envelope). From the PropSim folder,
+
+        python -m PythonLib.MonteCarlo SimulateLiquid case1.json -n 2000 --dist inputs.ox.Cd_injector=normal:2% \\
+            --dist inputs.c_star_efficiency=uniform:0.8:0.9 --dist inputs.ox.T_tank=normal:286:2 --output Outputs/montecarlo
+
+    prints the dispersions and writes them, the thrust envelope and a row per sample to the output folder.
+'''
+
+import os
+import io
+import csv
+import argparse
+import warnings
+import numpy as np
+
+from .PerformanceCode import performance_code
+from .Sweep import SUMMARY_FIELDS, summarize, apply_case, get_field, split_assignment, RUN_OPTIONS
+from .WorkerPool import parallel_map
+from .Batch import PAGES, load_inputs, build_native
+
+FIELDS = SUMMARY_FIELDS + ('max_thrust',) # dispersed results of each run [N*s, s, -, s, Pa, N]
+QUANTILES = (0.01, 0.05, 0.5, 0.95, 0.99) # quantiles estimated of each result and of the thrust envelope
+ENVELOPE_DT = 0.01 # step of the time grid of the thrust envelope [s]
+CHUNKSIZE = 4 # samples sent to a worker at once
+
+class RunningStats():
+    ''' Mean, variance, minimum and maximum of a stream of values (or of arrays of values, elementwise), updated one value at a
+        time with Welford's algorithm.
+    '''
+    def __init__(self, shape = ()):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape) # sum of squared differences from the mean
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean = self.mean + delta/self.count
+        self.m2 = self.m2 + delta*(x - self.mean)
+        self.min = np.minimum(self.min, x)
+        self.max = np.maximum(self.max, x)
+
+    @property
+    def std(self):
+        ''' Sample standard deviation. '''
+        return np.sqrt(self.m2/(self.count - 1)) if self.count > 1 else np.full(np.shape(self.mean), np.nan)
+
+class P2Quantile():
+    ''' Estimate of the p-quantile of a stream of values (or of arrays of values, elementwise) in constant memory, with the P^2
+        algorithm (Jain and Chlamtac, 1985): five markers track the minimum, the p/2, p and (1+p)/2 quantiles and the maximum, and
+        are moved towards their desired positions along a piecewise-parabolic fit of the distribution as values arrive. Estimates
+        are typically within a few percent of the exact quantile.
+    '''
+    def __init__(self, p, shape = ()):
+        self.p = p
+        self.count = 0
+        self.q = np.zeros((5,) + np.shape(np.empty(shape))) # marker heights
+        self.n = np.zeros_like(self.q) # marker positions
+        self.desired = np.array([0, 2*p, 4*p, 2 + 2*p, 4]) # desired marker positions
+        self.increment = np.array([0, p/2, p, (1 + p)/2, 1])
+
+    def add(self, x):
+        x = np.asarray(x, dtype = float)
+        if self.count < 5: # the first five values are the markers
+            self.q[self.count] = x
+            self.count += 1
+            if self.count == 5:
+                self.q = np.sort(self.q, axis = 0)
+                self.n = np.broadcast_to(np.arange(5.0).reshape((5,) + (1,)*x.ndim), self.q.shape).copy()
+            return
+        self.count += 1
+        q, n = self.q, self.n
+        q[0] = np.minimum(q[0], x)
+        q[4] = np.maximum(q[4], x)
+        k = (x >= q[1]).astype(int) + (x >= q[2]) + (x >= q[3]) # cell of x, between markers k and k + 1
+        n += np.arange(5).reshape((5,) + (1,)*x.ndim) > k
+        self.desired = self.desired + self.increment
+        with np.errstate(invalid = 'ignore', divide = 'ignore'): # (at markers that don't move)
+            self._adjust(x.ndim)
+
+    def _adjust(self, ndim):
+        ''' Move the middle markers that are at least one position from their desired positions by one position. '''
+        q, n = self.q, self.n
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            move = ((d >= 1) & (n[i + 1] - n[i] > 1)) | ((d <= -1) & (n[i - 1] - n[i] < -1))
+            if not np.any(move):
+                continue
+            d = np.where(move, np.sign(d), 0)
+            parabolic = q[i] + d/(n[i + 1] - n[i - 1])*((n[i] - n[i - 1] + d)*(q[i + 1] - q[i])/(n[i + 1] - n[i]) +
+                                                         (n[i + 1] - n[i] - d)*(q[i] - q[i - 1])/(n[i] - n[i - 1]))
+            neighbour = np.where(d > 0, i + 1, i - 1)
+            q_neighbour = np.take_along_axis(q, neighbour[None], axis = 0)[0] if ndim else q[neighbour]
+            n_neighbour = np.take_along_axis(n, neighbour[None], axis = 0)[0] if ndim else n[neighbour]
+            linear = q[i] + d*(q_neighbour - q[i])/(n_neighbour - n[i])
+            q[i] = np.where(move, np.where((q[i - 1] < parabolic) & (parabolic < q[i + 1]), parabolic, linear), q[i])
+            n[i] += d
+
+    @property
+    def value(self):
+        ''' Current estimate of the quantile. '''
+        if self.count < 5:
+            return np.quantile(self.q[:self.count], self.p, axis = 0) if self.count else np.full(self.q.shape[1:], np.nan)
+        return self.q[2].copy()
+
+class Dispersion():
+    ''' Streaming statistics of Monte Carlo runs: RunningStats and P2Quantile of each of FIELDS, and of the thrust at each point of
+        the time grid t (the thrust envelope). Failed runs are counted but not folded in.
+    '''
+    def __init__(self, t):
+        self.t = t
+        self.stats = {field: RunningStats() for field in FIELDS}
+        self.quantiles = {field: [P2Quantile(p) for p in QUANTILES] for field in FIELDS}
+        self.envelope = RunningStats(len(t))
+        self.envelope_quantiles = [P2Quantile(p, len(t)) for p in QUANTILES]
+        self.failed = 0
+
+    def add(self, summary, thrust):
+        ''' Fold in the summary of a run (a dict of FIELDS) and its thrust on the time grid (None if the run failed). '''
+        if thrust is None or not all(np.isfinite(summary[field]) for field in FIELDS):
+            self.failed += 1
+            return
+        for field in FIELDS:
+            self.stats[field].add(summary[field])
+            for sketch in self.quantiles[field]:
+                sketch.add(summary[field])
+        self.envelope.add(thrust)
+        for sketch in self.envelope_quantiles:
+            sketch.add(thrust)
+
+    def report(self):
+        ''' Return a table of the statistics of each of FIELDS. '''
+        header = '%-10s %12s %12s %12s %12s ' % ('', 'mean', 'std', 'min', 'max') + ' '.join('%12s' % ('P%g' % (100*p))
+                                                                                            for p in QUANTILES)
+        lines = [header]
+        for field in FIELDS:
+            stats = self.stats[field]
+            lines.append('%-10s %12.5g %12.5g %12.5g %12.5g ' % (field, stats.mean, stats.std, stats.min, stats.max) +
+                         ' '.join('%12.5g' % sketch.value for sketch in self.quantiles[field]))
+        lines.append('%d runs, %d failed' % (self.envelope.count, self.failed))
+        return '\n'.join(lines)
+
+    def write(self, folder):
+        ''' Write the statistics of FIELDS (dispersion.csv) and the thrust envelope (thrust_envelope.csv) to folder. '''
+        with open(os.path.join(folder, 'dispersion.csv'), 'w', newline = '') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['field', 'mean', 'std', 'min', 'max'] + ['P%g' % (100*p) for p in QUANTILES])
+            for field in FIELDS:
+                stats = self.stats[field]
+                writer.writerow([field, stats.mean, stats.std, stats.min, stats.max] +
+                                [sketch.value for sketch in self.quantiles[field]])
+        columns = [self.t, self.envelope.mean, self.envelope.std, self.envelope.min, self.envelope.max] + [
+                   sketch.value for sketch in self.envelope_quantiles]
+        with open(os.path.join(folder, 'thrust_envelope.csv'), 'w', newline = '') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['time', 'mean', 'std', 'min', 'max'] + ['P%g' % (100*p) for p in QUANTILES])
+            writer.writerows(zip(*columns))
+
+class Distribution():
+    ''' A distribution of an input, parsed from a spec (see the module docstring) relative to its built value. '''
+    def __init__(self, spec, nominal):
+        kind, _, args = spec.partition(':')
+        args = args.split(':') if args else []
+        if len(args) == 1 and args[0].endswith('%'):
+            spread = float(args[0][:-1])/100*abs(nominal)
+            args = {'normal': [nominal, spread], 'uniform': [nominal - spread, nominal + spread],
+                    'triangular': [nominal - spread, nominal, nominal + spread]}.get(kind, args)
+        n_args = {'normal': 2, 'uniform': 2, 'triangular': 3}
+        if kind not in n_args:
+            raise ValueError('Unknown distribution ' + kind + ', expected ' + ', '.join(n_args))
+        if len(args) != n_args[kind]:
+            raise ValueError('A %s distribution takes %d values, or a single percentage: %s' % (kind, n_args[kind], spec))
+        self.kind = kind
+        self.args = [float(arg) for arg in args]
+
+    def sample(self, rng, n):
+        ''' Draw n samples. '''
+        return getattr(rng, self.kind)(*self.args, size = n)
+
+def sample_cases(workspace, specs, n, seed = None):
+    ''' Return n cases (dicts of field values, see Sweep.apply_case), drawn from specs: a dict of the distribution spec of each
+        field of workspace.
+    '''
+    rng = np.random.default_rng(seed)
+    samples = {field: Distribution(spec, float(get_field(workspace, field))).sample(rng, n) for field, spec in specs.items()}
+    return [{field: float(samples[field][ii]) for field in specs} for ii in range(n)]
+
+def run_sample(workspace, t, case):
+    ''' Run the base workspace with the field values of case applied. Returns the summary of the run (a dict of FIELDS, NaN if the
+        run failed, and 'message') and its thrust on the time grid t (zero after the run ends, None if it failed).
+    '''
+    workspace = apply_case(workspace, case)
+    options = dict(workspace.get('options', {}), **RUN_OPTIONS)
+    with warnings.catch_warnings(record = True) as caught:
+        warnings.simplefilter('always')
+        try:
+            record = performance_code(workspace['inputs'], workspace['mode'], None, options, stdout = io.StringIO())
+            summary = summarize(record)
+            summary['max_thrust'] = float(np.max(record['F_thrust']))
+            summary['message'] = str(caught[-1].message) if caught else ''
+            thrust = np.interp(t, record['time'], record['F_thrust'], right = 0)
+        except Exception as err: # a failed sample shouldn't stop the analysis
+            summary = dict.fromkeys(FIELDS, np.nan)
+            summary['message'] = '%s: %s' % (type(err).__name__, err)
+            thrust = None
+    return summary, thrust
+
+def monte_carlo(workspace, cases, processes = None, filename = None, stdout = None):
+    ''' Run the base workspace once per case (see sample_cases) on a pool of processes worker processes (None for one per core),
+        folding the results into a Dispersion as they arrive, which is returned. If filename is given, a row of the case and summary
+        of each run is appended to that .csv file as it finishes. Progress is printed to stdout.
+    '''
+    t = np.arange(0, workspace['options']['t_final'] + ENVELOPE_DT/2, ENVELOPE_DT)
+    dispersion = Dispersion(t)
+    if not cases:
+        return dispersion
+    fields = list(dict.fromkeys(field for case in cases for field in case))
+
+    csvfile = open(filename, 'w', newline = '') if filename else None
+    # the base workspace and time grid are sent once per worker
+    results = parallel_map(run_sample, cases, (workspace, t), processes, CHUNKSIZE)
+    try:
+        if csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['sample'] + fields + list(FIELDS) + ['message'])
+        for n_done, (index, (summary, thrust)) in enumerate(results, 1):
+            dispersion.add(summary, thrust)
+            if csvfile:
+                writer.writerow([index] + [cases[index][field] for field in fields] + [summary[field] for field in FIELDS] +
+                                [summary['message']])
+            if n_done % max(len(cases)//20, 1) == 0 or n_done == len(cases):
+                impulse = dispersion.stats['impulse']
+                print('%d/%d samples: impulse %.0f +/- %.0f N*s' % (n_done, len(cases), impulse.mean, impulse.std), file = stdout,
+                      flush = True)
+    finally:
+        results.close() # shut the workers down, even if the analysis was interrupted
+        if csvfile:
+            csvfile.close()
+    return dispersion
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Run a Monte Carlo dispersion analysis of SimulateLiquid or SimulateHybrid.')
+    parser.add_argument('page', choices = [page for page in PAGES if PAGES[page][3] == 'PerformanceCode'], help = 'page to run')
+    parser.add_argument('inputs', nargs = '?', help = 'input file: a .mat workspace saved from the page, or a .json file of inputs')
+    parser.add_argument('--set', action = 'append', default = [], type = split_assignment, metavar = 'FIELD=VALUE',
+                        help = 'set an input, as typed into the page (e.g. "inputs.ox.V_l=3.5 [L]")')
+    parser.add_argument('--dist', action = 'append', default = [], type = split_assignment, metavar = 'FIELD=DISTRIBUTION',
+                        help = 'distribution of a built input, in base units (e.g. inputs.ox.Cd_injector=normal:2%%)')
+    parser.add_argument('-n', '--samples', type = int, default = 1000, help = 'number of samples (default 1000)')
+    parser.add_argument('--seed', type = int, help = 'random seed')
+    parser.add_argument('--processes', type = int, help = 'worker processes (default: one per core)')
+    parser.add_argument('--output', default = './Outputs/montecarlo', help = 'directory to write results to')
+    args = parser.parse_args()
+
+    err_list = load_inputs(args.page, args.inputs, dict(args.set))
+    if err_list:
+        parser.error('; '.join(err_list))
+    base = build_native(args.page)
+    cases = sample_cases(base, dict(args.dist), args.samples, args.seed)
+    os.makedirs(args.output, exist_ok = True)
+    dispersion = monte_carlo(base, cases, args.processes, os.path.join(args.output, 'samples.csv'))
+    dispersion.write(args.output)
+    print(dispersion.report())
+    print('Results saved in ' + args.output)
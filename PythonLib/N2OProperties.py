@@ -0,0 +1,237 @@
+'''
+    N2OProperties:
+
+    Python version of N2O_Properties.m and N2O_FindT.m from Supporting Functions. Saturation properties of nitrous oxide are
+    calculated from the same empirical correlations (vapor pressure, densities, viscosities) and NIST webbook data (enthalpy,
+    internal energy, specific heats, entropy) used by the MATLAB code, so the native Python backend agrees with the MATLAB one.
+
+    The correlations are evaluated once on a dense, equally-spaced temperature grid (N2OPropertyTable), and n2o_properties()
+    interpolates linearly in that table, which is much cheaper than evaluating the correlations for every call. The grid includes
+    every NIST data temperature, so the NIST-based properties are reproduced exactly and the correlation-based ones are within
+    the table's error bound (see N2OPropertyTable.max_error()). n2o_properties_exact() evaluates the correlations directly, for
+    validation. Compare the two and time them with:
+
+        python -m PythonLib.N2OProperties
+
+    WARNING: as in the MATLAB code, temperatures outside of -90 to 30 C are clamped to the boundary.
+'''
+
+import os.path
+import time
+import hashlib
+import numpy as np
+
+from .FastInterp import fast_interp1, interp1
+
+NIST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Supporting Functions', 'N2O_Properties.cgi.txt')
+
+T_MIN = -90 + 273.15 # lower bound of valid temperatures [K]
+T_MAX = 30 + 273.15 # upper bound of valid temperatures [K]
+
+T_CRIT = 309.57 # critical temperature [K]
+P_CRIT = 7251 # critical pressure [kPa]
+RHO_CRIT = 452 # critical density [kg/m^3]
+
+''' Coefficients of the empirical correlations, keyed by the property they calculate. '''
+COEFFICIENTS = {
+    'Pvap': (-6.71893, 1.3596, -1.3779, -4.051),
+    'rho_l': (1.72328, -0.83950, 0.51060, -0.10412),
+    'rho_g': (-1.00900, -6.28792, 7.50332, -7.90463, 0.629427),
+    'mu_l': (1.6089, 2.0439, 5.24, 0.0293423),
+    'mu_g': (3.3281, -1.18237, -0.055155)
+}
+
+TABLE_SIZE = 12001 # number of temperatures in the property table (0.01 K spacing, which lands on every NIST data temperature)
+
+''' Columns of the NIST data file used, keyed by the name of the property they produce. Values are in kJ/kg or J/(g*K). '''
+NIST_COLUMNS = {
+    'h_l': 'Enthalpy (l, kJ/kg)',
+    'h_g': 'Enthalpy (v, kJ/kg)',
+    'e_l': 'Internal Energy (l, kJ/kg)',
+    'e_g': 'Internal Energy (v, kJ/kg)',
+    'cv_l': 'Cv (l, J/g*K)',
+    'cv_g': 'Cv (v, J/g*K)',
+    'cp_l': 'Cp (l, J/g*K)',
+    'cp_g': 'Cp (v, J/g*K)',
+    's_l': 'Entropy (l, J/g*K)',
+    's_g': 'Entropy (v, J/g*K)'
+}
+
+_nist_data = None # NIST data, loaded on first use (equivalent of the MATLAB persistent variable)
+_find_t_data = None # vapor pressure table used by n2o_find_t, built on first use
+_table = None # property table used by n2o_properties, built on first use
+
+def load_nist_data():
+    ''' Load the tab-delimited NIST saturation table, returning a dict of numpy arrays (temperature under 'T'). '''
+    global _nist_data
+    if _nist_data is None:
+        with open(NIST_FILE, 'r') as f:
+            header = f.readline().rstrip('\n').split('\t')
+        data = np.genfromtxt(NIST_FILE, delimiter='\t', skip_header=1) # 'undefined' entries become NaN (they aren't used)
+        _nist_data = {'T': data[:, header.index('Temperature (K)')]}
+        for name, column in NIST_COLUMNS.items():
+            _nist_data[name] = data[:, header.index(column)]
+    return _nist_data
+
+def n2o_properties_exact(T):
+    ''' Calculate the saturation properties of nitrous oxide at temperature T [K] (a scalar or numpy array) directly from the
+        correlations and NIST data. Returns a dict with the same fields as the MATLAB struct, in SI units (Pa, kg/m^3, J/kg,
+        J/(kg*K), N*s/m^2).
+    '''
+    is_scalar = np.ndim(T) == 0
+    T = np.array(T, dtype=float)
+
+    # Range-check temperature
+    T[T < T_MIN] = T_MIN + 0.000001
+    T[T > T_MAX] = T_MAX + 0.000001
+
+    Tr = T/T_CRIT
+    Trinv = 1.0/Tr
+    properties = {}
+
+    # Calculate vapor pressure, valid -90 to 36C
+    b1, b2, b3, b4 = COEFFICIENTS['Pvap']
+    properties['Pvap'] = np.exp(Trinv*(b1*(1 - Tr) + b2*(1 - Tr)**(3/2) + b3*(1 - Tr)**(5/2) + b4*(1 - Tr)**5))*P_CRIT*1000
+
+    # Calculate density of liquid, valid -90C to 36C
+    b1, b2, b3, b4 = COEFFICIENTS['rho_l']
+    properties['rho_l'] = np.exp(b1*(1 - Tr)**(1/3) + b2*(1 - Tr)**(2/3) + b3*(1 - Tr) + b4*(1 - Tr)**(4/3))*RHO_CRIT
+
+    # Calculate density of gas, valid -90C to 36C
+    b1, b2, b3, b4, b5 = COEFFICIENTS['rho_g']
+    properties['rho_g'] = np.exp(b1*(Trinv - 1)**(1/3) + b2*(Trinv - 1)**(2/3) + b3*(Trinv - 1) + b4*(Trinv - 1)**(4/3)
+                                 + b5*(Trinv - 1)**(5/3))*RHO_CRIT
+
+    # Calculate dynamic viscosity of saturated liquid, valid from -90C to 30C (mN*s/m^2 -> N*s/m^2)
+    b1, b2, b3, b4 = COEFFICIENTS['mu_l']
+    theta = (T_CRIT - b3)/(T - b3)
+    properties['mu_l'] = b4*np.exp(b1*(theta - 1)**(1/3) + b2*(theta - 1)**(4/3))*1e-3
+
+    # Calculate dynamic viscosity of saturated vapor, valid from -90C to 30C (uN*s/m^2 -> N*s/m^2)
+    b1, b2, b3 = COEFFICIENTS['mu_g']
+    properties['mu_g'] = np.exp(b1 + b2*(Trinv - 1)**(1/3) + b3*(Trinv - 1)**(4/3))*1e-6
+
+    # Enthalpy, internal energy, specific heats and entropy from NIST data (kJ/kg -> J/kg, J/(g*K) -> J/(kg*K))
+    nist = load_nist_data()
+    for name in NIST_COLUMNS:
+        properties[name] = fast_interp1(nist['T'], nist[name], T)*1e3
+    properties['deltaH_vap'] = properties['h_g'] - properties['h_l']
+    properties['deltaE_vap'] = properties['e_g'] - properties['e_l']
+
+    if is_scalar: # return plain floats for scalar input
+        for name in properties:
+            properties[name] = float(properties[name])
+    return properties
+
+class N2OPropertyTable:
+    ''' Saturation properties of nitrous oxide tabulated on n equally-spaced temperatures from T_MIN to T_MAX. Calling the table
+        with a temperature [K] (scalar or numpy array) interpolates linearly, clamping to the table range, and returns a dict like
+        n2o_properties_exact(). The values are stored as one row per property, along with the difference to the next temperature,
+        so a lookup is a single index calculation followed by one multiply-add per property.
+    '''
+    def __init__(self, n = TABLE_SIZE):
+        self.n = n
+        self.T = np.linspace(T_MIN, T_MAX, n)
+        exact = n2o_properties_exact(self.T)
+        self.names = list(exact)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.values = np.vstack([exact[name] for name in self.names]) # [property, temperature]
+        self.deltas = np.diff(self.values, axis = 1)
+        # the same tables as lists with one row per temperature: for a single temperature, plain Python arithmetic on a short row
+        # is faster than numpy
+        self._rows = self.values[:, :-1].T.tolist()
+        self._row_deltas = self.deltas.T.tolist()
+        self._inv_dT = (n - 1)/(T_MAX - T_MIN)
+
+    def _locate(self, T):
+        ''' Return the (0-based) low sample index and fraction towards the next sample for the temperature(s) T. '''
+        i_T = np.clip((np.asarray(T, dtype = float) - T_MIN)*self._inv_dT, 0, self.n - 1)
+        i_T_lo = np.minimum(i_T.astype(np.intp), self.n - 2)
+        return i_T_lo, i_T - i_T_lo
+
+    def __call__(self, T, names = None):
+        ''' Look up the properties at temperature(s) T [K]. names may restrict the returned properties to a subset. '''
+        if np.ndim(T) == 0:
+            # scalar lookup, as done at each step of the integration: avoid numpy overhead as far as possible
+            i_T = min(max((float(T) - T_MIN)*self._inv_dT, 0.0), self.n - 1.0)
+            i_T_lo = min(int(i_T), self.n - 2)
+            frac = i_T - i_T_lo
+            row = [value + frac*delta for value, delta in zip(self._rows[i_T_lo], self._row_deltas[i_T_lo])]
+            if names is None:
+                return dict(zip(self.names, row))
+            return {name: row[self.index[name]] for name in names}
+        i_T_lo, frac = self._locate(T)
+        return {name: self.lookup(name, i_T_lo, frac) for name in (self.names if names is None else names)}
+
+    def lookup(self, name, i_T_lo, frac):
+        ''' Interpolate a single property at the sample indices and fractions returned by _locate(). '''
+        k = self.index[name]
+        return self.values[k][i_T_lo] + frac*self.deltas[k][i_T_lo]
+
+    def max_error(self):
+        ''' Return a dict of the largest error of each property, relative to its largest magnitude, between the table and
+            n2o_properties_exact() at the midpoints of the table (where linear interpolation errors are largest).
+        '''
+        T_mid = 0.5*(self.T[:-1] + self.T[1:])
+        exact = n2o_properties_exact(T_mid)
+        approx = self(T_mid)
+        return {name: float(np.max(np.abs(approx[name] - exact[name]))/np.max(np.abs(exact[name]))) for name in self.names}
+
+def get_table():
+    ''' Return the session's property table, building it if necessary. '''
+    global _table
+    if _table is None:
+        _table = N2OPropertyTable()
+    return _table
+
+def n2o_properties(T, names = None):
+    ''' Calculate the saturation properties of nitrous oxide at temperature T [K] (a scalar or numpy array) by interpolating in the
+        property table. Returns a dict with the same fields as the MATLAB struct, in SI units (Pa, kg/m^3, J/kg, J/(kg*K), N*s/m^2);
+        names may restrict it to a subset of the fields.
+    '''
+    return get_table()(T, names)
+
+def benchmark(n = 1000000, stdout = None):
+    ''' Compare n2o_properties with n2o_properties_exact on an array of n random temperatures, printing the time per element and
+        the table's error bound. Returns a dict of the timings [s per element].
+    '''
+    table = get_table()
+    T = np.random.default_rng(0).uniform(T_MIN, T_MAX, n)
+    timings = {}
+    for label, func in (('exact', n2o_properties_exact), ('table', n2o_properties), ('table (Pvap only)',
+                        lambda T: n2o_properties(T, ['Pvap']))):
+        start = time.perf_counter()
+        func(T)
+        timings[label] = (time.perf_counter() - start)/n
+        print('%-18s %8.1f ns per element' % (label + ':', timings[label]*1e9), file = stdout)
+    start = time.perf_counter()
+    for T_i in T[:10000]:
+        n2o_properties(T_i)
+    timings['table (scalar)'] = (time.perf_counter() - start)/10000
+    print('%-18s %8.1f ns per call' % ('table (scalar):', timings['table (scalar)']*1e9), file = stdout)
+    print('Largest relative table error:', file = stdout)
+    for name, error in table.max_error().items():
+        print('    %-12s %.1e' % (name, error), file = stdout)
+    return timings
+
+def properties_hash():
+    ''' Return a hex digest identifying the property model: the correlation coefficients, critical constants, table size and NIST
+        data. Tables derived from the properties (e.g. FindG's mass flux table) are cached under it, so they are rebuilt whenever
+        any of these change.
+    '''
+    digest = hashlib.sha1(repr((sorted(COEFFICIENTS.items()), T_MIN, T_MAX, T_CRIT, P_CRIT, RHO_CRIT, TABLE_SIZE)).encode())
+    with open(NIST_FILE, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+def n2o_find_t(p_vap):
+    ''' Estimate the temperature [K] that gives the specified vapor pressure p_vap [Pa] (scalar or numpy array). '''
+    global _find_t_data
+    if _find_t_data is None:
+        T_i = np.linspace(T_MIN, T_MAX, 1000)
+        _find_t_data = (n2o_properties(T_i)['Pvap'], T_i)
+    Pvap, T_i = _find_t_data
+    return interp1(Pvap, T_i, p_vap)
+
+if __name__ == '__main__':
+    benchmark()
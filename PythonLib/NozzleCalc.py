@@ -0,0 +1,313 @@
+'''
+    NozzleCalc:
+
+    Python version of NozzleCalc.m from Supporting Functions, along with the parts of flowisentropic.m and flownormalshock.m it uses.
+    Calculates the exit conditions and mass flow rate for adiabatic quasi-1D flow through a nozzle, including subsonic flow,
+    supersonic flow, and a normal shock in the diverging section.
+
+    NozzleCalc.m root-solves the area ratio for the exit Mach number, and the shock position (SolveNormShock) when there is a normal
+    shock in the nozzle, on every call. nozzle_calc() is called on every evaluation of the derivatives, so here the Mach number of
+    each area ratio is tabulated once, on the subsonic and supersonic branches, over a grid of gamma and sqrt(ln(A/A*)) (in which the
+    Mach number is close to linear, down to the throat). mach_from_area_ratio() interpolates the table and takes one Newton step on
+    the area-Mach relation, and falls back on a root solve (solve_mach_from_area_ratio()) outside the table. The normal shock
+    relations are closed-form in the Mach number. A normal shock in the nozzle doesn't need its position either: the mass flow through
+    both sonic throats is the same, so p_exit*A_exit/(p0*A_throat) is a function of the exit Mach number alone, which gives the exit
+    Mach number in closed form for p_exit = p_back. nozzle_calc_exact() is the root-solving version, as in NozzleCalc.m. From the
+    PropSim folder,
+
+        python -m PythonLib.NozzleCalc
+
+    times nozzle_calc() against nozzle_calc_exact() in each flow regime and prints the largest difference.
+'''
+
+import math
+import time
+import warnings
+from collections import namedtuple
+import numpy as np
+from scipy.optimize import brentq, fsolve
+
+R_U = 8.3144621 # Universal gas constant [J/mol*K]
+TABLE_GAMMAS = (1.02, 1.72, 141) # range and number of the ratios of specific heats of the area-Mach table
+TABLE_AREA_RATIO_MAX = 1000.0 # largest area ratio A/A* of the table
+TABLE_SIZE = 401 # number of samples of sqrt(ln(A/A*)) of the table
+
+AreaMachTable = namedtuple('AreaMachTable', ['gamma_0', 'inv_gamma_step', 'inv_root_step', 'mach_sup', 'mach_sub'])
+_area_mach_table = None # AreaMachTable of the Mach numbers of the area ratios (see area_mach_table())
+
+def isentropic_ratios(gamma, mach):
+    ''' Isentropic flow ratios at a Mach number. Returns (T, P, rho, A): static/stagnation temperature, pressure and density ratios,
+        and the area ratio A/A*.
+    '''
+    fac = 1 + (gamma - 1)/2*mach**2
+    b = (gamma + 1)/(2*(1 - gamma)) # power in area ratio calculations
+    T = 1/fac
+    P = fac**(-gamma/(gamma - 1))
+    rho = fac**(-1/(gamma - 1))
+    A = ((gamma + 1)/2)**b/(mach*fac**b) if mach > 0 else math.inf
+    return T, P, rho, A
+
+def mach_from_pressure_ratio(gamma, p_rat):
+    ''' Mach number of isentropic flow with static/stagnation pressure ratio p_rat. '''
+    return math.sqrt(max(2/(gamma - 1)*(p_rat**((1 - gamma)/gamma) - 1), 0))
+
+def solve_mach_from_area_ratio(gamma, A, supersonic):
+    ''' Mach number of isentropic flow at area ratio A/A* on the subsonic or supersonic branch, by root solving. '''
+    if A <= 1:
+        return 1.0 # area ratios below 1 are unphysical; treat them as the throat
+    residual = lambda mach: isentropic_ratios(gamma, mach)[3] - A
+    if supersonic:
+        mach_hi = 2.0
+        while residual(mach_hi) < 0: # expand the bracket until it contains the root
+            mach_hi *= 2
+        return brentq(residual, 1.0, mach_hi, xtol = 1e-12)
+    else:
+        return brentq(residual, 1e-12, 1.0, xtol = 1e-12)
+
+def area_ratio_mach_grid(gamma, A, supersonic, iterations = 64):
+    ''' Vectorised version of solve_mach_from_area_ratio() for arrays of gamma and A >= 1, by bisection on ln(M) followed by two
+        Newton steps (used to build the area-Mach table).
+    '''
+    gamma, A = np.broadcast_arrays(np.asarray(gamma, dtype = float), np.asarray(A, dtype = float))
+    b = (gamma + 1)/(2*(1 - gamma))
+    area = lambda mach: ((gamma + 1)/2)**b/(mach*(1 + (gamma - 1)/2*mach**2)**b)
+    lo, hi = (np.zeros(A.shape), np.full(A.shape, math.log(100.0))) if supersonic else (np.full(A.shape, math.log(1e-12)), np.zeros(A.shape))
+    for _ in range(iterations):
+        mid = (lo + hi)/2
+        beyond = area(np.exp(mid)) > A # further from the throat than the root
+        if supersonic:
+            hi = np.where(beyond, mid, hi)
+            lo = np.where(beyond, lo, mid)
+        else:
+            lo = np.where(beyond, mid, lo)
+            hi = np.where(beyond, hi, mid)
+    mach = np.exp((lo + hi)/2)
+    for _ in range(2): # Newton steps on the area-Mach relation
+        fac = 1 + (gamma - 1)/2*mach**2
+        dA_dmach = area(mach)*(mach**2 - 1)/(mach*fac)
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            mach = np.where(dA_dmach != 0, mach - (area(mach) - A)/dA_dmach, mach)
+    return np.where(A <= 1, 1.0, mach)
+
+def area_mach_table():
+    ''' Return the area-Mach table, building it on first use: an AreaMachTable of the supersonic and subsonic Mach numbers over the
+        axes (gamma, sqrt(ln(A/A*))), as nested lists for fast scalar lookups.
+    '''
+    global _area_mach_table
+    if _area_mach_table is None:
+        gammas = np.linspace(*TABLE_GAMMAS)
+        roots = np.linspace(0, math.sqrt(math.log(TABLE_AREA_RATIO_MAX)), TABLE_SIZE)
+        G, A = np.meshgrid(gammas, np.exp(roots**2), indexing = 'ij')
+        _area_mach_table = AreaMachTable(float(gammas[0]), (len(gammas) - 1)/float(gammas[-1] - gammas[0]), (len(roots) - 1)/float(roots[-1]),
+                                         area_ratio_mach_grid(G, A, True).tolist(), area_ratio_mach_grid(G, A, False).tolist())
+    return _area_mach_table
+
+def mach_from_area_ratio(gamma, A, supersonic):
+    ''' Mach number of isentropic flow at area ratio A/A* on the subsonic or supersonic branch: interpolated from the area-Mach table
+        with one Newton correction, or root-solved outside the table.
+    '''
+    if A <= 1:
+        return 1.0 # area ratios below 1 are unphysical; treat them as the throat
+    if not (TABLE_GAMMAS[0] <= gamma <= TABLE_GAMMAS[1] and A <= TABLE_AREA_RATIO_MAX):
+        return solve_mach_from_area_ratio(gamma, A, supersonic)
+    # bilinear interpolation
+    table = area_mach_table()
+    machs = table.mach_sup if supersonic else table.mach_sub
+    i_g = (gamma - table.gamma_0)*table.inv_gamma_step
+    i_r = math.sqrt(math.log(A))*table.inv_root_step
+    i_g_lo = min(int(i_g), TABLE_GAMMAS[2] - 2)
+    i_r_lo = min(int(i_r), TABLE_SIZE - 2)
+    f_g = i_g - i_g_lo
+    f_r = i_r - i_r_lo
+    row_lo, row_hi = machs[i_g_lo], machs[i_g_lo + 1]
+    mach = ((1 - f_g)*((1 - f_r)*row_lo[i_r_lo] + f_r*row_lo[i_r_lo + 1])
+            + f_g*((1 - f_r)*row_hi[i_r_lo] + f_r*row_hi[i_r_lo + 1]))
+    # Newton step on the area-Mach relation
+    fac = 1 + (gamma - 1)/2*mach**2
+    b = (gamma + 1)/(2*(1 - gamma))
+    A_mach = ((gamma + 1)/2)**b/(mach*fac**b)
+    dA_dmach = A_mach*(mach**2 - 1)/(mach*fac)
+    return mach - (A_mach - A)/dA_dmach if dA_dmach != 0 else mach
+
+def mach_from_shock_exit(gamma, K):
+    ''' Subsonic exit Mach number of a nozzle with a normal shock in its diverging section, given K = p_exit*A_exit/(p0*A_throat).
+        The mass flow through the throat and the sonic throat behind the shock are the same (p0*A_throat = p0B*A_star,B), so
+        K = (p_exit/p0B)*(A_exit/A_star,B) = (2/(gamma + 1))^((gamma + 1)/(2*(gamma - 1)))/(M_e*sqrt(1 + (gamma - 1)/2*M_e^2)),
+        a quadratic in M_e^2.
+    '''
+    c = (2/(gamma + 1))**((gamma + 1)/(2*(gamma - 1)))/K
+    return math.sqrt(2*c**2/(1 + math.sqrt(1 + 2*(gamma - 1)*c**2)))
+
+def normal_shock(gamma, mach):
+    ''' Normal shock relations for upstream Mach number mach. Returns (T, P, rho, M, P0): downstream/upstream static temperature,
+        pressure and density ratios, downstream Mach number, and downstream/upstream stagnation pressure ratio.
+    '''
+    P = 1 + 2*gamma/(gamma + 1)*(mach**2 - 1)
+    rho = (gamma + 1)*mach**2/((gamma - 1)*mach**2 + 2)
+    T = P/rho
+    M = math.sqrt((1 + (gamma - 1)/2*mach**2)/(gamma*mach**2 - (gamma - 1)/2))
+    P0 = rho**(gamma/(gamma - 1))*(1/P)**(1/(gamma - 1))
+    return T, P, rho, M, P0
+
+def nozzle_calc(d_throat, d_exit, T0, p0, gamma, M, p_back):
+    ''' Calculate the exit conditions and mass flow rate for flow through a nozzle. Assumes adiabatic flow.
+        Inputs: throat and exit diameters [m], stagnation temperature [K] and pressure [Pa], ratio of specific heats,
+        mean molecular mass [kg/mol] and exit back pressure [Pa].
+        Returns (ischoked, p_exit, p_shock_crit, u_exit, m_dot, M_e).
+    '''
+    A_throat = math.pi/4*d_throat**2
+    A_exit = math.pi/4*d_exit**2
+    E = A_exit/A_throat # Expansion ratio
+
+    R_spec = R_U/M
+    rho0 = p0/(R_spec*T0)
+
+    # Determine regime of nozzle flow
+    M_e_sup = mach_from_area_ratio(gamma, E, True) # exit Mach number without a shock
+    _, p_e_rat_sup, _, _ = isentropic_ratios(gamma, M_e_sup)
+    p_shock_crit = normal_shock(gamma, M_e_sup)[1]*p_e_rat_sup*p0 # normal shock at the exit plane
+    if p_back > find_choked_p_crit(gamma, p0):
+        # All subsonic
+        ischoked = 0
+        p_exit = p_back
+        M_e = mach_from_pressure_ratio(gamma, p_back/p0)
+        T_rat, _, rho_rat, _ = isentropic_ratios(gamma, M_e)
+        u_exit = M_e*math.sqrt(gamma*R_spec*T_rat*T0)
+        m_dot = A_throat*u_exit*rho0*rho_rat
+    elif p_back < p_shock_crit:
+        # Choked flow, supersonic at exit
+        ischoked = 1
+        M_e = M_e_sup
+        T_e_rat, p_e_rat, rho_e_rat, _ = isentropic_ratios(gamma, M_e)
+        p_exit = p0*p_e_rat
+        u_exit = math.sqrt(gamma*R_spec*T0*T_e_rat)*M_e
+        m_dot = u_exit*rho0*rho_e_rat*A_exit
+    else:
+        # Choked flow, normal shock in diverging section: the exit pressure is the back pressure (see mach_from_shock_exit())
+        ischoked = 1
+        M_e = mach_from_shock_exit(gamma, p_back*E/p0)
+        T_e = T0*isentropic_ratios(gamma, M_e)[0]
+        p_exit = p_back
+        rho_e = p_exit/(R_spec*T_e)
+        u_exit = M_e*math.sqrt(gamma*R_spec*T_e)
+        m_dot = u_exit*rho_e*A_throat # (as normal_shock_calc())
+
+    return ischoked, p_exit, p_shock_crit, u_exit, m_dot, M_e
+
+def nozzle_calc_exact(d_throat, d_exit, T0, p0, gamma, M, p_back):
+    ''' nozzle_calc() by root solving, as in NozzleCalc.m: the exit Mach numbers are solved from the area ratios, and the position of a
+        normal shock in the nozzle from the back pressure.
+    '''
+    A_throat = math.pi/4*d_throat**2
+    A_exit = math.pi/4*d_exit**2
+    E = A_exit/A_throat # Expansion ratio
+
+    R_spec = R_U/M
+    rho0 = p0/(R_spec*T0)
+
+    # Determine regime of nozzle flow
+    p_shock_crit = find_shock_p_crit(A_throat, A_exit, gamma, p0)
+    if p_back > find_choked_p_crit(gamma, p0):
+        # All subsonic
+        ischoked = 0
+        p_exit = p_back
+        M_e = mach_from_pressure_ratio(gamma, p_back/p0)
+        T_rat, _, rho_rat, _ = isentropic_ratios(gamma, M_e)
+        u_exit = M_e*math.sqrt(gamma*R_spec*T_rat*T0)
+        m_dot = A_throat*u_exit*rho0*rho_rat
+    elif p_back < p_shock_crit:
+        # Choked flow, supersonic at exit
+        ischoked = 1
+        M_e = solve_mach_from_area_ratio(gamma, E, True)
+        T_e_rat, p_e_rat, rho_e_rat, _ = isentropic_ratios(gamma, M_e)
+        p_exit = p0*p_e_rat
+        u_exit = math.sqrt(gamma*R_spec*T0*T_e_rat)*M_e
+        m_dot = u_exit*rho0*rho_e_rat*A_exit
+    else:
+        # Choked flow, normal shock in diverging section
+        ischoked = 1
+        solve_norm_shock = lambda E_shock: normal_shock_calc(A_throat, E_shock[0]*A_throat, A_exit, gamma, R_spec, p0, T0)[0] - p_back
+        E_shock = fsolve(solve_norm_shock, 0.5*E, xtol = 1e-3)[0]
+        p_exit, u_exit, m_dot, M_e = normal_shock_calc(A_throat, E_shock*A_throat, A_exit, gamma, R_spec, p0, T0)
+
+    return ischoked, p_exit, p_shock_crit, u_exit, m_dot, M_e
+
+def find_choked_p_crit(gamma, p0):
+    ''' Find cut-off ambient pressure for choked flow. '''
+    return (2/(gamma + 1))**(gamma/(gamma - 1))*p0
+
+def find_shock_p_crit(A_throat, A_exit, gamma, p0):
+    ''' Find cut-off ambient pressure for shock in nozzle (limiting condition: normal shock at exit plane). '''
+    M_e = solve_mach_from_area_ratio(gamma, A_exit/A_throat, True)
+    p_exit_before = isentropic_ratios(gamma, M_e)[1]*p0
+    return normal_shock(gamma, M_e)[1]*p_exit_before
+
+def normal_shock_calc(A_throat, A_shock, A_exit, gamma, R_spec, p0, T0):
+    ''' Compute exit pressure, exit velocity, mass flow rate and exit Mach number for a normal shock in the diverging section of the
+        nozzle at area A_shock. Conditions: 1 is right before the shock, 2 right after, and e the nozzle exit.
+        Returns (p_exit, u_exit, m_dot, M_e).
+    '''
+    A_shocktoAstar_rat = A_shock/A_throat
+    A_exittoAstar_rat = A_exit/A_throat
+
+    # Calculate conditions at 1 and 2
+    M_1 = solve_mach_from_area_ratio(gamma, A_shocktoAstar_rat, True)
+    _, _, _, M_2, p0B_rat = normal_shock(gamma, M_1)
+    p0B = p0B_rat*p0
+    # Calculate E for new A_star
+    A_2toBstar_rat = isentropic_ratios(gamma, M_2)[3]
+    A_exittoBstar_rat = A_exittoAstar_rat/A_shocktoAstar_rat*A_2toBstar_rat # A_exit/A_star,B
+    # Calculate conditions at exit
+    M_e = solve_mach_from_area_ratio(gamma, A_exittoBstar_rat, False)
+    T_e_rat, p_e_rat, _, _ = isentropic_ratios(gamma, M_e)
+    T_e = T0*T_e_rat
+    p_exit = p0B*p_e_rat
+    rho_e = p_exit/(R_spec*T_e)
+    u_exit = M_e*math.sqrt(gamma*R_spec*T_e)
+    m_dot = u_exit*rho_e*A_throat
+    return p_exit, u_exit, m_dot, M_e
+
+def benchmark(n = 2000, stdout = None):
+    ''' Time nozzle_calc() against nozzle_calc_exact() over n random nozzles in each flow regime (supersonic exit, normal shock in the
+        nozzle, subsonic) and n sonic orifices (d_exit = d_throat, as the injector and regulator), printing the time per call and the
+        largest relative difference of each output. Returns a dict of the timings [s per call].
+    '''
+    rng = np.random.default_rng(0)
+    area_mach_table() # built once per process
+    timings = {}
+    outputs = ('p_exit', 'p_shock_crit', 'u_exit', 'm_dot', 'M_e')
+    for regime in ('supersonic', 'shock', 'subsonic', 'orifice'):
+        cases = []
+        while len(cases) < n:
+            gamma = rng.uniform(1.1, 1.4)
+            E = 1.0 if regime == 'orifice' else rng.uniform(2, 30)
+            d_throat = 0.02
+            p0 = rng.uniform(5e5, 5e6)
+            p_choked = find_choked_p_crit(gamma, p0)
+            p_shock = find_shock_p_crit(1.0, E, gamma, p0)
+            bounds = {'supersonic': (0, p_shock), 'shock': (p_shock, p_choked), 'subsonic': (p_choked, p0), 'orifice': (0, p0)}[regime]
+            p_back = rng.uniform(*bounds)
+            cases.append((d_throat, d_throat*math.sqrt(E), rng.uniform(1500, 3500), p0, gamma, rng.uniform(0.02, 0.03), p_back))
+        results = {}
+        for label, func in (('nozzle_calc_exact', nozzle_calc_exact), ('nozzle_calc', nozzle_calc)):
+            start = time.perf_counter()
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore') # fsolve's warnings when it fails to place the shock
+                results[label] = np.array([func(*case)[1:] for case in cases])
+            timings[regime + ', ' + label] = (time.perf_counter() - start)/n
+        exact, fast = results['nozzle_calc_exact'], results['nozzle_calc']
+        # compare where the exact solve placed the shock: its exit pressure is the back pressure (to the tolerance of fsolve) and the
+        # exit is subsonic, rather than left at the throat (M_e = 1)
+        solved = np.full(n, True)
+        if regime == 'shock':
+            solved = (np.abs(exact[:, 0]/np.array([case[-1] for case in cases]) - 1) < 1e-3) & (exact[:, 4] < 1)
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            errors = np.nanmax(np.abs(np.where(exact != 0, fast/exact - 1, fast - exact))[solved], axis = 0)
+        print('%-11s nozzle_calc_exact %7.1f us, nozzle_calc %5.1f us per call; largest differences: %s%s' % (regime + ':',
+              timings[regime + ', nozzle_calc_exact']*1e6, timings[regime + ', nozzle_calc']*1e6,
+              ', '.join('%s %.1e' % (output, error) for output, error in zip(outputs, errors)),
+              '' if solved.all() else ' (%d shocks fsolve failed to place)' % np.sum(~solved)), file = stdout)
+    return timings
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,205 @@
+'''
+    OptimizeLiquidMass:
+
+    Python version of OptimizeLiquidMass.m (with FindMassGradient.m and CalcMass.m). Minimises the mass of a liquid engine
+    (calc_mass(): propellant, tanks and engine) over the design values VALUES (the oxidizer to fuel flow time ratio, the tank
+    pressure and the expansion ratio), with the other goals and the oxidizer ullage held fixed. Every design point is a full
+    DesignLiquid solve.
+
+    OptimizeLiquidMass.m evaluates the design points of each gradient and each step of its line search one after another. Here
+    every finite-difference perturbation of a gradient is designed at once on a pool of worker processes, and so
+    are the candidate steps of the line search (STEP_FACTORS of the last accepted learning rate), which is derivative-free: it
+    takes the lightest candidate, refined by a parabola through it and its neighbours, or a perturbation of the gradient if that is
+    lighter still. Every designed point is kept in a MassEvaluator, so a point is never designed twice, and the points designed
+    in the workers warm-start from the closest converged design of DesignLiquid's archive. The workers return their converged
+    designs, which the parent process archives after each batch, so parallel designs never rewrite the archive at once. From the
+    PropSim folder,
+
+        python -m PythonLib.OptimizeLiquidMass DesignLiquid_workspace.mat [--iterations 10] [--processes N]
+
+    optimises the design of a workspace saved from the DesignLiquid page, starting from its goals and design.
+'''
+
+import io
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+
+from .DesignLiquid import DesignEvaluator, solve_design, apply_variables, archive_designs, print_results, INPUT_STRUCTS
+from .Sweep import apply_case, get_field, load_workspace
+from .WorkerPool import WorkerPool
+
+VALUES = ('goal.ox_to_fuel_time', 'design.p_tanks', 'design.exp_ratio') # optimised values, as dotted paths
+MAX_ITER = 10 # gradient steps
+FD_DELTA = 0.01 # relative step of each value for the finite-difference gradient (min_lr in OptimizeLiquidMass.m)
+BASE_LR = 0.01 # initial learning rate, as a relative step of the values
+MIN_LR = 1e-3 # learning rate below which the line search gives up
+STEP_FACTORS = (0.25, 0.5, 1, 1.5, 2.25, 3.375) # learning rates tried by each line search, relative to the last accepted one
+PROCESSES = None # worker processes (None for one per core)
+
+# Mass model of CalcMass.m
+RHO_FUEL = 870 # density the fuel tank is filled to [kg/m^3]
+RHO_OX = 1220 # density the oxidizer tank is filled to [kg/m^3]
+MASS_ENGINE = 10 # mass of the engine [kg]
+OX_TANK_MASS_PER_VOLUME = 8/0.2 # mass of the oxidizer tank per volume, scaled from CAD [kg/m^3]
+FUEL_TANK_MASS_PER_VOLUME = 5/0.1 # mass of the fuel tank per volume, scaled from CAD [kg/m^3]
+
+def calc_mass(inputs):
+    ''' Return the mass of a designed engine (as CalcMass.m): its full tanks plus the engine. '''
+    v_fuel_tank = inputs['fuel']['V_tank']
+    v_ox_tank = inputs['ox']['V_tank']
+    return (RHO_FUEL + FUEL_TANK_MASS_PER_VOLUME)*v_fuel_tank + (RHO_OX + OX_TANK_MASS_PER_VOLUME)*v_ox_tank + MASS_ENGINE
+
+def apply_values(goal, design, values):
+    ''' Return (goal, design) with VALUES set to values. '''
+    structs = apply_case({'goal': goal, 'design': design}, {name: float(value) for name, value in zip(VALUES, values)})
+    return structs['goal'], structs['design']
+
+def design_point(initial_inputs, goal, design, values):
+    ''' Design the engine with VALUES set to values. Returns (mass, variables of the design, design time [s], archive entries); the
+        mass is inf if the design fails or doesn't converge. The converged design is returned as an archive entry (see
+        DesignLiquid.archive_entry()) for the caller to archive, rather than written to the archive.
+    '''
+    start = time.time()
+    goal, design = apply_values(goal, design, values)
+    evaluator = DesignEvaluator(initial_inputs, goal, design)
+    entries = []
+    try:
+        x, params, converged = solve_design(evaluator, processes = 1, stdout = io.StringIO(), archive = entries.extend)
+    except (RuntimeError, np.linalg.LinAlgError): # the design failed to run, or its Jacobian was singular
+        return np.inf, None, time.time() - start, entries
+    mass = calc_mass(apply_variables(evaluator.inputs, design, x)) if converged else np.inf
+    return mass, x, time.time() - start, entries
+
+class MassEvaluator():
+    ''' Designs batches of points (values of VALUES) at once on a pool of worker processes, keeping every result so points are
+        never designed twice. Use as a context manager, which shuts the workers down.
+    '''
+    def __init__(self, initial_inputs, goal, design, processes = None):
+        self.initial_inputs = initial_inputs
+        self.goal = goal
+        self.design = design
+        # the fixed inputs are sent once per worker rather than once per point
+        self.workers = WorkerPool(design_point, (initial_inputs, goal, design), processes)
+        self.processes = self.workers.processes
+        self.points = {} # point_key(values) : (values, mass, variables)
+        self.rounds = 0 # batches designed, i.e. designs that had to happen one after another
+        self.design_time = 0.0 # total time of the designs [s]
+
+    def __enter__(self):
+        self.workers.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.workers.__exit__(*exc_info)
+
+    def point_key(self, values):
+        return tuple(float('%.10g' % value) for value in values)
+
+    def evaluate(self, points):
+        ''' Design a list of points at once, returning their masses in order. '''
+        new = {}
+        for values in points:
+            if self.point_key(values) not in self.points:
+                new.setdefault(self.point_key(values), np.asarray(values, dtype = float))
+        if new:
+            self.rounds += 1
+            new = list(new.values())
+            entries = []
+            for ii, (mass, x, dt, point_entries) in self.workers.imap(new):
+                values = new[ii]
+                self.points[self.point_key(values)] = (values, mass, x)
+                self.design_time += dt
+                entries += point_entries
+            try:
+                archive_designs(entries) # in this process only, once per batch
+            except OSError as err:
+                warnings.warn('Could not archive the designs: ' + str(err))
+        return np.array([self.points[self.point_key(values)][1] for values in points])
+
+def mass_gradient(evaluator, values, mass, delta = FD_DELTA):
+    ''' Return the normalised gradient of the mass with respect to the relative change of each value (as FindMassGradient.m), and
+        the perturbed points, designing them all at once.
+    '''
+    points = [values*(1 + delta*np.eye(len(values))[ii]) for ii in range(len(values))]
+    grad = (evaluator.evaluate(points) - mass)/delta
+    norm = np.linalg.norm(grad)
+    return (grad/norm if np.isfinite(norm) and norm > 0 else np.zeros_like(grad)), points
+
+def line_search(evaluator, values, mass, grad, lr, extra_points = ()):
+    ''' Try steps values*(1 - grad*lr*factor) for the STEP_FACTORS at once, then a parabolic refinement of the lightest. Returns
+        (values, mass, lr) of the lightest point found, among the steps and extra_points (already designed, e.g. the perturbations
+        of the gradient), or None if none is lighter than mass.
+    '''
+    lrs = lr*np.array(STEP_FACTORS)
+    points = [values*(1 - grad*step_lr) for step_lr in lrs]
+    masses = evaluator.evaluate(points)
+    best = int(np.argmin(masses))
+    if 0 < best < len(lrs) - 1 and np.all(np.isfinite(masses[best - 1:best + 2])):
+        # vertex of the parabola through the lightest step and its neighbours
+        l0, l1, l2 = lrs[best - 1:best + 2]
+        m0, m1, m2 = masses[best - 1:best + 2]
+        denom = (l1 - l0)*(m1 - m2) - (l1 - l2)*(m1 - m0)
+        if denom != 0:
+            l_vertex = l1 - 0.5*((l1 - l0)**2*(m1 - m2) - (l1 - l2)**2*(m1 - m0))/denom
+            if l0 < l_vertex < l2:
+                lrs = np.append(lrs, l_vertex)
+                points.append(values*(1 - grad*l_vertex))
+                masses = np.append(masses, evaluator.evaluate(points[-1:]))
+    candidates = [(mass_new, ii) for ii, mass_new in enumerate(masses)]
+    candidates += [(mass_new, len(points) + ii) for ii, mass_new in enumerate(evaluator.evaluate(list(extra_points)))]
+    mass_new, ii = min(candidates)
+    if not mass_new < mass:
+        return None
+    if ii < len(points):
+        return points[ii], mass_new, lrs[ii]
+    return np.asarray(extra_points[ii - len(points)]), mass_new, lr
+
+def optimize_liquid_mass(initial_inputs, goal, design, max_iter = MAX_ITER, processes = None, stdout = sys.stdout):
+    ''' Minimise the engine mass over VALUES, starting from the goal and design. Returns (goal, design, inputs, mass) of the lightest
+        design found.
+    '''
+    start = time.time()
+    values = np.array([get_field({'goal': goal, 'design': design}, name) for name in VALUES], dtype = float)
+    with MassEvaluator(initial_inputs, goal, design, processes or PROCESSES) as evaluator:
+        mass = evaluator.evaluate([values])[0]
+        if not np.isfinite(mass):
+            raise RuntimeError('The initial design did not converge.')
+        print('Initial mass: %.6g kg' % mass, file = stdout, flush = True)
+        lr = BASE_LR
+        for iteration in range(1, max_iter + 1):
+            grad, fd_points = mass_gradient(evaluator, values, mass)
+            if not np.any(grad):
+                break
+            step = None
+            while step is None and lr > MIN_LR:
+                step = line_search(evaluator, values, mass, grad, lr, fd_points)
+                if step is None:
+                    lr *= STEP_FACTORS[0] # no lighter design, try shorter steps
+            if step is None:
+                break
+            print('Iteration %d: values %s, lr %.3g, mass %.6g --> %.6g kg' % (iteration, ', '.join('%.4g' % value
+                  for value in step[0]), step[2], mass, step[1]), file = stdout, flush = True)
+            values, mass, lr = step
+        print('%d designs in %d rounds: %.1f s (%.1f s of designs on %d processes)' % (len(evaluator.points), evaluator.rounds,
+              time.time() - start, evaluator.design_time, evaluator.processes), file = stdout, flush = True)
+        x = evaluator.points[evaluator.point_key(values)][2]
+    goal, design = apply_values(goal, design, values)
+    inputs = apply_variables(DesignEvaluator(initial_inputs, goal, design).inputs, design, x)
+    return goal, design, inputs, mass
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Minimise the mass of the liquid engine of a saved DesignLiquid workspace.')
+    parser.add_argument('workspace', help = '.mat workspace saved from the DesignLiquid page with the Python backend')
+    parser.add_argument('--iterations', type = int, default = MAX_ITER, help = 'gradient steps (default %d)' % MAX_ITER)
+    parser.add_argument('--processes', type = int, help = 'worker processes (default: one per core)')
+    args = parser.parse_args()
+
+    workspace = load_workspace(args.workspace, INPUT_STRUCTS, 'initial_inputs')
+    goal, design, inputs, mass = optimize_liquid_mass(workspace['initial_inputs'], workspace['goal'], workspace['design'],
+                                                      args.iterations, args.processes)
+    print(', '.join('%s = %.4g' % (name, get_field({'goal': goal, 'design': design}, name)) for name in VALUES))
+    print_results(inputs)
+    print('Mass: %.6g kg' % mass)
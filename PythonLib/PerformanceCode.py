@@ -0,0 +1,97 @@
+'''
+    PerformanceCode:
+
+    Python version of PerformanceCode.m from Supporting Functions. Takes inputs defining motor characteristics, runs the integrator
+    and prints summary performance and writes the RAS .eng thrust curve, as requested by the options. Plotting is left to the caller
+    (the SimPages plot results in the GUI's PlotPane).
+'''
+
+import sys
+import numpy as np
+
+from .Integration import integration, trapz, G_0
+from .N2OProperties import n2o_properties
+
+''' Default options, used for any option that isn't provided. '''
+DEFAULT_OPTIONS = {
+    't_final': 60, # integration time limit [s]
+    'dt': 0.01, # output time resolution [s]
+    'output_on': False, # if this is on, print_on and RAS_on are considered to be true
+    'plots_on': True, # plot results (ignored, the GUI plots results itself)
+    'RAS_on': True, # create .eng thrust curve for use in OpenRocket or RASAero
+    'RAS_name': 'F_thrust_RASAERO.txt', # name of .eng file (don't include location!)
+    'print_on': True, # print out summary information
+    'progress_on': False # print progress of the integration
+}
+
+def performance_code(inputs, mode, test_data = None, options = None, stdout = sys.stdout):
+    ''' Run a simulation of the engine described by the inputs and mode dicts (see Integration). Summary information is printed to
+        stdout. Returns the record dict of results.
+    '''
+    options = dict(DEFAULT_OPTIONS, **(options or {}))
+    if not ('/' in options['RAS_name'] or '\\' in options['RAS_name']):
+        options['RAS_name'] = './Outputs/' + options['RAS_name'] # if no file location specified, put in Outputs
+    tspan = np.arange(0, options['t_final'] + options['dt']/2, options['dt'])
+
+    ## Calculate initial properties of the nitrous in the tank
+    N2O = n2o_properties(inputs['ox']['T_tank'])
+    Mox = N2O['rho_l']*inputs['ox']['V_l'] + N2O['rho_g']*(inputs['ox']['V_tank'] - inputs['ox']['V_l'])
+    if options['output_on'] or options['print_on']:
+        print('Initial oxidizer mass: %.2f kg' % Mox, file = stdout)
+
+    ## Create Injector Area Function
+    inputs = dict(inputs)
+    dt_valve_open = inputs['dt_valve_open']
+    inputs['Throttle'] = lambda t: min(t/dt_valve_open, 1.0) if dt_valve_open > 0 else 1.0
+
+    ## Run Integration Function
+    time, record = integration(inputs, mode, tspan, stdout if options['progress_on'] else None)
+    F_thrust = record['F_thrust']
+
+    impulse = trapz(time, F_thrust) # use trapezoidal integration
+    Mox = record['m_ox'][0] - record['m_ox'][-1]
+    Mfuel = record['m_fuel'][0] - record['m_fuel'][-1]
+    if options['output_on'] or options['print_on']:
+        Mox_initial = record['m_ox'][0]
+        Mfuel_initial = record['m_fuel'][0]
+        print('Pressurant Mass: %.3f kg' % record['m_press'], file = stdout)
+        print('Impulse: %.2f kN*s\t\t\nOxidizer Mass Spent: %.2f kg\t\tOxidizer Mass Remaining: %.2f kg\nFuel Mass Spent: %.2f kg\t\t'
+              'Fuel Mass Remaining: %.2f kg\n OF ratio: %.2f ' % (impulse/1000, Mox, Mox_initial - Mox, Mfuel, Mfuel_initial - Mfuel,
+              Mox/Mfuel), file = stdout)
+        print('Isp: %.1f s\t\tC*: %.0f m/s\t\tC_f: %.2f' % (record['Isp']/G_0, record['c_star'], record['c_f']), file = stdout)
+
+    if options['output_on'] or options['RAS_on']:
+        write_ras(options['RAS_name'], time, F_thrust, impulse, Mox + Mfuel)
+    return record
+
+def write_ras(filename, time, F_thrust, impulse, propellant_weight):
+    ''' Write the thrust curve to a RAS .eng file (for use in RASAero or OpenRocket). '''
+    # F_thrust_RASAERO must be less than or equal to 32 entries
+    num_entries = 30
+    motor_designation = 'I'
+    length_motorcase = 2438.4 # casing length in millimeters
+    delay = 'P' # always P for plugged (no ejection charge)
+    dry_weight = 11.94 # kg
+    diameter = 143 # motor casing diameter in millimeters
+    manufacturer = 'SSI'
+    if impulse < 10200:
+        motor_class = 'M'
+    elif impulse < 20500:
+        motor_class = 'N'
+    else:
+        motor_class = 'O'
+
+    engine_name = '%s%.0f-%s' % (motor_class, 100*round(impulse/100), motor_designation)
+    tot_weight = dry_weight + propellant_weight # kg
+
+    # sample points chosen as MATLAB's round(linspace(2, length(F_thrust), num_entries)), converted to 0-based indices
+    i_entries = np.floor(np.linspace(2, len(F_thrust), num_entries) + 0.5).astype(int) - 1
+    F_thrust_RASAERO = np.column_stack((time[i_entries], F_thrust[i_entries]))
+    F_thrust_RASAERO[-1, :] = [time[-1], 0]
+
+    with open(filename, 'w') as fid:
+        fid.write('; Name diameter(mm) Length(mm) delay propellant_weight(kg) mass(kg)\n')
+        fid.write('%s %d %.0f %s %.2f %.2f %s\n' % (engine_name, diameter, length_motorcase, delay, propellant_weight, tot_weight,
+                                                   manufacturer))
+        for t, F in F_thrust_RASAERO:
+            fid.write('%.3f %.3f\n' % (t, F))
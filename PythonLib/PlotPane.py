@@ -2,7 +2,14 @@
     PlotPane:
 
     This pane is a ttk.Notebook with a matplotlib plot on each page. SimPages plot() function is passed this object,
-    and can add tabs to the notebook to make additional figures.
+    and can add tabs to the notebook to make additional figures. Long lines are decimated to the width of their axes when
+    drawn, and re-decimated from the full data on zoom (see LevelOfDetail).
+
+    Plots are updated in place rather than rebuilt: between begin_update() and end_update(), add_page(), subplot() and line()
+    return the page, axes and line of the same title, subplot position and order as the last update, and only replace the data
+    of existing lines. end_update() removes whatever wasn't used and rescales the axes. Changed figures are only redrawn when
+    their tab is shown. A figure whose pages, axes, lines and limits are unchanged is refreshed by blitting its lines onto the
+    background saved when it was last drawn, so replotting (e.g. to show a run live) is fast.
 '''
 
 ## TODO: 
@@ -26,6 +33,8 @@ import mplcursors
 
 from .units import units
 from .ToolTip import ToolTip
+from .LevelOfDetail import decimate_figure, update_figure
+
 
 class PlotPane(ttk.Notebook):
     def __init__(self, parent, matlabeng):
@@ -36,6 +45,21 @@ class PlotPane(ttk.Notebook):
         self.canvases = []
         self.toolbars= []
         self.names = []
+        self.frames = []
+        self.lods = {} # LODLine of each decimated line
+
+        # Registry of the plots, for updating them in place (see begin_update())
+        self.axes = {} # (figure, subplot position) : axes
+        self.lines = {} # axes : lines, in the order they were plotted
+        self.cursors = {} # figure : mplcursors Cursor of its lines
+        self.backgrounds = {} # figure : (view, background without its lines), saved when last drawn in full
+        self.dirty = set() # figures changed since they were last drawn
+        self.restructured = set() # figures with pages, axes or lines added or removed since they were last drawn
+        self.updating = False
+        self._used = set() # figures and axes used in the current update
+        self._line_counts = {} # axes : lines given by line() in the current update
+
+        self.bind('<<NotebookTabChanged>>', lambda event: self.draw_dirty())
 
         ## Add a default frame that just contains a message describing what will be here eventually
         self.make_default()
@@ -48,30 +72,169 @@ class PlotPane(ttk.Notebook):
         self.select(index)
     
     def add_page(self, page_title):
-        ''' Make a new plotting page. Returns the figure.Figure() object on that page.'''
+        ''' Make a new plotting page. Returns the figure.Figure() object on that page. During an update, the page of the same title
+            is reused if there is one.'''
+        if self.updating:
+            for fig, name in zip(self.figs, self.names):
+                if name == page_title and fig not in self._used:
+                    self._used.add(fig)
+                    return fig
+
         frame = ttk.Frame(self) # make frame to hold canvas
+        self.frames.append(frame)
         self.figs.append(figure.Figure())
         self.names.append(page_title)
         self.canvases.append(FigureCanvasTkAgg(self.figs[-1], master = frame))
         self.canvases[-1].get_tk_widget().pack(expand=True, fill=tk.BOTH)
         self.toolbars.append( NavigationToolbar2Tk(self.canvases[-1], frame) )
         self.toolbars[-1].update()
+        on_key_press = lambda event, canvas=self.canvases[-1], tbar = self.toolbars[-1]: key_press_handler(event, canvas, tbar)
+        self.canvases[-1].mpl_connect("key_press_event", on_key_press)
+        self.canvases[-1].mpl_connect("resize_event", lambda event, fig = self.figs[-1]: update_figure(fig, self.lods))
         self.add(frame, text = page_title)
 
+        self._used.add(self.figs[-1])
+        self.dirty.add(self.figs[-1])
+        self.restructured.add(self.figs[-1])
         return self.figs[-1]
 
+    def subplot(self, fig, *args):
+        ''' Return the axes of fig at the subplot position args (as passed to fig.add_subplot()), reusing the axes at the same
+            position from the last update.
+        '''
+        key = (fig, tuple(arg.get_geometry() if hasattr(arg, 'get_geometry') else arg for arg in args)) # (gridspec slices)
+        ax = self.axes.get(key)
+        if ax is None or ax in self._used:
+            ax = fig.add_subplot(*args)
+            self.axes[key] = ax
+            self.lines[ax] = []
+            self.restructured.add(fig)
+        self._used.add(ax)
+        self._line_counts[ax] = 0
+        return ax
+
+    def line(self, ax, x, y, *args, **kwargs):
+        ''' Plot y against x on ax (as ax.plot()), replacing the data of the line plotted in the same order on ax in the last
+            update if there is one. Returns the Line2D.
+        '''
+        lines = self.lines.setdefault(ax, [])
+        n_line = self._line_counts.get(ax, 0)
+        self._line_counts[ax] = n_line + 1
+        if n_line < len(lines):
+            line = lines[n_line]
+            if line in self.lods:
+                self.lods[line].set_data(x, y) # re-decimated at the end of the update
+            else:
+                line.set_data(x, y)
+            if 'label' in kwargs:
+                line.set_label(kwargs['label'])
+        else:
+            line, = ax.plot(x, y, *args, **kwargs)
+            lines.append(line)
+            self.restructured.add(ax.figure)
+        self.dirty.add(ax.figure)
+        return line
+
+    def begin_update(self):
+        ''' Start updating the plots in place (see end_update()). '''
+        self.updating = True
+        self._used = set()
+        self._line_counts = {}
+
+    def end_update(self):
+        ''' Finish an update: remove the pages, axes and lines that weren't used, rescale the axes, and draw the shown page. '''
+        self.updating = False
+        for (fig, position), ax in list(self.axes.items()):
+            if fig in self._used and ax not in self._used:
+                fig.delaxes(ax)
+                self._forget_axes(ax)
+                self.restructured.add(fig)
+                self.dirty.add(fig)
+        for ax, lines in self.lines.items():
+            n_lines = self._line_counts.get(ax, 0)
+            for line in lines[n_lines:]:
+                self._forget_line(line)
+                line.remove()
+                self.restructured.add(ax.figure)
+            del lines[n_lines:]
+            if ax in self._used:
+                ax.relim()
+                ax.autoscale_view()
+        for fig in list(self.figs):
+            if fig not in self._used:
+                self.remove_page(self.figs.index(fig))
+        for fig in self.dirty:
+            decimate_figure(fig, self.lods) # draw long lines at the resolution of the screen
+            update_figure(fig, self.lods)
+        self.draw_dirty()
+
+    def _forget_line(self, line):
+        ''' Stop re-decimating a line that is being removed, so its axes' callbacks don't keep its data. '''
+        lod = self.lods.pop(line, None)
+        if lod is not None:
+            lod.disconnect()
+
+    def _forget_axes(self, ax):
+        ''' Remove axes from the registry. '''
+        for line in self.lines.pop(ax, []):
+            self._forget_line(line)
+        self.axes = {key: value for key, value in self.axes.items() if value is not ax}
+
+    def remove_page(self, index):
+        ''' Remove a plotting page and its figure. '''
+        fig = self.figs[index]
+        for ax in fig.axes:
+            self._forget_axes(ax)
+        self.forget(index)
+        self.frames.pop(index).destroy()
+        plt.close(fig)
+        for registry in (self.cursors, self.backgrounds):
+            registry.pop(fig, None)
+        self.dirty.discard(fig)
+        self.restructured.discard(fig)
+        for plots in (self.figs, self.canvases, self.toolbars, self.names):
+            plots.pop(index)
+
     def draw(self, canvas_index = None):
         ''' Draw the current (or indicated) canvas. '''
 
         if not canvas_index:
             canvas_index = self.current_tab
 
-        # self.canvases[canvas_index].draw()
-        ax = self.figs[canvas_index].axes
-        mplcursors.cursor(ax, hover=2) # set plots so that hovering over generates a pop-up annotation, but goes away when mouse leaves
-        on_key_press = lambda event, canvas=self.canvases[canvas_index], tbar = self.toolbars[canvas_index]: key_press_handler(event, canvas, tbar)
-        self.canvases[canvas_index].mpl_connect("key_press_event", on_key_press)
-    
+        fig = self.figs[canvas_index]
+        canvas = self.canvases[canvas_index]
+        if fig in self.restructured or fig not in self.cursors:
+            if fig in self.cursors:
+                self.cursors[fig].remove()
+            self.cursors[fig] = mplcursors.cursor(fig.axes, hover=2) # set plots so that hovering over generates a pop-up annotation, but goes away when mouse leaves
+
+        view = (canvas.get_width_height(), [(ax.get_xlim(), ax.get_ylim()) for ax in fig.axes])
+        if fig not in self.restructured and fig in self.backgrounds and self.backgrounds[fig][0] == view:
+            canvas.restore_region(self.backgrounds[fig][1]) # only the lines have changed, blit them onto the saved background
+            for ax in fig.axes:
+                for line in ax.get_lines():
+                    ax.draw_artist(line)
+        else:
+            lines = [line for ax in fig.axes for line in ax.get_lines()]
+            for line in lines:
+                line.set_animated(True) # leave the lines out of the background
+            canvas.draw()
+            self.backgrounds[fig] = (view, canvas.copy_from_bbox(fig.bbox))
+            for line in lines:
+                line.axes.draw_artist(line)
+                line.set_animated(False)
+        canvas.blit(fig.bbox)
+        self.dirty.discard(fig)
+        self.restructured.discard(fig)
+
+    def draw_dirty(self):
+        ''' Draw the shown canvas if it has changed since it was last drawn (other canvases are drawn when they are shown). '''
+        if not self.tabs():
+            return
+        index = self.index('current')
+        if index < len(self.figs) and self.figs[index] in self.dirty:
+            self.draw(index)
+
     def draw_all(self):
         ''' Draw all canvases. '''
         for i in self.tabs():
@@ -85,12 +248,19 @@ class PlotPane(ttk.Notebook):
     def clear_fig(self, fig_index = None):
         ''' Clear the current (or indicated) figure. '''
         if fig_index:
-            self.figs[fig_index].clear()
+            fig = self.figs[fig_index]
         else:
-            self.figs[self.current_tab].clear()
+            fig = self.figs[self.current_tab]
+        for ax in fig.axes:
+            self._forget_axes(ax)
+        fig.clear()
+        self.dirty.add(fig)
+        self.restructured.add(fig)
 
     def clear(self):
         ''' Clear all tabs and associated plots. '''
+        for lod in self.lods.values():
+            lod.disconnect()
         for i in self.tabs():
             i = self.index(i) # get index number
             plt.close(self.figs[i])
@@ -102,7 +272,14 @@ class PlotPane(ttk.Notebook):
         self.figs = []
         self.toolbars = []
         self.names = []
+        self.frames = []
+        self.lods = {}
+        self.axes = {}
+        self.lines = {}
+        self.cursors = {}
+        self.backgrounds = {}
+        self.dirty = set()
+        self.restructured = set()
 
     def save_plots(self):
         return (self.canvases, self.figs, self.toolbars, self.names)
-
@@ -0,0 +1,69 @@
+'''
+    Regression:
+
+    Compares the native Python backend against results saved from MATLAB by "Test Cases/SaveRegressionCase.m". The saved inputs, mode
+    and options are run through performance_code, and each recorded field is compared with the MATLAB record over the time span both
+    runs cover. Run from the PropSim folder with:
+
+        python -m PythonLib.Regression <case.mat> [<case.mat> ...]
+'''
+
+import sys
+import numpy as np
+import scipy.io
+
+from .PerformanceCode import performance_code
+from .FastInterp import interp1
+
+''' Record fields compared by default. '''
+COMPARE_FIELDS = ['F_thrust', 'p_cc', 'p_oxtank', 'p_fueltank', 'p_oxmanifold', 'T_oxtank', 'T_cc', 'm_lox', 'm_gox', 'm_fuel',
+                  'M_e', 'p_exit', 'impulse', 'OF', 'c_star', 'c_f', 'Isp']
+
+DEFAULT_RTOL = 0.02 # largest error allowed, relative to the largest magnitude of the field in the MATLAB record
+
+def load_case(filename):
+    ''' Load a regression case saved by SaveRegressionCase.m. Returns (inputs, mode, options, record). '''
+    case = scipy.io.loadmat(filename, simplify_cells = True)
+    return case['inputs'], case['mode'], case.get('options', {}), case['record']
+
+def compare_case(filename, fields = COMPARE_FIELDS, rtol = DEFAULT_RTOL, stdout = sys.stdout):
+    ''' Run a regression case with the native backend and compare it with the MATLAB record. Prints a line per field and returns a
+        dict of the relative error of each field (NaN where a field couldn't be compared).
+    '''
+    inputs, mode, options, matlab_record = load_case(filename)
+    options = dict(options, print_on = 0, RAS_on = 0, output_on = 0)
+    record = performance_code(inputs, mode, None, options, stdout = stdout)
+
+    # Compare time series where both runs have results (burn times may differ slightly)
+    t_matlab = np.atleast_1d(matlab_record['time'])
+    t_end = min(t_matlab[-1], record['time'][-1])
+    t_compare = t_matlab[t_matlab <= t_end]
+
+    errors = {}
+    print('Regression case: ' + filename, file = stdout)
+    print('Burn time: %.3f s (MATLAB: %.3f s)' % (record['time'][-1], t_matlab[-1]), file = stdout)
+    for field in fields:
+        if field not in record or field not in matlab_record:
+            errors[field] = np.nan
+            print('%-16s not in record' % field, file = stdout)
+            continue
+        expected = np.atleast_1d(np.asarray(matlab_record[field], dtype = float))
+        actual = np.atleast_1d(np.asarray(record[field], dtype = float))
+        if expected.size > 1: # time series
+            valid = t_matlab <= t_end
+            expected = expected[valid]
+            actual = interp1(record['time'], actual, t_compare)
+        scale = np.nanmax(np.abs(expected)) if np.any(np.isfinite(expected)) else np.nan
+        if scale == 0:
+            scale = 1.0
+        errors[field] = float(np.nanmax(np.abs(actual - expected))/scale) if np.any(np.isfinite(expected)) else np.nan
+        status = 'ok' if errors[field] <= rtol else ('--' if np.isnan(errors[field]) else 'FAIL')
+        print('%-16s max rel. error %.2e  %s' % (field, errors[field], status), file = stdout)
+    return errors
+
+if __name__ == '__main__':
+    failed = False
+    for filename in sys.argv[1:]:
+        errors = compare_case(filename)
+        failed = failed or any(err > DEFAULT_RTOL for err in errors.values())
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,159 @@
+'''
+    RunCache:
+
+    Stores the results of Python backend runs on disk, keyed by a hash of everything a run depends on: the built workspace (every
+    input in base units, the gas properties, the toggles and the loaded combustion tables), the contents of the files the page's
+    MATVars name, and the version of the model (the source of MODEL_MODULES, the N2O property model, see properties_hash(), and the
+    grid of the injector mass flux table, which can be chosen per session, see FindG.table_path()).
+    Running an input set that has already been run, e.g. after loading a workspace or toggling a section back, then loads the stored
+    result instead of simulating it again.
+
+    Each result is saved to CACHE_DIR as a <key>.npz file of the output record, along with the printed output of the run. Files are
+    written to a temporary name and renamed into place, so other processes never load a partly-written result. Loading a result
+    marks it as used, and once the stored results take up more than MAX_SIZE bytes the least recently used are removed.
+'''
+
+import os
+import glob
+import hashlib
+import numbers
+import tempfile
+import numpy as np
+
+from .FindG import CACHE_DIR as TABLE_CACHE_DIR, table_path
+from .N2OProperties import properties_hash
+
+CACHE_DIR = os.path.join(TABLE_CACHE_DIR, 'Runs') # folder of stored results
+MAX_SIZE = 256*2**20 # size the stored results may take up [bytes]
+MODEL_MODULES = ('PerformanceCode.py', 'Integration.py', 'N2OProperties.py', 'FindG.py', 'TwoPhaseN2OFlow.py', 'NozzleCalc.py',
+                 'FastInterp.py', 'VanDerWaals.py') # source of the model, part of every key
+PRINTSTR = '__printstr__' # name of the printed output in a stored result
+
+_source_version = None # hash of the source of the model, see code_version()
+_file_hashes = {} # (path, modification time, size) : hash of the file's contents
+
+def code_version():
+    ''' Return a hex digest identifying the version of the model: the source of MODEL_MODULES, the N2O property model and the
+        mass flux table in use (its cache folder is named after its grid, see FindG.table_path()).
+    '''
+    global _source_version
+    if _source_version is None:
+        digest = hashlib.sha1(properties_hash().encode())
+        for module in MODEL_MODULES:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), module), 'rb') as source:
+                digest.update(source.read())
+        _source_version = digest.hexdigest()
+    # (the table's grid is read each time, as FindG.GRID_SIZE and P_DOWN_SPACING may be changed before the table is first used)
+    return hashlib.sha1((_source_version + os.path.basename(table_path())).encode()).hexdigest()
+
+def file_hash(filename):
+    ''' Return a hex digest of the contents of a file, which is only read again once it changes. '''
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key not in _file_hashes:
+        with open(path, 'rb') as f:
+            _file_hashes[key] = hashlib.sha1(f.read()).hexdigest()
+    return _file_hashes[key]
+
+def _update(digest, value):
+    ''' Add a canonical encoding of value (nested dicts, lists, arrays, numbers and strings) to digest. Numbers are encoded by
+        value, so e.g. 1, 1.0 and numpy.float64(1.0) are the same, and dicts are encoded in key order.
+    '''
+    if isinstance(value, np.ndarray) and value.ndim == 0:
+        value = value.item()
+    if isinstance(value, dict):
+        digest.update(b'{')
+        for key in sorted(value):
+            digest.update(repr(key).encode() + b':')
+            _update(digest, value[key])
+        digest.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for item in value:
+            _update(digest, item)
+        digest.update(b']')
+    elif isinstance(value, np.ndarray):
+        digest.update(b'a' + value.dtype.str.encode() + repr(value.shape).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, numbers.Real) and not isinstance(value, (bool, np.bool_)):
+        digest.update(b'n' + repr(float(value)).encode())
+    else:
+        digest.update(type(value).__name__.encode() + repr(value).encode())
+
+def value_hash(value):
+    ''' Return a hex digest of a canonical encoding of value (see _update), e.g. of part of a workspace. '''
+    digest = hashlib.sha1()
+    _update(digest, value)
+    return digest.hexdigest()
+
+def run_key(workspace, files = ()):
+    ''' Return the key of a run of a native workspace: a hex digest of the workspace, the contents of files (e.g. the file names of
+        the page's MATVars, skipping those that don't exist) and the model version.
+    '''
+    digest = hashlib.sha1(code_version().encode())
+    _update(digest, workspace)
+    for filename in files:
+        if filename and os.path.isfile(filename):
+            digest.update(file_hash(filename).encode())
+    return digest.hexdigest()
+
+def result_path(key):
+    ''' Return the file a result is stored in. '''
+    return os.path.join(CACHE_DIR, key + '.npz')
+
+def load(key):
+    ''' Return the stored result of the run with key as (record, printed output), or None if it isn't stored. '''
+    path = result_path(key)
+    try:
+        with np.load(path) as stored:
+            record = {name: stored[name][()] if stored[name].ndim == 0 else stored[name] for name in stored.files}
+        os.utime(path) # mark as recently used
+    except (OSError, ValueError):
+        return None
+    return record, str(record.pop(PRINTSTR, ''))
+
+def store(key, record, printstr = ''):
+    ''' Store the result of the run with key: its output record (a dict of arrays and numbers) and printed output. Records that
+        aren't flat dicts of arrays and numbers aren't stored. Returns whether the result was stored.
+    '''
+    if not all(isinstance(value, (numbers.Number, np.ndarray)) for value in record.values()):
+        return False
+    os.makedirs(CACHE_DIR, exist_ok = True)
+    tmp_file, tmp_path = tempfile.mkstemp(prefix = '.tmp_', suffix = '.npz', dir = CACHE_DIR)
+    try:
+        with os.fdopen(tmp_file, 'wb') as f:
+            np.savez(f, **record, **{PRINTSTR: printstr})
+        os.replace(tmp_path, result_path(key))
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    evict()
+    return True
+
+def evict(max_size = MAX_SIZE):
+    ''' Remove the least recently used results until the stored results take up at most max_size bytes. Returns the number removed. '''
+    results = []
+    for path in glob.glob(os.path.join(CACHE_DIR, '*.npz')):
+        try:
+            stat = os.stat(path)
+            results.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            pass # removed by another process
+    size = sum(result[1] for result in results)
+    n_removed = 0
+    for mtime, result_size, path in sorted(results):
+        if size <= max_size:
+            break
+        try:
+            os.remove(path)
+            n_removed += 1
+        except OSError:
+            pass
+        size -= result_size
+    return n_removed
+
+def clear():
+    ''' Remove every stored result. '''
+    return evict(0)
@@ -0,0 +1,110 @@
+'''
+    RunOutput:
+
+    Output stream of a simulation run, passed as stdout (and stderr) to the MATLAB engine or the Python backend while the run
+    executes in the background. wait() polls the run, printing each complete line of output as it arrives (print() goes to the
+    PrintRedirector in the GUI), so long runs show their output as they go rather than when they finish.
+
+    Progress lines (Integration.m's ProgressFunction, or PROGRESS_FORMAT of the Python backend, printed when options.progress_on is
+    set) aren't printed, but update progress: the simulated time as a fraction of t_final.
+
+    cancel() stops the run: a MATLAB run is interrupted with the engine's FutureResult.cancel(), which leaves the engine running, and
+    a Python run raises RunCancelled the next time it writes to the stream (the integrator reports progress every PROGRESS_INTERVAL of
+    simulated time, so it stops promptly).
+'''
+
+import re
+import threading
+import time
+from io import StringIO
+from concurrent.futures import Future
+
+POLL_INTERVAL = 0.05 # time between checks for new output [s]
+PROGRESS_PATTERN = re.compile(r'Progress: t = (\S+) s of (\S+) s') # matches PROGRESS_FORMAT of Integration
+
+class RunCancelled(Exception):
+    ''' Raised when a run is cancelled. '''
+    pass
+
+class RunOutput(StringIO):
+    def __init__(self, raise_on_cancel = False):
+        ''' raise_on_cancel makes writes raise RunCancelled once the run is cancelled, which stops runs in this process. '''
+        super().__init__()
+        self.raise_on_cancel = raise_on_cancel
+        self.progress = 0.0 # fraction of t_final simulated so far
+        self.cancelled = False # whether cancel() has been called
+        self.future = None # future of the run, set by wait()
+        self._position = 0 # length of the output processed so far
+        self._lock = threading.Lock()
+
+    def write(self, msg):
+        if self.cancelled and self.raise_on_cancel:
+            raise RunCancelled()
+        with self._lock:
+            return super().write(msg)
+
+    def pump(self, final = False):
+        ''' Print the complete lines written since the last call and update progress. With final, an incomplete last line is
+            printed too. Returns whether progress changed.
+        '''
+        with self._lock:
+            text = self.getvalue()[self._position:]
+            if not final:
+                text = text[:text.rfind('\n') + 1] # leave an incomplete line for the next call
+            self._position += len(text)
+        changed = False
+        for line in text.splitlines():
+            match = PROGRESS_PATTERN.fullmatch(line.strip())
+            if match:
+                self.progress = min(float(match.group(1))/float(match.group(2)), 1.0)
+                changed = True
+            else:
+                print(line)
+        return changed
+
+    def wait(self, future, on_progress = None):
+        ''' Wait for the future of a run (a MATLAB FutureResult or a concurrent.futures Future) while streaming its output, and
+            return its result. on_progress(progress) is called whenever progress changes. Raises RunCancelled if the run was cancelled.
+        '''
+        self.future = future
+        if self.cancelled: # cancelled before the run started
+            self.cancel()
+        try:
+            while not future.done():
+                if self.pump() and on_progress:
+                    on_progress(self.progress)
+                time.sleep(POLL_INTERVAL)
+            if self.cancelled:
+                raise RunCancelled()
+            result = future.result()
+        except RunCancelled:
+            raise
+        except Exception:
+            if self.cancelled: # the MATLAB engine raises its own CancelledError
+                raise RunCancelled()
+            raise
+        finally:
+            self.pump(final = True)
+        self.progress = 1.0
+        if on_progress:
+            on_progress(self.progress)
+        return result
+
+    def cancel(self):
+        ''' Cancel the run. It stops promptly, and wait() raises RunCancelled. '''
+        self.cancelled = True
+        if self.future is not None and not self.future.done():
+            self.future.cancel()
+
+def run_in_thread(function, *args, **kwargs):
+    ''' Call function(*args, **kwargs) in a new thread, returning a concurrent.futures Future of its result. '''
+    future = Future()
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(function(*args, **kwargs))
+        except BaseException as err:
+            future.set_exception(err)
+    threading.Thread(target = target, name = 'run_native_thread', daemon = True).start()
+    return future
@@ -9,25 +9,40 @@
     methods:
 
     - build(matlabeng) : builds all InputVars using their build() func
+    - build_native(workspace) : builds all InputVars in a native workspace (dict of nested dicts) using their build_native() func
+    - mark_built() : marks the section and its InputVars as unmodified since the last build (see SimPage.update())
     - validate() : returns a list of error messages encountered while calling every InputVar's validate() function
-    - makewidget(parent) : initializes the Tk widget for the section, adding all InputVar objects in order
-'''
-import tkinter as tk
-import tkinter.ttk as ttk
+    - makewidget(parent) : initializes the Tk widget for the section (self.frame), adding all InputVar objects in order
+    - make_headless() : makes every InputVar store its value without a widget, to build workspaces without Tk
 
+    tkinter is only imported by makewidget(), so Sections can be used on machines without a display.
+'''
 from .ToggleVar import ToggleVar
 from .GasVar import GasVar
 
-class Section(ttk.Frame):
+class Section():
     def __init__(self, name, inputvars):
         self.name = name
         self.inputvars = inputvars
+        self.frame = None # ttk.Frame holding the section's widgets, initialized in makewidget()
         self.modified = True # tracks whether inputvars in this section have been modified since last build (initialy true, since no build has occured)
 
     def build(self, matlabeng):
         ''' Build all inputvars in the MATLAB workspace. '''
         for var in self.inputvars:
             var.build(matlabeng)
+        self.mark_built()
+
+    def build_native(self, workspace):
+        ''' Build all inputvars in a native workspace. '''
+        for var in self.inputvars:
+            var.build_native(workspace)
+        self.mark_built()
+
+    def mark_built(self):
+        ''' Mark the section and all its inputvars as built with their current values. '''
+        for var in self.inputvars:
+            var.modified = False
         self.modified = False # haven't been modified since last build!
     
     def validate(self):
@@ -41,28 +56,39 @@ class Section(ttk.Frame):
 
     def makewidget(self, parent):
         ''' Make tk widgets of input vars, and construct the section. '''
-        super().__init__(parent) # initialize self as ttk.Frame
+        import tkinter.ttk as ttk
+        self.frame = ttk.Frame(parent)
 
-        sec_lab = ttk.Label(self, text = self.name, style = 'SectionHeader.TLabel')
+        sec_lab = ttk.Label(self.frame, text = self.name, style = 'SectionHeader.TLabel')
         sec_lab.grid(row = 0, column = 0, sticky = 'nsew')
         i = 1
         for inputvar in self.inputvars:
-            subframe = ttk.Frame(self, borderwidth=5, relief = 'groove')
+            subframe = ttk.Frame(self.frame, borderwidth=5, relief = 'groove')
             subframe.grid(row=i,column=0,sticky='nsew',padx=(40,10),pady=(0,0))
             inputvar.makewidget(subframe) # initialize the widget of this inputvar, using the section frame as the parent
             lab = ttk.Label(subframe, text = inputvar.name+': \t')
             lab.grid(row = 0, column = 0, sticky = 'nsew')
             inputvar.maketooltip(lab) # connect a tooltip to the label to the left of the inputvar
-            inputvar.var.trace_add("write", lambda *a: self.make_modified()) # connect changes to the state of this variable to the make_modified function
+            inputvar.var.trace_add("write", lambda *a, inputvar = inputvar: self.make_modified(inputvar)) # connect changes to the state of this variable to the make_modified function
             inputvar.widget.grid(row = 0, column = 1, sticky = 'nsew')
             subframe.columnconfigure(0,weight=1)
             subframe.rowconfigure(0,weight=1)
             i = i + 1
+        self.update_linkedvars() # make sure that if a section is disabled by default, its widgets are disabled
+        self.frame.rowconfigure(i-1,weight=1)
+        self.frame.columnconfigure(0,weight=1)
+
+    def make_headless(self):
+        ''' Store the values of all inputvars without widgets (instead of makewidget()), starting from their defaults. '''
+        for inputvar in self.inputvars:
+            inputvar.make_headless()
+        self.update_linkedvars()
+
+    def update_linkedvars(self):
+        ''' Enable or disable the inputvars linked to each ToggleVar of the section to match its state. '''
         for inputvar in self.inputvars:
             if isinstance(inputvar, ToggleVar):
-                inputvar.toggle_linkedvars() # make sure that if a section is disabled by default, its widgets are disabled
-        self.rowconfigure(i-1,weight=1)
-        self.columnconfigure(0,weight=1)
+                inputvar.toggle_linkedvars()
 
     def load_from_workspace(self, matlabeng):
         ''' Load all inputvar values from MATLAB workspace. '''
@@ -78,11 +104,24 @@ class Section(ttk.Frame):
         matlabeng.eval("warning('on','all');",nargout=0)
         matlabeng.clear('temp', nargout=0)
 
+    def load_from_native(self, workspace):
+        ''' Load all inputvar values from a native workspace. '''
+        for inputvar in self.inputvars:
+            try:
+                val = workspace
+                for key in (inputvar.structname + '.' + inputvar.name).split('.'):
+                    val = val[key]
+                inputvar.put(val)
+            except:
+                print("Failed to load input " + inputvar.structname + '.'+ inputvar.name + " from workspace.")
+
     def restoredefaults(self):
         ''' Restore every inputvar in section to its default value. '''
         for var in self.inputvars:
             var.put(var.defaultval) # set all vars to their default value
         
-    def make_modified(self):
+    def make_modified(self, inputvar = None):
+        if inputvar is not None:
+            inputvar.modified = True # only this inputvar has to be built again
         self.modified = True # if an inputvar is modified, switch to True
         
\ No newline at end of file
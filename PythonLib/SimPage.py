@@ -5,21 +5,60 @@
     a derived class with no inputs of this type in a separate file. Import that file into MainWindow.py and add the object to the simPages list.
 
     NOTE: If you have Pressurant() objects or other MATLAB classdef objects, declare them in prebuild() and initialize those objects in the workspace
-    before the standard build() command is called.
+    before the standard build() command is called. Pages with a Python backend also pass them as matlab_objects (dotted path : MATLAB
+    constructor): their MATLAB workspaces are built in bulk (see MatlabWorkspace), from the native workspace of prebuild_native() and
+    the sections, pushed to the engine in one assignment, followed by postbuild().
+
+    Pages may also support the native Python backend by passing backends = ['MATLAB', 'Python'] and implementing prebuild_native(),
+    postbuild_native() and run_native(). The Python backend builds the inputs into self.workspace, a dict of nested dicts mirroring the
+    MATLAB structs, instead of the MATLAB workspace. The backend is selected with a dropdown next to the Run button.
+
+    MATLAB workspaces are built on an engine leased from the MainWindow's EnginePool, which the page keeps until another page needs it.
+    MATLAB runs don't block the rest of the application: other pages can build and run on other engines in the meantime, and running
+    a page again while its engine is busy builds and runs it on another engine.
+
+    run() starts the MATLAB function in the background (with background = True) and returns its future, and run_native() is called in
+    a background thread. Either way the output of the run is streamed to the print window as it arrives (see RunOutput), the progress
+    bar below the Run button shows the simulated time as a fraction of t_final, and Cancel stops every run of the page.
+
+    Each InputVar tracks whether it has been modified since the last build, and running after editing a few inputs only pushes those
+    into the built workspace (see update()), unless the state postbuild() derives from the inputs (e.g. the loaded comb_data) depends
+    on them.
+
+    The results of MATLAB runs stay in the engine's workspace, and self.ans is a MatlabResult that fetches each field as it's first
+    used (e.g. by plot()).
+
+    The results of Python runs are stored on disk (see RunCache), keyed by the built workspace and the contents of the page's files,
+    so running an input set that was already run shows its stored result straight away.
 ''' 
+import os
 import tkinter as tk
 import tkinter.ttk as ttk
 import tkinter.messagebox as msg
 import tkinter.filedialog as dialog
 import threading
-from io import StringIO
+import scipy.io
+
+from .RunOutput import RunOutput, RunCancelled, run_in_thread, PROGRESS_PATTERN
+from .MATVar import MATVar
+from . import RunCache
+from . import MatlabWorkspace
 
 class SimPage(ttk.Frame):
-    def __init__(self, name, sections, inputstructs):
+    def __init__(self, name, sections, inputstructs, backends = ['MATLAB'], matlab_objects = {}, derived_inputs = []):
         ''' Constructor used by derived classes, which will have no arguments passed into their constructor. '''
         self.name = name # name of the MATLAB function that should be run, also the title of the tab
         self.inputstructs = inputstructs # in-order list of variable names passed to the matlab engine
         self.sections = sections # list of Section objects, in order they should appear on the page
+        self.backends = backends # backends that can run this page ('MATLAB' and/or 'Python')
+        self.matlab_objects = matlab_objects # classdef objects made in prebuild(), as dotted path : MATLAB constructor
+        self.derived_inputs = derived_inputs # inputvars the state derived by postbuild() depends on (e.g. the loaded comb_data)
+        self.built_files = None # state of the input files when the workspace was built (see file_state())
+
+        self.backend = None # Tk variable storing the selected backend, initialized in makewidget()
+        self.built_backend = None # backend the current workspace was built for
+        self.workspace = {} # native workspace used by the Python backend (dict of input structs)
+        self.run_key = None # key of the built Python workspace's result in the RunCache
 
         self.savefilename = None # variable storing the savefilename for this MATLAB workspace
         self.saved = False # determines whether the solution has been saved since last run
@@ -28,10 +67,15 @@ class SimPage(ttk.Frame):
 
         self.run_button = None # button at bottom of page that starts simulation run, initialized in makewidget()
         self.validate_button = None # button at bottom of page that validates input without running, initialized in makewidget()
+        self.cancel_button = None # button at bottom of page that cancels runs in progress, initialized in makewidget()
+        self.progressbar = None # progress of the latest run, initialized in makewidget()
+        self.runs = [] # RunOutput of each run in progress
         self.canvas = None # canvas for scrolling
         self.scrollbar = None # scrollbar
 
-        self.matlabeng = None # matlab engine
+        self.engine_pool = None # EnginePool of MATLAB engines (None if MATLAB isn't available)
+        self.pooled_engine = None # PooledEngine the MATLAB workspace is built on
+        self.matlabeng = None # matlab engine of pooled_engine
         self.inputPane = None # input pane that holds all the simPages (parent of this object in tkinter)
 
     def prebuild(self, matlabeng):
@@ -48,14 +92,78 @@ class SimPage(ttk.Frame):
 
     def run(self, stdout):
         ''' Virtual function - derived classes will have this method called when the user presses Run on that page. 
-            Here, the sim page should build a workspace of variables, then call their own simfunction. '''
+            Here, the sim page should build a workspace of variables, then call their own simfunction in the background
+            (matlabeng.eval(..., background = True) with stdout and stderr = stdout), returning the future of the call. '''
         raise NotImplementedError()
 
+    def postrun(self):
+        ''' Called after a successful run, once the solution is in self.ans. Does nothing unless overridden. '''
+        pass
+
     def plot(self, plotpane):
         ''' Virtual function - derived classes will have this method called after a run and whenever the user wants to update
             plots. This function should manually build important plots from the data in self.ans. '''
         raise NotImplementedError() 
 
+    def prebuild_native(self, workspace):
+        ''' Python backend version of prebuild(), must be implemented by inheritors that support the Python backend. '''
+        raise NotImplementedError()
+
+    def postbuild_native(self, workspace):
+        ''' Python backend version of postbuild(), must be implemented by inheritors that support the Python backend. '''
+        raise NotImplementedError()
+
+    def run_native(self, stdout):
+        ''' Python backend version of run(), must be implemented by inheritors that support the Python backend. Runs the simulation
+            on self.workspace and returns the solution (a dict of results).
+        '''
+        raise NotImplementedError()
+
+    def get_backend(self):
+        ''' Return the selected backend ('MATLAB' or 'Python'). '''
+        if self.engine_pool is None and 'Python' in self.backends:
+            return 'Python' # no MATLAB engine to run with
+        if self.backend is None:
+            return self.backends[0]
+        return self.backend.get()
+
+    def get_input(self, structname, name):
+        ''' Return the value of an input variable from the workspace of the current backend. '''
+        if self.built_backend == 'Python':
+            return self.workspace[structname][name]
+        return self.matlabeng.workspace[structname][name]
+
+    def load_test_file(self, filename):
+        ''' Load the variables of a test data .MAT file, returning a dict of variable names to values. '''
+        if self.built_backend == 'Python':
+            return scipy.io.loadmat(filename, squeeze_me = True)
+        self.matlabeng.load(filename, nargout = 0) # load variables from testfile
+        return self.matlabeng.workspace
+
+    def lease_engine(self):
+        ''' Acquire an engine from the pool for this page's MATLAB workspace, making it self.matlabeng, and return it (a PooledEngine,
+            to be released with self.engine_pool.release()). Prints a message and returns None if every engine is busy.
+        '''
+        pooled = self.engine_pool.acquire(owner = self, wait = False)
+        if pooled is None:
+            print('All MATLAB engines are busy or still starting. Please try again when a run finishes.')
+            return None
+        self.pooled_engine = pooled
+        self.matlabeng = pooled.engine
+        return pooled
+
+    def has_engine(self):
+        ''' Return whether this page's MATLAB workspace is still on an idle engine (it is lost if another page took the engine over). '''
+        return self.pooled_engine is not None and self.pooled_engine.owner is self and not self.pooled_engine.busy
+
+    def engine_lost(self, pooled):
+        ''' Called by the EnginePool when an engine of this page (pooled, a PooledEngine) is freed or taken over by another page, and
+            its workspace may be cleared: fetches the rest of the solution if it is on that engine (see MatlabWorkspace.MatlabResult),
+            so it can still be plotted.
+        '''
+        if isinstance(self.ans, MatlabWorkspace.MatlabResult) and self.ans.matlabeng is pooled.engine:
+            self.ans.detach()
+
     def build(self):
         ''' Function called on "Validate & Build" button press - validates, then prompts for save if ans has been generated.
             If validation successful, calls build() function, doing inheritor-specific things, then builds all inputvars.
@@ -63,22 +171,92 @@ class SimPage(ttk.Frame):
         if not self.validate():
             return # don't try to build if validation fails
 
-        print('Validation successful, building MATLAB workspace...')
+        backend = self.get_backend()
+        if backend == 'MATLAB':
+            pooled = self.lease_engine()
+            if pooled is None:
+                return
+            try:
+                self._build(backend)
+            finally:
+                self.engine_pool.release(pooled)
+        else:
+            self._build(backend)
 
+    def clear_solution(self):
+        ''' Forget the solution of the current workspace, prompting for saving it first if it hasn't been saved. '''
         if self.ans and not self.saved: # if a solution exists and hasn't been saved, prompt for saving before overwriting the associated workspace
             self.promptforsave()
 
-        self.matlabeng.clearvars(nargout=0) # clear workspace
         self.ans = None # ans has been cleared in the workspace, no solution exists for the current workspace
         self.saved = False # the solution hasn't been saved because it doesn't exist yet
-        self.prebuild(self.matlabeng) # call inheritor's version of "prebuild"
 
-        for section in self.sections:
-            section.build(self.matlabeng) # build every inputvar inside of every section
+    def _build(self, backend):
+        ''' Build the workspace of the backend (on self.matlabeng for MATLAB). '''
+        if backend == 'Python':
+            print('Validation successful, building Python workspace...')
+        else:
+            print('Validation successful, building MATLAB workspace...')
 
-        self.postbuild(self.matlabeng) # call inheritor's version of "postbuild"
+        self.clear_solution()
+        if backend == 'Python':
+            self.workspace = {} # clear workspace
+            self.prebuild_native(self.workspace) # call inheritor's version of "prebuild_native"
+            for section in self.sections:
+                section.build_native(self.workspace) # build every inputvar inside of every section
+            self.postbuild_native(self.workspace) # call inheritor's version of "postbuild_native"
+            self.run_key = RunCache.run_key(self.workspace, self.input_files())
+        elif 'Python' in self.backends: # native inputs can be pushed in bulk
+            MatlabWorkspace.build_workspace(self.matlabeng, self.sections, self.prebuild_native, self.postbuild, self.matlab_objects)
+        else:
+            self.matlabeng.clearvars(nargout=0) # clear workspace
+            self.prebuild(self.matlabeng) # call inheritor's version of "prebuild"
+
+            for section in self.sections:
+                section.build(self.matlabeng) # build every inputvar inside of every section
+
+            self.postbuild(self.matlabeng) # call inheritor's version of "postbuild"
+        self.built_backend = backend
+        self.built_files = self.file_state()
         print("Build complete. Ready to run. ")
 
+    def update(self):
+        ''' Push only the inputvars modified since the last build into the built workspace (in one eval for MATLAB, see
+            MatlabWorkspace.update_workspace()) rather than rebuilding it. Rebuilds everything instead if the state derived by
+            postbuild() depends on a modified inputvar (self.derived_inputs) or on an input file that has changed since. Returns whether
+            the workspace is up to date.
+        '''
+        modified = [inputvar for section in self.sections for inputvar in section.inputvars if inputvar.modified]
+        if any(inputvar in self.derived_inputs for inputvar in modified) or self.file_state() != self.built_files:
+            self.build()
+            return not any(section.modified for section in self.sections)
+        if not self.validate():
+            return False
+
+        pooled = None
+        if self.built_backend == 'MATLAB':
+            pooled = self.engine_pool.acquire(owner = self, pooled = self.pooled_engine, wait = False)
+            if pooled is None:
+                print('The MATLAB engine of this page is busy. Please try again when the run finishes.')
+                return False
+        try:
+            print('Validation successful, updating ' + ', '.join(MatlabWorkspace.input_path(inputvar) for inputvar in modified) + '...')
+            self.clear_solution()
+            if self.built_backend == 'Python':
+                for inputvar in modified:
+                    inputvar.build_native(self.workspace)
+                self.run_key = RunCache.run_key(self.workspace, self.input_files())
+            else:
+                objects = dict(self.matlab_objects, **MatlabWorkspace.object_paths(self.sections))
+                MatlabWorkspace.update_workspace(self.matlabeng, modified, objects)
+        finally:
+            if pooled is not None:
+                self.engine_pool.release(pooled)
+        for section in self.sections:
+            section.mark_built()
+        print("Update complete. Ready to run. ")
+        return True
+
     def validate(self):
         ''' Validates each section on the page. '''
         err_list = []
@@ -99,63 +277,149 @@ class SimPage(ttk.Frame):
 
     def _run(self):
         ''' Wrapper for above run() function to allow standard printout before running. '''
-        for section in self.sections: # if any section has been modified since last build, re-build
-            if section.modified:
-                self.build()
-                break # once you've built once, break
-
-        print("Starting MATLAB run. Please do not switch tabs or close.", flush=True)
+        if self.built_backend != self.get_backend(): # if the backend has changed since last build, re-build
+            self.build()
+        else:
+            if self.built_backend == 'MATLAB' and not self.has_engine():
+                self.build() # the engine is running or was taken over by another page, so build on a free engine
+            elif self.built_backend == 'Python' and self.run_key is None:
+                self.build() # the workspace was loaded rather than built
+            elif any(section.modified for section in self.sections): # push the inputvars modified since last build
+                if not self.update():
+                    return # validation failed or the engine is busy, nothing to run
+        if self.built_backend != self.get_backend():
+            return # build failed, nothing to run
+        if self.built_backend == 'Python' and self.load_stored_run():
+            return # already run
+
+        pooled = None
+        if self.built_backend == 'MATLAB':
+            pooled = self.engine_pool.acquire(owner = self, pooled = self.pooled_engine, wait = False)
+            if pooled is None:
+                print('The MATLAB engine of this page is busy. Please try again when the run finishes.')
+                return # build failed (all engines busy), nothing to run
+            print("Starting MATLAB run on engine %d." % pooled.index, flush=True)
+        else:
+            print("Starting " + self.built_backend + " run. Please do not switch tabs or close.", flush=True)
         print('>> ' + self.name, flush =True)
-        run_thread = threading.Thread(target = self._thread_run, name='run_thread')
+        run_thread = threading.Thread(target = self._thread_run, args = (pooled,), name='run_thread')
         run_thread.start()
     
-    def _thread_run(self):
-        ''' Function for running in separate thread. '''
-        output = StringIO() # use a stringIO object to collect MATLAB output
-        # io_thread = threading.Thread(name='io_thread',target=self.io_handle,args=(output,))
-        # io_thread.start()
+    def _thread_run(self, pooled = None):
+        ''' Function for running in separate thread. pooled is the acquired engine of a MATLAB run, which is released at the end. '''
+        output = RunOutput(raise_on_cancel = pooled is None) # collects the output of the run, which is printed as it arrives
+        run_key = self.run_key
+        self.runs.append(output)
+        self.cancel_button['state'] = 'normal'
+        self.show_progress(output, 0.0)
         try:
-            self.validate_button['state'] = 'disabled'
-            self.run_button['state'] = 'disabled'
-            self.inputPane.disable_tabs()
-            self.run(output)
-            self.matlabeng.workspace['output'] = self.matlabeng.workspace['ans']  
-            self.ans = self.matlabeng.workspace['output'] # collect answer struct
-            self.inputPane.plot_sim()
+            if pooled is None: # Python runs hold up the application, MATLAB runs happen on their own engine
+                self.validate_button['state'] = 'disabled'
+                self.run_button['state'] = 'disabled'
+                self.inputPane.disable_tabs()
+            if self.built_backend == 'Python':
+                self.ans = output.wait(run_in_thread(self.run_native, output), lambda progress: self.show_progress(output, progress))
+                self.store_run(run_key, output)
+            else:
+                matlabeng = pooled.engine # (self.matlabeng changes if the page is built on another engine during the run)
+                output.wait(self.run(output), lambda progress: self.show_progress(output, progress))
+                matlabeng.eval('output = ans ;', nargout = 0)
+                self.ans = MatlabWorkspace.MatlabResult(matlabeng, 'output') # answer struct, fetched field by field as it's used
+            if self.inputPane.get_simpage() is self: # other pages are plotted when the user switches to them
+                self.inputPane.plot_sim()
             self.saved = False # the new answer has not been saved yet!
-        finally:
-            print(output.getvalue()) # print stringIO stuff
+            self.postrun()
             print()
-            output.close()    
-            # io_thread.join()
-            self.validate_button['state'] = 'normal'
-            self.run_button['state'] = 'normal'
-            self.inputPane.enable_tabs()
-        
-        print("Run complete.")
-    
-    def io_handle(self,output):
-        ''' Subthread of _thread_run that handles the StringIO object 'output' while matlab thread executes. '''
-        while not output.closed:
-            mystr = output.getvalue()
-            if mystr:
-                output.truncate(0)
-                output.seek(0)
-                print(mystr)
+            print("Run complete.")
+        except RunCancelled:
+            print()
+            print("Run cancelled.")
+        finally:
+            output.close()
+            self.runs.remove(output)
+            if not self.runs:
+                self.cancel_button['state'] = 'disabled'
+            if pooled is None:
+                self.validate_button['state'] = 'normal'
+                self.run_button['state'] = 'normal'
+                self.inputPane.enable_tabs()
+            else:
+                self.engine_pool.release(pooled)
+                print(self.engine_pool.report())
+
+    def input_files(self):
+        ''' Return the names of the files the enabled MATVars of the page refer to. '''
+        return [inputvar.get() for section in self.sections for inputvar in section.inputvars
+                if isinstance(inputvar, MATVar) and not inputvar.is_disabled()]
+
+    def file_state(self):
+        ''' Return the modification time and size of each existing input file (see input_files()), to tell whether the files have
+            changed since the workspace was built.
+        '''
+        state = {}
+        for filename in self.input_files():
+            if filename and os.path.isfile(filename):
+                stat = os.stat(filename)
+                state[os.path.abspath(filename)] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def load_stored_run(self):
+        ''' Show the stored result of the built Python workspace (see RunCache) if it has been run before, instead of running it.
+            Returns whether there was a stored result.
+        '''
+        stored = RunCache.load(self.run_key) if self.run_key is not None else None
+        if stored is None:
+            return False
+        self.ans, printstr = stored
+        print('>> ' + self.name, flush = True)
+        print(printstr, end = '')
+        print()
+        print("Run complete (stored result of an identical run).")
+        self.saved = False # the answer has not been saved from this workspace yet
+        self.inputPane.plot_sim()
+        self.postrun()
+        return True
+
+    def store_run(self, run_key, output):
+        ''' Store the result of a Python run (self.ans) and its printed output (the RunOutput of the run) in the RunCache. '''
+        if run_key is None:
+            return # the run wasn't of a built workspace
+        printstr = ''.join(line for line in output.getvalue().splitlines(True) if not PROGRESS_PATTERN.fullmatch(line.strip()))
+        try:
+            RunCache.store(run_key, self.ans, printstr)
+        except OSError as err:
+            print('Could not store the result of the run: ' + str(err))
+
+    def show_progress(self, output, progress):
+        ''' Show the progress of a run (its RunOutput) in the progress bar, if it's the latest run of the page. '''
+        if self.runs and self.runs[-1] is output:
+            self.progressbar['value'] = 100*progress
+
+    def cancel(self):
+        ''' Cancel every run of this page in progress. '''
+        if self.runs:
+            print('Cancelling ' + self.name + '...', flush = True)
+        for output in list(self.runs):
+            output.cancel()
 
     def _plot(self, plotpane):
-        ''' Wrapper for plot() function that checks to make sure a solution exists first. '''
-        plotpane.clear() # clear old plots
+        ''' Wrapper for plot() function that checks to make sure a solution exists first. The plots of the last call are updated in
+            place (see PlotPane.begin_update()).
+        '''
         if self.ans: 
+            plotpane.begin_update()
             self.plot(plotpane) # call plot function
-            plotpane.draw_all() # draw
+            plotpane.end_update() # remove unused plots and draw
         else:
+            plotpane.clear() # clear old plots
             plotpane.make_default()
         
 
-    def makewidget(self, parent, matlabeng):
-        ''' Uses the ttk.Frame constructor to initialize the frame, then builds and adds each section plus the Validate and Run buttons. '''
-        self.matlabeng = matlabeng
+    def makewidget(self, parent, engine_pool):
+        ''' Uses the ttk.Frame constructor to initialize the frame, then builds and adds each section plus the Validate and Run buttons.
+            engine_pool is the EnginePool MATLAB workspaces are built on (None if MATLAB isn't available).
+        '''
+        self.engine_pool = engine_pool
         self.inputPane = parent
         super().__init__(parent) # use super constructor
         # create a vertical scrollbar
@@ -205,12 +469,20 @@ class SimPage(ttk.Frame):
         i = 0
         for section in self.sections:
             section.makewidget(interior) # build each section's frame widget (and constituent children)
-            section.grid(row = i, column = 0, columnspan = 6, sticky = 'nsew') # grid into SimPage
+            section.frame.grid(row = i, column = 0, columnspan = 6, sticky = 'nsew') # grid into SimPage
             i += 1 
+        if len(self.backends) > 1: # allow the user to choose between backends
+            self.backend = tk.StringVar(self, self.get_backend())
+            backend_menu = ttk.OptionMenu(self, self.backend, self.get_backend(), *self.backends)
+            backend_menu.grid(row = 1, column = 0, sticky = 'nse')
         self.run_button = ttk.Button(self, text = 'Run', command = self._run )
         self.validate_button = ttk.Button(self, text = 'Validate & Build Workspace', command = self.build )
         self.run_button.grid(row = 1, column = 2, sticky='nsew')
         self.validate_button.grid(row=1, column = 1, sticky = 'nsew')
+        self.progressbar = ttk.Progressbar(self, orient = tk.HORIZONTAL, mode = 'determinate', maximum = 100)
+        self.cancel_button = ttk.Button(self, text = 'Cancel', command = self.cancel, state = 'disabled')
+        self.progressbar.grid(row = 2, column = 0, columnspan = 2, sticky = 'nsew')
+        self.cancel_button.grid(row = 2, column = 2, sticky = 'nsew')
         self.columnconfigure(0, weight = 1)
         interior.columnconfigure(0, weight=1)
 
@@ -234,6 +506,17 @@ class SimPage(ttk.Frame):
     def saveworkspace(self):
         ''' Saves the workspace to savefilename - if hasn't been defined yet, prompts user to select a file. '''
         if self.savefilename:
+            if self.built_backend == 'Python':
+                # Save the native workspace, solution and printout in the same layout as the MATLAB workspace
+                myworkspace = dict(self.workspace, printstr = self.inputPane.get_print_contents())
+                if self.ans is not None:
+                    myworkspace['output'] = self.ans
+                scipy.io.savemat(self.savefilename, myworkspace)
+                self.saved = True
+                return
+            if self.pooled_engine is None or self.pooled_engine.owner is not self:
+                print('The MATLAB workspace of this page was reused by another page. Please run again before saving.')
+                return
             # Get text from the printredirector and add it to the workspace
             self.matlabeng.workspace['printstr'] = self.inputPane.get_print_contents()
             # Use MATLAB eng to save workspace
@@ -265,17 +548,48 @@ class SimPage(ttk.Frame):
                 if not msg.askyesno(title = "Confirm selection...",message = "This .MAT file does not contain the name of this simulation page (" + self.name + '). \n Do you wish to continue?'):
                     return
 
-            self.matlabeng.eval("load('"+filepicked+"');", nargout = 0) # load the workspace
-            if self.matlabeng.exist('output', 'var') == 1: # if a solution exists in the loaded workspace
-                newans = self.matlabeng.workspace['output']
-                if self.ans is None or self.ans != newans: # if there wasn't a solution before or if solution is not what already was
-                    self.ans = newans # load new solution
-                    self.saved = False # loading a solution counts as a run
-                    self.inputPane.plot_sim() # plot the solution
+            if self.get_backend() == 'Python':
+                self.loadworkspace_native(filepicked)
+                return
+            pooled = self.lease_engine()
+            if pooled is None:
+                return
+            try:
+                self.loadworkspace_matlab(filepicked)
+            finally:
+                self.engine_pool.release(pooled)
+
+    def loadworkspace_matlab(self, filepicked):
+        ''' Load a .MAT workspace into the MATLAB workspace of self.matlabeng, updating all sections' inputvars to reflect it. '''
+        self.matlabeng.eval("load('"+filepicked+"');", nargout = 0) # load the workspace
+        self.built_files = None # the loaded workspace wasn't built from the current input files, so the next update() rebuilds it
+        if self.matlabeng.exist('output', 'var') == 1: # if a solution exists in the loaded workspace
+            self.ans = MatlabWorkspace.MatlabResult(self.matlabeng, 'output') # load new solution
+            self.saved = False # loading a solution counts as a run
+            self.inputPane.plot_sim() # plot the solution
 
-            for section in self.sections:
-                section.load_from_workspace(self.matlabeng) # update all inputvars to match MAT file
-            
-            if self.matlabeng.exist('printstr','var') == 1: # if command line str was saved in this MAT file, load it
-                print('clc') # clear command line 
-                print(self.matlabeng.workspace['printstr']) # print the saved contents
\ No newline at end of file
+        for section in self.sections:
+            section.load_from_workspace(self.matlabeng) # update all inputvars to match MAT file
+        
+        if self.matlabeng.exist('printstr','var') == 1: # if command line str was saved in this MAT file, load it
+            print('clc') # clear command line 
+            print(self.matlabeng.workspace['printstr']) # print the saved contents
+
+    def loadworkspace_native(self, filepicked):
+        ''' Load a .MAT workspace into the native workspace, updating all sections' inputvars to reflect it. '''
+        myworkspace = scipy.io.loadmat(filepicked, simplify_cells = True)
+        if 'output' in myworkspace: # if a solution exists in the loaded workspace
+            self.ans = myworkspace.pop('output') # load new solution
+            self.saved = False # loading a solution counts as a run
+            self.built_backend = 'Python'
+            self.workspace = {name: myworkspace[name] for name in self.inputstructs if name in myworkspace}
+            self.run_key = None # the loaded workspace wasn't built here, so the next run rebuilds it rather than reuse a key
+            self.built_files = None
+            self.inputPane.plot_sim() # plot the solution
+
+        for section in self.sections:
+            section.load_from_native(myworkspace) # update all inputvars to match MAT file
+
+        if 'printstr' in myworkspace: # if command line str was saved in this MAT file, load it
+            print('clc') # clear command line 
+            print(myworkspace['printstr']) # print the saved contents
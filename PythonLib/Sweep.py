@@ -0,0 +1,181 @@
+'''
+    Sweep:
+
+    Runs trade studies with the native Python backend. A base workspace (the inputs, mode, test_data and options structs, as built
+    by SimulateLiquid or SimulateHybrid and saved with "Save Workspace") is run once per case, where each case overrides some of its
+    fields. Fields are named by their dotted path, as in the MATLAB structs (e.g. 'inputs.ox.V_l', 'inputs.ox_pressurant.set_pressure'),
+    and take values in base (SI) units. Cases come from a Cartesian grid or a Latin hypercube sample over the fields.
+
+    The cases are spread over a pool of worker processes (see WorkerPool), and the summary of each run (SUMMARY_FIELDS) is collected into a columnar
+    results table, a dict of one array per field. Results may also be streamed to a .csv file as each run finishes. From the PropSim
+    folder:
+
+        python -m PythonLib.Sweep SimulateLiquid_workspace.mat --grid inputs.ox.V_l=3e-3:5e-3:5 --grid inputs.d_throat=0.022,0.024
+            --output "Outputs/trade_study.csv"
+        python -m PythonLib.Sweep SimulateLiquid_workspace.mat --lhs 200 --range inputs.ox.V_l=3e-3:5e-3 --output lhs.csv
+
+    Grid values are either a comma-separated list or start:stop:count (equally spaced, including both ends).
+'''
+
+import io
+import csv
+import argparse
+import itertools
+import warnings
+import numpy as np
+import scipy.io
+
+from .PerformanceCode import performance_code
+from .Integration import load_comb_data, G_0
+from .WorkerPool import parallel_map
+
+INPUT_STRUCTS = ('inputs', 'mode', 'test_data', 'options') # structs of a workspace passed to performance_code
+SUMMARY_FIELDS = ('impulse', 'Isp', 'OF', 'burn_time', 'max_p_cc') # [N*s, s, -, s, Pa]
+RUN_OPTIONS = {'print_on': 0, 'RAS_on': 0, 'output_on': 0, 'plots_on': 0} # options forced for sweep runs
+
+def load_workspace(filename, structs = INPUT_STRUCTS, inputs = 'inputs'):
+    ''' Load the input structs of a workspace saved by a SimPage with the Python backend (or SaveRegressionCase.m) as nested dicts.
+        structs are the names of the structs to load (e.g. DesignLiquid's INPUT_STRUCTS), and the combustion data is loaded from
+        the CombustionData of the inputs struct if it isn't saved with the workspace.
+    '''
+    saved = scipy.io.loadmat(filename, simplify_cells = True)
+    workspace = {name: saved[name] for name in structs if name in saved}
+    if workspace.get('mode', {}).get('combustion_on', 1) and 'comb_data' not in workspace[inputs]:
+        workspace = apply_case(workspace, {inputs + '.comb_data': load_comb_data(workspace[inputs]['CombustionData'])})
+    return workspace
+
+def get_field(workspace, field):
+    ''' Return the value of a field of nested dicts, by its dotted path (e.g. 'inputs.ox.V_l'). '''
+    for key in field.split('.'):
+        workspace = workspace[key]
+    return workspace
+
+def apply_case(workspace, case):
+    ''' Return a copy of a workspace with the field values of case (a dict keyed by dotted path, e.g. 'inputs.ox.V_l') applied.
+        Only the structs along the paths of the fields are copied, the rest (e.g. the combustion data) is shared with the base.
+    '''
+    workspace = dict(workspace)
+    for field, value in case.items():
+        path = field.split('.')
+        struct = workspace
+        for key in path[:-1]:
+            struct[key] = dict(struct.get(key, {})) # copy on write
+            struct = struct[key]
+        struct[path[-1]] = value
+    return workspace
+
+def cartesian_grid(values):
+    ''' Return the cases of a Cartesian grid: values is a dict of the values of each field, and each case is a dict of field values,
+        with the last field varying fastest.
+    '''
+    fields = list(values)
+    return [dict(zip(fields, case)) for case in itertools.product(*(values[field] for field in fields))]
+
+def latin_hypercube(ranges, n, seed = None):
+    ''' Return n cases sampled from a Latin hypercube: ranges is a dict of the (low, high) range of each field. Each field's range
+        is split into n equal intervals, and every interval is sampled exactly once.
+    '''
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for field, (low, high) in ranges.items():
+        u = (rng.permutation(n) + rng.random(n))/n # one point in each interval, in random order
+        samples[field] = low + (high - low)*u
+    return [{field: float(samples[field][ii]) for field in ranges} for ii in range(n)]
+
+def run_case(workspace, case):
+    ''' Run the base workspace with the field values of case applied. Returns a dict of SUMMARY_FIELDS (NaN if the run failed),
+        along with 'message': the error or last warning of the run ('' if there were none).
+    '''
+    workspace = apply_case(workspace, case)
+    options = dict(workspace.get('options', {}), **RUN_OPTIONS)
+    with warnings.catch_warnings(record = True) as caught:
+        warnings.simplefilter('always')
+        try:
+            record = performance_code(workspace['inputs'], workspace['mode'], None, options, stdout = io.StringIO())
+            summary = summarize(record)
+            summary['message'] = str(caught[-1].message) if caught else ''
+        except Exception as err: # a failed case shouldn't stop the sweep
+            summary = dict.fromkeys(SUMMARY_FIELDS, np.nan)
+            summary['message'] = '%s: %s' % (type(err).__name__, err)
+    return summary
+
+def summarize(record):
+    ''' Summarize the record of a run. '''
+    return {'impulse': float(record['impulse']), 'Isp': float(record['Isp'])/G_0, 'OF': float(record['OF']),
+            'burn_time': float(record['time'][-1]), 'max_p_cc': float(np.max(record['p_cc']))}
+
+def sweep(workspace, cases, processes = None, filename = None, stdout = None):
+    ''' Run the base workspace once per case (a list of dicts of field values, see cartesian_grid and latin_hypercube) on a pool of
+        processes worker processes (None for one per core). Returns the columnar results table: a dict with an array of the values
+        of each case field and of each of SUMMARY_FIELDS, and a list of the 'message' of each run, all in the order of cases.
+        If filename is given, a row is appended to that .csv file as each run finishes (in the order they finish). Progress is
+        printed to stdout.
+    '''
+    fields = list(dict.fromkeys(field for case in cases for field in case)) # in order of first appearance
+    table = {field: np.full(len(cases), np.nan) for field in fields + list(SUMMARY_FIELDS)}
+    table['message'] = [''] * len(cases)
+    if not cases:
+        return table
+
+    csvfile = open(filename, 'w', newline = '') if filename else None
+    results = parallel_map(run_case, cases, (workspace,), processes) # the base workspace is sent once per worker
+    try:
+        if csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['case'] + fields + list(SUMMARY_FIELDS) + ['message'])
+        for n_done, (index, summary) in enumerate(results, 1):
+            for field in fields:
+                table[field][index] = cases[index].get(field, np.nan)
+            for field in SUMMARY_FIELDS:
+                table[field][index] = summary[field]
+            table['message'][index] = summary['message']
+            if csvfile:
+                writer.writerow([index] + [cases[index].get(field, '') for field in fields] +
+                                [summary[field] for field in SUMMARY_FIELDS] + [summary['message']])
+                csvfile.flush()
+            print('Case %d/%d: impulse %.0f N*s, Isp %.1f s, burn time %.2f s %s' % (n_done, len(cases), summary['impulse'],
+                  summary['Isp'], summary['burn_time'], summary['message']), file = stdout)
+    finally:
+        results.close() # shut the workers down, even if the sweep was interrupted
+        if csvfile:
+            csvfile.close()
+    return table
+
+def parse_values(spec):
+    ''' Parse the values of a --grid argument: a comma-separated list, or start:stop:count. '''
+    if ':' in spec:
+        start, stop, count = spec.split(':')
+        return list(np.linspace(float(start), float(stop), int(count)))
+    return [float(value) for value in spec.split(',')]
+
+def split_assignment(arg):
+    ''' Split a FIELD=VALUE command line argument. '''
+    field, sep, value = arg.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError('expected FIELD=VALUE, got ' + arg)
+    return field.strip(), value.strip()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Run a trade study of a saved SimulateLiquid or SimulateHybrid workspace.')
+    parser.add_argument('workspace', help = '.mat workspace saved with the Python backend')
+    parser.add_argument('--set', action = 'append', default = [], type = split_assignment, metavar = 'FIELD=VALUE',
+                        help = 'fix a field for every case')
+    parser.add_argument('--grid', action = 'append', default = [], type = split_assignment, metavar = 'FIELD=VALUES',
+                        help = 'sweep a field over values (v1,v2,... or start:stop:count); grids are combined Cartesian')
+    parser.add_argument('--range', action = 'append', default = [], type = split_assignment, metavar = 'FIELD=LOW:HIGH',
+                        help = 'range of a field for --lhs')
+    parser.add_argument('--lhs', type = int, metavar = 'N', help = 'sample N cases from a Latin hypercube over the --range fields')
+    parser.add_argument('--seed', type = int, help = 'random seed for --lhs')
+    parser.add_argument('--processes', type = int, help = 'worker processes (default: one per core)')
+    parser.add_argument('--output', default = './Outputs/sweep_results.csv', help = '.csv file to write results to')
+    args = parser.parse_args()
+
+    base = load_workspace(args.workspace)
+    base = apply_case(base, {field: float(value) for field, value in args.set})
+    if args.lhs:
+        ranges = {field: tuple(float(bound) for bound in value.split(':')) for field, value in args.range}
+        cases = latin_hypercube(ranges, args.lhs, args.seed)
+    else:
+        cases = cartesian_grid({field: parse_values(value) for field, value in args.grid}) if args.grid else [{}]
+    sweep(base, cases, args.processes, args.output)
+    print('Results saved in ' + args.output)
@@ -5,9 +5,6 @@
     the file explorer.
 '''
 
-import tkinter as tk
-import tkinter.ttk as ttk
-import tkinter.filedialog as dialog
 import os.path
 
 from .InputVar import InputVar
@@ -27,13 +24,17 @@ class TXTVar(InputVar):
 
     def put(self, val):
         ''' Set current value of self.var and self.fullfile. '''
-        self.var.set(val.split('/')[-1])
+        self.var.set(val.split('/')[-1] if self.widget is not None else val)
         self.fullfile = val
 
     def get_type(self):
         ''' Return the base type of this input var. '''
         return self.baseunit
 
+    def value(self):
+        ''' Return the full filepath. '''
+        return self.get()
+
     def build(self, matlabeng):
         ''' Build this variable in the MATLAB engine's workspace. '''
         myval = self.get() # get full filename
@@ -44,6 +45,8 @@ class TXTVar(InputVar):
 
     def makewidget(self, parent):
         ''' Create the tk widget for this input, using parent as the parent widget. '''
+        import tkinter as tk
+        import tkinter.ttk as ttk
         self.var = tk.StringVar(parent, self.defaultval.split('/')[-1]) # a Tk variable storing current status of this  (just the filename, not full filepath)
         self.widget = ttk.Frame(parent)
         self.browsebutton = ttk.Button(self.widget, text = "Browse", command = self.onbrowse )
@@ -55,7 +58,7 @@ class TXTVar(InputVar):
 
     def validate(self):
         ''' Validate the filepath to ensure it exists. '''
-        if 'disabled' in self.browsebutton.state():
+        if self.is_disabled():
             return True #if disabled, don't need to do it
         if os.path.isfile(self.fullfile):
             return True # if exists, obviously is valid
@@ -67,7 +70,14 @@ class TXTVar(InputVar):
         except:
             return "Invalid filename for " + self.name + " : " + self.get()
 
+    def is_disabled(self):
+        ''' Return whether this input is disabled (by a ToggleVar linked to it). '''
+        if self.widget is None:
+            return not self.enabled
+        return 'disabled' in self.browsebutton.state()
+
     def onbrowse(self):
+        import tkinter.filedialog as dialog
         getfilename = dialog.asksaveasfilename(title = 'Choose ' + self.name + ' .txt file...', filetypes = [('TXT Files', '.txt'),('ENG Files', '.eng')] )
         if getfilename:
             self.put(getfilename) # set vars to this filename
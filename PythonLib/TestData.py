@@ -0,0 +1,145 @@
+'''
+    TestData:
+
+    Loads the DAQ .csv files of Test Data (a header row of channel names, then a row of readings per sample) as a dict of channel
+    name to a 1D array of its readings. The DAQ has named its channels differently over time ('1.Nitrous Supply', '5. Ox Manifold',
+    '4.OxTank', ...), so names are normalised: the channel number and any spaces or punctuation are dropped, and known channels are
+    given a single spelling (CHANNELS, and ALIASES for channels that have been renamed), so that e.g. data['OxTank'],
+    data['Manifold'], data['loadCell'] and data['Time'] work for every test. Readings are kept in the DAQ's units (psi, raw load cell
+    counts, time in ms).
+
+    The file is parsed in one pass, then saved as a .npy file per channel in a sidecar folder next to it (<name>.channels, with an
+    index.json of the channels and of the .csv's size and modification time). Later loads memory-map the .npy files instead of
+    parsing the text, until the .csv changes. From the PropSim folder,
+
+        python -m PythonLib.TestData "Test Data"
+
+    builds the sidecars of every .csv file in the folder, printing their channels.
+'''
+
+import os
+import re
+import glob
+import json
+import time
+import shutil
+import argparse
+import warnings
+import numpy as np
+
+CHANNELS = ('ZeroCheck', 'NitrousSupply', 'NitrousHeatXger', 'NitrogenSupply', 'FuelTank', 'OxTank', 'Manifold', 'loadCell', 'Time',
+            'Commands') # spelling of known channels
+ALIASES = {'OxManifold': 'Manifold'} # channels that have been renamed, by their old name
+CACHE_SUFFIX = '.channels' # suffix of the sidecar folder
+INDEX_NAME = 'index.json'
+FORMAT_VERSION = 1 # version of the sidecar, increased whenever its layout changes
+
+_KNOWN = {name.casefold(): name for name in CHANNELS}
+_KNOWN.update({alias.casefold(): name for alias, name in ALIASES.items()})
+
+def normalize_channel(name):
+    ''' Return the normalised name of a channel, e.g. 'Manifold' for '5. Ox Manifold'. '''
+    name = re.sub(r'^\s*\d+\.', '', name.strip()) # channel number
+    name = re.sub(r'\W|_', '', name)
+    return _KNOWN.get(name.casefold(), name)
+
+def parse_csv(filename):
+    ''' Parse a DAQ .csv file into a dict of normalised channel name to readings, in the order of its columns. Repeated channel
+        names are numbered (Name_2, ...). Raises ValueError if the file has no header or a reading can't be read.
+    '''
+    with open(filename, encoding = 'utf-8-sig') as csvfile:
+        header = csvfile.readline()
+        if not header.strip():
+            raise ValueError(filename + ' has no header row of channel names.')
+        names = []
+        for column in header.split(','):
+            name = normalize_channel(column) or 'Column%d' % (len(names) + 1)
+            names.append(name if name not in names else '%s_%d' % (name, names.count(name) + 1))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore') # loadtxt warns about files with no readings
+            try:
+                readings = np.loadtxt(csvfile, delimiter = ',', ndmin = 2)
+            except ValueError as err:
+                raise ValueError('%s: %s' % (filename, err))
+    if readings.size == 0:
+        readings = readings.reshape(0, len(names))
+    elif readings.shape[1] != len(names):
+        raise ValueError('%s: %d channels in the header, but %d columns of readings.' % (filename, len(names), readings.shape[1]))
+    return {name: np.ascontiguousarray(readings[:, ii]) for ii, name in enumerate(names)}
+
+def cache_path(filename):
+    ''' Return the sidecar folder of a .csv file. '''
+    return os.path.splitext(filename)[0] + CACHE_SUFFIX
+
+def _source_stamp(filename):
+    ''' Return what identifies the version of a .csv file in the sidecar's index. '''
+    stat = os.stat(filename)
+    return {'version': FORMAT_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def save_cache(filename, data):
+    ''' Save the channels of filename (as returned by parse_csv) to its sidecar folder. The index is written last, so a sidecar
+        that was only partly written is never loaded.
+    '''
+    folder = cache_path(filename)
+    if os.path.isdir(folder):
+        shutil.rmtree(folder)
+    os.makedirs(folder)
+    files = {}
+    for ii, (name, values) in enumerate(data.items()):
+        files[name] = '%02d_%s.npy' % (ii, name)
+        np.save(os.path.join(folder, files[name]), values)
+    with open(os.path.join(folder, INDEX_NAME), 'w') as indexfile:
+        json.dump(dict(_source_stamp(filename), channels = files), indexfile, indent = 1)
+
+def load_cache(filename):
+    ''' Load the channels of filename from its sidecar folder as read-only memory maps. Returns None if there is no sidecar, or it
+        was made from another version of the file.
+    '''
+    folder = cache_path(filename)
+    try:
+        with open(os.path.join(folder, INDEX_NAME)) as indexfile:
+            index = json.load(indexfile)
+    except (OSError, ValueError):
+        return None
+    if any(index.get(key) != value for key, value in _source_stamp(filename).items()):
+        return None
+    data = {}
+    for name, file in index['channels'].items():
+        try:
+            data[name] = np.load(os.path.join(folder, file), mmap_mode = 'r')
+        except ValueError: # channels with no readings can't be memory-mapped
+            data[name] = np.load(os.path.join(folder, file))
+        except OSError:
+            return None
+    return data
+
+def load_test_data(filename, cache = True):
+    ''' Load the channels of a DAQ .csv file as a dict of normalised channel name to readings (see parse_csv), from its sidecar if
+        it is up to date. Otherwise the file is parsed and, with cache, its sidecar is (re)built; a sidecar that can't be written
+        (e.g. in a read-only folder) is skipped.
+    '''
+    data = load_cache(filename) if cache else None
+    if data is None:
+        data = parse_csv(filename)
+        if cache:
+            try:
+                save_cache(filename, data)
+            except OSError as err:
+                warnings.warn('Could not cache %s: %s' % (filename, err))
+    return data
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Build the channel caches of DAQ test data .csv files.')
+    parser.add_argument('paths', nargs = '+', help = '.csv files, or folders of them')
+    args = parser.parse_args()
+
+    for path in args.paths:
+        for filename in sorted(glob.glob(os.path.join(path, '*.csv'))) if os.path.isdir(path) else [path]:
+            start = time.time()
+            try:
+                data = load_test_data(filename)
+            except ValueError as err:
+                print('Skipped %s: %s' % (filename, err))
+                continue
+            n_samples = len(next(iter(data.values()))) if data else 0
+            print('%s: %d samples of %s (%.2f s)' % (filename, n_samples, ', '.join(data), time.time() - start))
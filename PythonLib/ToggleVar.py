@@ -7,9 +7,7 @@
     those items will be disabled whenever the ToggleVar is in the disableon state.
 '''
 
-import tkinter as tk
-import tkinter.ttk as ttk
-from .InputVar import InputVar
+from .InputVar import InputVar, PlainVar
 
 class ToggleVar(InputVar):
     def __init__(self, name, defaultval, baseunit = 'boolean', structname = None, description = '', linkedvars = [], disableon = True):
@@ -23,6 +21,9 @@ class ToggleVar(InputVar):
 
     def put(self, val):
         ''' Set current value of self.var. '''
+        if self.widget is None:
+            self.var.set(int(val))
+            return
         holdstate = self.widget['state']
         self.widget['state'] = 'normal'
         self.var.set(val)
@@ -32,6 +33,10 @@ class ToggleVar(InputVar):
         ''' Return the base type of this input var. '''
         return self.baseunit
 
+    def value(self):
+        ''' Return the state of the toggle (0 or 1). '''
+        return int(self.get())
+
     def build(self, matlabeng):
         ''' Build this variable in the MATLAB engine's workspace. '''
         myval = self.get()
@@ -42,12 +47,19 @@ class ToggleVar(InputVar):
 
     def makewidget(self, parent):
         ''' Create the tk widget for this input, using parent as the parent widget. '''
+        import tkinter as tk
+        import tkinter.ttk as ttk
         self.var = tk.IntVar(parent, int(self.defaultval)) # a Tk variable storing current status of this variable (0/False is off, 1/True is on)
         if self.linkedvars is None:
             self.widget = ttk.Checkbutton(parent, variable=self.var)
         else:
             self.widget = ttk.Checkbutton(parent, variable=self.var, command = self.toggle_linkedvars)
 
+    def make_headless(self):
+        ''' Store the state of the toggle without a widget, starting from the default. '''
+        super().make_headless()
+        self.var = PlainVar(int(self.defaultval))
+
     def validate(self):
         ''' Confirm whether the user input is valid or not. ''' 
         return True # can't mess this up really, I hope
@@ -59,7 +71,9 @@ class ToggleVar(InputVar):
         else:
             setvars = 'normal'
         for myvar in self.linkedvars: 
-            self.set_childstate(setvars, myvar.widget) # set state for the widget of all linkedvars
+            myvar.enabled = setvars == 'normal'
+            if myvar.widget is not None:
+                self.set_childstate(setvars, myvar.widget) # set state for the widget of all linkedvars
 
     def set_childstate(self, state, this_widget):
         wtype = this_widget.winfo_class()
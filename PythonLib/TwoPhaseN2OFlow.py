@@ -0,0 +1,78 @@
+'''
+    TwoPhaseN2OFlow:
+
+    Python version of TwoPhaseN2OFlow.m from Supporting Functions. Calculates the two-phase mass flux of nitrous oxide through an
+    injector using the Homogeneous Equilibrium Model, along with the critical mass flux that the flow may not exceed regardless of
+    the back pressure.
+'''
+
+import numpy as np
+
+from .N2OProperties import n2o_properties, n2o_find_t
+
+P_UP_NORM_RANGE = (1.0, 3.0) # range of upstream pressure / upstream vapor pressure
+P_DOWN_NORM_RANGE = (0.0, 1.0) # range of downstream pressure / upstream pressure
+
+def two_phase_n2o_flow(T_1, n = 200, p_up_norm = None, p_down_norm = None):
+    ''' Calculate the HEM mass flux at upstream liquid temperature T_1 [K], on an n x n grid of normalized pressures. Either axis of
+        the grid may instead be given as an increasing vector (p_up_norm, p_down_norm), which need not be equally spaced.
+        Returns (crit_flow, mass_flux), dicts with the same fields as the MATLAB structs:
+            crit_flow['p_up_norm']: vector of (upstream pressure / upstream vapor pressure)
+            crit_flow['G_crit']: critical mass flux at each p_up_norm [kg/m^2*s]
+            crit_flow['p_down_norm_crit']: critical (downstream pressure / upstream pressure) at each p_up_norm
+            mass_flux['p_up_norm']: array of (upstream pressure / upstream vapor pressure), rows are back pressures
+            mass_flux['p_down_norm']: array of (back pressure / upstream pressure)
+            mass_flux['G']: array of mass flux at corresponding p_up_norm, p_down_norm [kg/m^2*s]
+    '''
+    # saturation properties at upstream temperature
+    n2o_prop_1_sat = n2o_properties(T_1)
+
+    # Create array of p_1, p_2
+    p_1 = np.linspace(P_UP_NORM_RANGE[0], P_UP_NORM_RANGE[1], n) if p_up_norm is None else np.asarray(p_up_norm, dtype = float)
+    p_2 = np.linspace(P_DOWN_NORM_RANGE[0], P_DOWN_NORM_RANGE[1], n) if p_down_norm is None else np.asarray(p_down_norm, dtype = float)
+    P_1_norm, P_2_norm = np.meshgrid(p_1, p_2)
+
+    # Convert to pressures (from pressure ratio)
+    P_1 = P_1_norm*n2o_prop_1_sat['Pvap']
+    P_2 = P_2_norm*P_1
+
+    # Upstream liquid enthalpy, calculated as extension from saturated state
+    enthalpy_1 = n2o_prop_1_sat['h_l'] + (P_1 - n2o_prop_1_sat['Pvap'])/n2o_prop_1_sat['rho_l']
+
+    # Calculate downstream temperature and saturation properties
+    n2o_prop_2 = n2o_properties(n2o_find_t(P_2), ['rho_g', 'h_g', 'h_l', 's_l', 's_g'])
+
+    rho_2_g = n2o_prop_2['rho_g']
+    rho_2_l = np.full(P_2.shape, n2o_prop_1_sat['rho_l'])
+    enthalpy_2_g = n2o_prop_2['h_g']
+    enthalpy_2_l = n2o_prop_2['h_l']
+
+    # entropy differences: liquid downstream - liquid upstream, liquid downstream - gas downstream
+    entropy_ld_lu = n2o_prop_2['s_l'] - n2o_prop_1_sat['s_l']
+    entropy_ld_gd = n2o_prop_2['s_l'] - n2o_prop_2['s_g']
+
+    # calculate mass fraction of vapor to conserve entropy
+    massfrac = entropy_ld_lu/entropy_ld_gd
+    is_liquid = massfrac < 0
+    enthalpy_2_l = np.where(is_liquid, n2o_prop_1_sat['h_l'] + (P_2 - n2o_prop_1_sat['Pvap'])/n2o_prop_1_sat['rho_l'], enthalpy_2_l)
+    massfrac[is_liquid] = 0
+
+    # downstream equivalent density and enthalpy
+    rho_2_equiv = 1.0/(massfrac/rho_2_g + (1 - massfrac)/rho_2_l)
+    enthalpy_2 = massfrac*enthalpy_2_g + (1 - massfrac)*enthalpy_2_l
+
+    # Homogeneous Equilibrium Model (round-off can make the enthalpy drop slightly negative at zero pressure drop)
+    G = rho_2_equiv*np.sqrt(2*np.maximum(enthalpy_1 - enthalpy_2, 0))
+
+    # G_crit for each upstream pressure
+    i_crit = np.argmax(G, axis = 0)
+    columns = np.arange(G.shape[1])
+    G_crit = G[i_crit, columns]
+    P_2_crit = P_2[i_crit, columns]
+
+    # Create downstream pressure vs. oxidizer mass flux profile (flux is held at G_crit below the critical back pressure)
+    G_out = np.where(P_2 > P_2_crit, G, G_crit)
+
+    crit_flow = {'p_up_norm': p_1, 'G_crit': G_crit, 'p_down_norm_crit': P_2_crit/(p_1*n2o_prop_1_sat['Pvap'])}
+    mass_flux = {'p_up_norm': P_1_norm, 'p_down_norm': P_2_norm, 'G': G_out}
+    return crit_flow, mass_flux
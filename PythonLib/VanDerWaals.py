@@ -0,0 +1,131 @@
+'''
+    VanDerWaals:
+
+    The van der Waals equation of state, p = R*T/(1/rho - b) - a*rho^2, solved for pressure (pvdw), temperature (tvdw) and density
+    (rhovdw), vectorised over arrays of their arguments. These are the Python versions of PVDW, TVDW and RhoVDW in Integration.m,
+    except that TVDW there has a*rho where the equation has a*rho^2 (it is never called); tvdw() inverts pvdw() exactly.
+
+    RhoVDW in Integration.m finds the density with roots(), a companion matrix eigenvalue solve per call, and keeps the smallest real
+    root (the gas density). For p, T > 0 the cubic -a*b*rho^3 + a*rho^2 - (p*b + R*T)*rho + p has no negative roots, so its real roots
+    are all positive. rhovdw() solves the cubic in closed form: Cardano's formula where it has one real root and the trigonometric
+    solution where it has three, taking the smallest. Two Newton steps on the cubic then polish the root to full precision, which
+    matters near the critical point, where the closed forms lose digits to cancellation.
+
+    Only pvdw() is used by the simulation (for the partial pressure of the oxidizer vapor in the tank, see Integration.py): RhoVDW
+    is defined in Integration.m but not called anywhere, so rhovdw() is a standalone utility for now. From the PropSim folder,
+
+        python -m PythonLib.VanDerWaals
+
+    times rhovdw() (one state at a time and vectorised) against a numpy.roots() version of RhoVDW (rhovdw_roots()) over N2O tank
+    conditions, and prints the largest difference.
+'''
+
+import math
+import time
+import numpy as np
+
+NEWTON_STEPS = 2 # Newton steps polishing the closed-form root
+
+def pvdw(T, rho, R, a, b):
+    ''' van der Waal's equation of state for pressure. '''
+    return R*T/(1/rho - b) - a*rho**2
+
+def tvdw(p, rho, R, a, b):
+    ''' van der Waal's equation of state for temperature (the inverse of pvdw()). '''
+    return (p + a*rho**2)*(1/rho - b)/R
+
+def _rhovdw_scalar(p, T, R, a, b):
+    ''' rhovdw() for a scalar p and T, with the math module (much faster than NumPy for one value). '''
+    A = -1/b # monic cubic rho^3 + A*rho^2 + B*rho + C, depressed to t^3 + P*t + Q with rho = t - A/3
+    B = (p*b + R*T)/(a*b)
+    C = -p/(a*b)
+    P = B - A*A/3
+    Q = 2*A**3/27 - A*B/3 + C
+    disc = (Q/2)**2 + (P/3)**3
+    if disc > 0:
+        w = -Q/2 - math.copysign(math.sqrt(disc), Q)
+        u = math.copysign(abs(w)**(1/3), w)
+        t = u - P/(3*u) if u != 0 else 0.0
+    else:
+        m = 2*math.sqrt(max(-P/3, 0))
+        t = m*math.cos(math.acos(min(max(3*Q/(P*m), -1), 1))/3 + 2*math.pi/3) if m != 0 else 0.0
+    rho = t - A/3
+    for _ in range(NEWTON_STEPS):
+        df = (-3*a*b*rho + 2*a)*rho - (p*b + R*T)
+        if df == 0:
+            break
+        rho -= (((-a*b*rho + a)*rho - (p*b + R*T))*rho + p)/df
+    return rho
+
+def rhovdw(p, T, R, a, b):
+    ''' van der Waal's equation of state for density: the smallest (gas) root of the cubic, in closed form with a Newton polish.
+        p and T may be arrays (broadcast together); returns a float for scalar arguments.
+    '''
+    if isinstance(p, (float, int)) and isinstance(T, (float, int)): # (including numpy.float64)
+        return _rhovdw_scalar(float(p), float(T), R, a, b)
+    p = np.asarray(p, dtype = float)
+    T = np.asarray(T, dtype = float)
+    c1 = a # coefficients of -a*b*rho^3 + c1*rho^2 + c2*rho + c3
+    c2 = -(p*b + R*T)
+    c3 = p
+
+    # monic cubic rho^3 + A*rho^2 + B*rho + C, depressed to t^3 + P*t + Q with rho = t - A/3
+    A = -c1/(a*b)
+    B = -c2/(a*b)
+    C = -c3/(a*b)
+    P = B - A**2/3
+    Q = 2*A**3/27 - A*B/3 + C
+    disc = (Q/2)**2 + (P/3)**3
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        # one real root (disc > 0): Cardano, taking the cube root without cancellation
+        u = np.cbrt(-Q/2 - np.copysign(np.sqrt(np.maximum(disc, 0)), Q))
+        t_one = np.where(u != 0, u - P/(3*u), 0.0)
+        # three real roots (disc <= 0): the smallest of the trigonometric solution
+        m = 2*np.sqrt(np.maximum(-P/3, 0))
+        theta = np.arccos(np.clip(3*Q/(P*m), -1, 1))
+        t_three = m*np.cos(theta/3 + 2*np.pi/3)
+    rho = np.where(disc > 0, t_one, t_three) - A/3
+
+    for _ in range(NEWTON_STEPS): # polish on the original cubic
+        f = ((-a*b*rho + c1)*rho + c2)*rho + c3
+        df = (-3*a*b*rho + 2*c1)*rho + c2
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            step = np.where(df != 0, f/df, 0.0)
+        rho = rho - step
+    return rho
+
+def rhovdw_roots(p, T, R, a, b):
+    ''' rhovdw() for a scalar p and T as RhoVDW in Integration.m: the smallest real root from numpy.roots(). '''
+    vdw_roots = np.roots([-a*b, a, -p*b - R*T, p])
+    return float(np.min(vdw_roots[np.isreal(vdw_roots)].real))
+
+def benchmark(n = 20000, stdout = None):
+    ''' Time rhovdw() against rhovdw_roots() over n N2O states (0.1 to 7.2 MPa, 230 to 309 K, and a band around the critical point),
+        printing the time per density and the largest relative difference and residual. Returns a dict of the timings [s per density].
+    '''
+    R = 8.3144621/0.044013 # constants of Integration.py for N2O
+    a = 0.38828/0.044013**2
+    b = 44.15/0.044013*1e-6
+    rng = np.random.default_rng(0)
+    p = np.concatenate([rng.uniform(1e5, 7.2e6, n - n//10), rng.uniform(6.5e6, 7.5e6, n//10)])
+    T = np.concatenate([rng.uniform(230, 309, n - n//10), rng.uniform(295, 320, n//10)])
+    timings = {}
+
+    def run(label, func):
+        start = time.perf_counter()
+        result = np.asarray(func(), dtype = float)
+        timings[label] = (time.perf_counter() - start)/n
+        print('%-40s %10.1f ns per density' % (label + ':', timings[label]*1e9), file = stdout)
+        return result
+
+    print('Van der Waals gas density of N2O at %d states' % n, file = stdout)
+    expected = run('numpy.roots, one state at a time', lambda: [rhovdw_roots(p_i, T_i, R, a, b) for p_i, T_i in zip(p.tolist(), T.tolist())])
+    run('rhovdw, one state at a time', lambda: [rhovdw(p_i, T_i, R, a, b) for p_i, T_i in zip(p.tolist(), T.tolist())])
+    actual = run('rhovdw, vectorised', lambda: rhovdw(p, T, R, a, b))
+    print('Largest relative difference: %.1e' % np.max(np.abs(actual/expected - 1)), file = stdout)
+    print('Largest relative pressure residual: rhovdw %.1e, numpy.roots %.1e' % (np.max(np.abs(pvdw(T, actual, R, a, b)/p - 1)),
+          np.max(np.abs(pvdw(T, expected, R, a, b)/p - 1))), file = stdout)
+    return timings
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,68 @@
+'''
+    WorkerPool:
+
+    Runs a function over many items on a pool of worker processes, for the trade studies (Sweep), dispersion analyses (MonteCarlo)
+    and designs (DesignLiquid and OptimizeLiquidMass). The fixed arguments of the function (e.g. the base workspace) are sent to
+    each worker once, when it starts, rather than with every item, and the results come back with the index of their item in the
+    order they finish.
+
+    Workers are spawned (rather than forked), which is safe when running from one of the GUI's threads. The injector mass flux
+    table is built (and saved) before they start, so it is built once rather than once per worker; the workers then map the saved
+    table. With one process, or a single item, the function runs in the calling process.
+'''
+
+import os
+import multiprocessing
+
+from .FindG import get_table
+
+_worker_state = None # (function, initargs) of a worker process
+
+def _init_worker(function, initargs):
+    ''' Store the function and its fixed arguments in a worker process. '''
+    global _worker_state
+    _worker_state = (function, initargs)
+
+def _call_indexed(indexed_item):
+    ''' Call the worker's function on an (index, item) pair, returning (index, result). '''
+    index, item = indexed_item
+    function, initargs = _worker_state
+    return index, function(*initargs, item)
+
+class WorkerPool():
+    ''' A pool of processes worker processes (None for one per core) calling function(*initargs, item). The function must be
+        picklable (a module-level function, or a method of a picklable object). Use as a context manager, which shuts the workers
+        down, and call imap() for each batch of items.
+    '''
+    def __init__(self, function, initargs = (), processes = None):
+        self.function = function
+        self.initargs = tuple(initargs)
+        self.processes = max(processes or os.cpu_count() or 1, 1)
+        self.pool = None
+
+    def __enter__(self):
+        if self.processes > 1:
+            get_table() # build (and save) the injector mass flux table once, rather than once per worker
+            self.pool = multiprocessing.get_context('spawn').Pool(self.processes, initializer = _init_worker,
+                                                                  initargs = (self.function, self.initargs))
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.pool is not None:
+            self.pool.terminate() # all items have finished, unless the caller was interrupted
+
+    def imap(self, items, chunksize = 1):
+        ''' Return an iterator of (index, result) of each of items, in the order they finish. '''
+        indexed = list(enumerate(items))
+        if self.pool is None or len(indexed) < 2:
+            return ((index, self.function(*self.initargs, item)) for index, item in indexed)
+        return self.pool.imap_unordered(_call_indexed, indexed, chunksize)
+
+def parallel_map(function, items, initargs = (), processes = None, chunksize = 1):
+    ''' Yield (index, function(*initargs, item)) for each of items, in the order they finish, on a WorkerPool of processes worker
+        processes (None for one per core, and never more than there are items). The workers are shut down when the generator is
+        exhausted or closed.
+    '''
+    items = list(items)
+    with WorkerPool(function, initargs, min(processes or os.cpu_count() or 1, max(len(items), 1))) as pool:
+        yield from pool.imap(items, chunksize)
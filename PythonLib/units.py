@@ -4,8 +4,17 @@ Units:
 The units module handles basic unit conversion by defining a set of unit conversion anonymous 
 functions. The functions use numpy array-friendly operations to allow users to pass a value array in place
 of a single value, should they wish.
+
+Unit strings are compiled once (see compile_unit) into a CompiledUnit: the factor and offset that take a value in the unit to
+the base units, and the dimension of the unit (its base units and their powers). Compiled units and conversions are memoized in
+bounded caches, so converting e.g. on every keystroke or every array plotted costs one multiply-add. From the PropSim folder,
+`python -m PythonLib.units` benchmarks compiling and converting.
 '''
 
+import sys
+import time
+import functools
+from collections import namedtuple
 import numpy as np
 
 ''' The unit lib stores conversion functions that take a value, x, from a given unit to the base unit. Metric modifiers on base units are 
@@ -57,6 +66,97 @@ unit_preferred = {
     "K" : "K"
 }
 
+L_TO_M3 = 1.0/unit_lib["L"]["m^3"] # 1 L in m^3, to compare volumes of the L lib with lengths cubed
+
+UNIT_CACHE_SIZE = 512 # unit strings and conversions kept compiled
+
+''' A compiled unit: value [unit] * factor + offset = value [base units]. dimension is a sorted tuple of (base unit, power) pairs
+    of the base units of the unit lib (so volumes of the L lib have dimension L, which is compared with m^3 when converting to
+    lengths cubed). offset is only nonzero for a single temperature unit with a shifted zero (C, F); in composite units and powers
+    temperature units are differences, so have no offset.
+'''
+CompiledUnit = namedtuple('CompiledUnit', ['factor', 'offset', 'dimension'])
+
+_lib_index = {} # casefolded unit : (base unit, unit), for case-insensitive lookups in the unit lib
+for _base_unit in unit_lib:
+    for _unit in unit_lib[_base_unit]:
+        _lib_index.setdefault(_unit.casefold(), (_base_unit, _unit)) # (the first match, as the lib is searched in order)
+
+def _find_lib_unit(name):
+    ''' Return (base unit, unit) of the case-insensitive match of name in the unit lib, or None if there is none. '''
+    return _lib_index.get(name.casefold())
+
+def _compile_term(term):
+    ''' Compile a single term of a unit string (e.g. 'kg', 'in^-3', 'm^3'), returning (factor, offset, base unit, power). Raises
+        a KeyError if the term isn't a (metric prefixed) unit of the unit lib, optionally to a power.
+    '''
+    power = 1.0
+    found = _find_lib_unit(term)
+    name = term
+    if found is None and '^' in term:
+        name, _, power_str = term.partition('^')
+        try:
+            power = float(power_str)
+        except ValueError:
+            raise KeyError(term)
+        found = _find_lib_unit(name)
+    mult = 1.0
+    if found is None: # a metric multiplier of a unit in the lib (e.g. km)
+        for prefix in metric_mult:
+            if name[:len(prefix)].casefold() == prefix.casefold() and _find_lib_unit(name[len(prefix):]) is not None:
+                found = _find_lib_unit(name[len(prefix):])
+                mult = metric_mult[prefix]
+                break
+    if found is None:
+        raise KeyError(term)
+    base_unit, unit = found
+    offset = unit_offset.get(base_unit, {}).get(unit, 0.0) if power == 1 and mult == 1 else 0.0
+    return (mult*unit_lib[base_unit][unit])**power, offset, base_unit, power
+
+@functools.lru_cache(maxsize = UNIT_CACHE_SIZE)
+def compile_unit(unit):
+    ''' Compile a unit string, e.g. 'psi', 'kg*m^-3' or 'kN * s' (terms separated by '*', each a unit of the unit lib with an
+        optional metric prefix and power), into a CompiledUnit. Raises a KeyError if the unit string can't be parsed.
+    '''
+    terms = [term.strip(' ()') for term in unit.split('*')]
+    factor = 1.0
+    dimension = {}
+    for term in terms:
+        term_factor, offset, base_unit, power = _compile_term(term)
+        factor *= term_factor
+        if base_unit != 'unitless':
+            dimension[base_unit] = dimension.get(base_unit, 0.0) + power
+    if len(terms) > 1:
+        offset = 0.0
+    return CompiledUnit(factor, offset, tuple(sorted((base_unit, power) for base_unit, power in dimension.items() if power != 0)))
+
+def _volumes_as_lengths(compiled):
+    ''' Return a CompiledUnit with any L dimension expressed as m^3. '''
+    dimension = dict(compiled.dimension)
+    power = dimension.pop('L', 0.0)
+    dimension['m'] = dimension.get('m', 0.0) + 3*power
+    return CompiledUnit(compiled.factor*L_TO_M3**power, compiled.offset,
+                        tuple(sorted((base_unit, power) for base_unit, power in dimension.items() if power != 0)))
+
+@functools.lru_cache(maxsize = UNIT_CACHE_SIZE)
+def compile_conversion(from_unit, to_unit, power = 1.0):
+    ''' Return (multiplier, divisor, shift) converting a value in from_unit to to_unit (both to power): value*multiplier/divisor +
+        shift, where at most one of multiplier and divisor isn't 1 (so a conversion to or from a base unit is a single exact
+        multiplication or division). Raises a KeyError if the units are invalid or have different dimensions.
+    '''
+    from_compiled, to_compiled = compile_unit(from_unit), compile_unit(to_unit)
+    if from_compiled.dimension != to_compiled.dimension:
+        from_compiled, to_compiled = _volumes_as_lengths(from_compiled), _volumes_as_lengths(to_compiled)
+        if from_compiled.dimension != to_compiled.dimension:
+            raise KeyError(from_unit + ' -> ' + to_unit)
+    multiplier, divisor = from_compiled.factor**power, to_compiled.factor**power
+    if multiplier == divisor:
+        multiplier = divisor = 1.0
+    elif multiplier != 1 and divisor != 1:
+        multiplier, divisor = multiplier/divisor, 1.0
+    shift = (from_compiled.offset - to_compiled.offset)/to_compiled.factor if power == 1 else 0.0
+    return multiplier, divisor, shift
+
 class Units():
     def __init__(self):
         pass
@@ -70,79 +170,18 @@ class Units():
     
     def get_preferred_unit(self, unit):
         ''' Returns the preferred unit compatible with unit. '''
-        # Check for composite unit
-        split_units = [x.strip(' ()') for x in unit.split('*')] 
-        if len(split_units) > 1:
-            return '*'.join(self.get_preferred_unit(x) for x in split_units)
-
-        comp_units = self.get_compatible_units(unit)
-        for my_unit in comp_units:
-            splitstr = my_unit.split('^')
-            my_unit_no_power = splitstr[0]
-            power = 1
-            if len(splitstr) >1:
-                power = splitstr[1]
-            if my_unit_no_power in unit_lib.keys():
-                return_unit = my_unit
-                try:
-                    return_unit =  unit_preferred[my_unit]
-                except KeyError:
-                    try:
-                        return_unit =  unit_preferred[my_unit_no_power]+'^'+power 
-                    except:
-                        pass
-                return return_unit
+        return _preferred_unit(unit)
 
     def get_compatible_units(self, unit, power = 1):
         ''' Returns a list of units compatible with the given unit. 
             The returned list will contain the given unit, unless no other compatible units are found.
         '''  
-        # Check for composite unit
-        split_units = [x.strip(' ()') for x in unit.split('*')] 
-        if len(split_units) > 1:
-            comp_units = ['Any combination of units in the following tuples:'] # start list
-            for x in split_units:
-                mycomps = self.get_compatible_units(x)
-                mycomps[0] = '(' + mycomps[0]
-                mycomps[-1] += ')'
-                comp_units = comp_units + mycomps
-            return comp_units
-
-        my_base_unit = None 
-        # Search for the unit in the unit lib
-        for base_unit in unit_lib:
-            for each_unit in unit_lib[base_unit]:
-                if unit.casefold() == each_unit.casefold() :
-                    my_base_unit = base_unit
-                    break
-        
-        if my_base_unit == None: # if didn't find it in the lib, try removing a power
-            powercheck = unit.split('^') # check to see if unit is taken to a power
-            unit = powercheck[0]
-            if len(powercheck) > 1:
-                try:
-                    return self.get_compatible_units(unit, int(powercheck[1])) # pass w power arg
-                except:
-                    return [] # if power is invalid, return empty string
-
-        
-        if my_base_unit is None: # check for metrix prefix
-            for prefix in metric_mult:
-                if unit[:len(prefix)].casefold() == prefix.casefold():
-                    return self.get_compatible_units(unit[len(prefix):], power) 
-
-        if my_base_unit is None: # If you still don't find a base unit, return empty list
-            return []
-        else:
-            if power == 1:
-                return list(unit_lib[my_base_unit].keys()) # return list of keys for that base unit
-            else:
-                return list([key + '^' + str(power) for key in unit_lib[my_base_unit].keys() ]) # return list of key with power modifier
+        return list(_compatible_units(unit, power))
 
     def validate_units(self, from_unit, to_unit): 
         ''' Returns true if from_unit can be converted to to_unit by this module. Otherwise returns false. '''
         try:
-            self.convert(1.0, to_unit, from_unit)
+            compile_conversion(to_unit, from_unit)
             return True
         except KeyError:
             return False
@@ -152,100 +191,128 @@ class Units():
             value: the value to be converted (can also be a np array of values)
             from_unit: the units of value
             to_unit: the units to which value is converted 
+            power: the power both units are taken to (e.g. 2 to convert m^2 to in^2 with from_unit = 'm' and to_unit = 'in')
 
             Raises a KeyError if the units passed are incompatible or invalid.
 
-            For composite units, the units must have the same structure, i.e.
-            CORRECT:
-                from_unit = 'kg * m^-2 * s' and to_unit = 'lb * in^-2 * s' are compatible, but
-            INCORRECT
-                to_unit = 'kg * m^-2 * s' and to_unit = 's * lb * in^-2 ' are NOT compatible
+            Composite units are compatible if they have the same dimension, e.g. 'kg * m^-2 * s', 'lb * in^-2 * s' and
+            's * lb * in^-2' are all compatible. Arrays are converted in a single pass.
         '''
-        # Check for composite unit
-        split_fromunits = [x.strip(' ()') for x in from_unit.split('*')] 
-        split_tounits = [x.strip(' ()') for x in to_unit.split('*')]
-        if len(split_fromunits) != len(split_tounits):
-            raise KeyError # if have different number of composite units
-        elif len(split_fromunits) > 1:
-            new_val = value
-            for i in range(0,len(split_fromunits)):
-                new_val = self.convert(new_val,split_fromunits[i], split_tounits[i])
-            return new_val
-
-
-        my_base_unit = None
-        # Search for the from_unit in the unit lib
-        for base_unit in unit_lib:
-            for unit in unit_lib[base_unit]:
-                if unit.casefold() == from_unit.casefold() :
-                    my_base_unit = base_unit
-                    from_unit = unit
-                    break
-            if my_base_unit is not None:
-                break
-        
-        # if didn't find it, check to see if the units are to powers
-        if my_base_unit is None:
-            powercheck_from = from_unit.split('^') # check to see if unit is taken to a power
-            from_unit = powercheck_from[0]
-            powercheck_to = to_unit.split('^')
-            to_unit = powercheck_to[0]
-
-            if len(powercheck_from) == len(powercheck_to) and len(powercheck_from) > 1 :
+        multiplier, divisor, shift = compile_conversion(from_unit, to_unit, float(power))
+        value = np.divide(value, divisor) if divisor != 1 else np.multiply(value, multiplier)
+        if shift:
+            if isinstance(value, np.ndarray) and value.ndim:
+                np.add(value, shift, out = value) # (value is a new array)
+            else:
+                value = np.add(value, shift)
+        return value
+
+
+@functools.lru_cache(maxsize = UNIT_CACHE_SIZE)
+def _preferred_unit(unit):
+    ''' Returns the preferred unit compatible with unit (see Units.get_preferred_unit). '''
+    # Check for composite unit
+    split_units = [x.strip(' ()') for x in unit.split('*')] 
+    if len(split_units) > 1:
+        return '*'.join(_preferred_unit(x) for x in split_units)
+
+    comp_units = _compatible_units(unit)
+    for my_unit in comp_units:
+        splitstr = my_unit.split('^')
+        my_unit_no_power = splitstr[0]
+        power = 1
+        if len(splitstr) >1:
+            power = splitstr[1]
+        if my_unit_no_power in unit_lib.keys():
+            return_unit = my_unit
+            try:
+                return_unit =  unit_preferred[my_unit]
+            except KeyError:
                 try:
-                    if float(powercheck_from[1]) != float(powercheck_to[1]):
-                        raise KeyError # if powers arent equal, return Key Error
-                    else:
-                        return self.convert(value, from_unit, to_unit, float(powercheck_from[1])) # collect the power of the unit
+                    return_unit =  unit_preferred[my_unit_no_power]+'^'+power 
                 except:
-                    raise KeyError
-            elif len(powercheck_from) != len(powercheck_to):
-                from_unit = '^'.join(powercheck_from) # if they arent both to a power, return the values to their initial state, and check them raw against the unit_lib (checking for L and m^3. for example)
-                to_unit = '^'.join(powercheck_to)
-
-        # If didn't find it, from_unit is a metric multiplier of the base unit. 
-        # If so, adjust the value to get it in its base unit equivalent (e.g. take the km value to m)
-        if my_base_unit is None:
-            for prefix in metric_mult:
-                if from_unit[:len(prefix)].casefold() == prefix.casefold():
-                    value = np.multiply(value, np.power( metric_mult[prefix] , power) )
-                    return self.convert(value, from_unit[len(prefix):]+'^'+str(power), to_unit+'^'+str(power)) # having converted to a base unit and multiplied valued, recurse
-        # Do the same as above for the to_unit, defining a multiplier thats applied on the value at end if to_unit is 
-            # a metric multiplier of a base unit
-        mult = 1 # by default, multiplier is 1
-        flag = False
-        for unit in unit_lib[my_base_unit]:
-            if unit.casefold() == to_unit.casefold():
-                to_unit = unit
-                flag = True
-        if flag is False: # If didn't find it, must be a metric multiplier of a base unit
-                for prefix in metric_mult:
-                    if to_unit[:len(prefix)].casefold() == prefix.casefold():
-                        mult = 1 / np.power( metric_mult[prefix] , power)
-                        to_unit = to_unit[len(prefix):]
-                        for unit in unit_lib[my_base_unit]: # if found the metric multiplier, find the key that is the case-insensitive match
-                            if unit.casefold() == to_unit.casefold():
-                                to_unit = unit
-                                break
-                        break
-        # Convert to base unit, checking to see if an offset exists 
-        value = np.multiply(value, np.power(unit_lib[my_base_unit][from_unit], float(power)) ) # value (from_unit) * # (base_unit/from_unit) = new value (base_unit)
-        try:
-            value = np.add(value, unit_offset[my_base_unit][from_unit])
-        except KeyError:
-            pass # KeyError indicates no offset exists for this unit pair
-        # Convert to to_unit, checking to see if an offset exists
-        try:
-            value = np.subtract(value, unit_offset[my_base_unit][to_unit])
-        except KeyError:
-            pass # KeyError indicates no offset exists for this unit pair
-        value = np.divide(value, np.power(unit_lib[my_base_unit][to_unit], float(power)))
-        
-        return np.multiply(value, mult) # apply the multiplier and return
+                    pass
+            return return_unit
+
+@functools.lru_cache(maxsize = UNIT_CACHE_SIZE)
+def _compatible_units(unit, power = 1):
+    ''' Returns a tuple of units compatible with the given unit (see Units.get_compatible_units). '''
+    # Check for composite unit
+    split_units = [x.strip(' ()') for x in unit.split('*')] 
+    if len(split_units) > 1:
+        comp_units = ['Any combination of units in the following tuples:'] # start list
+        for x in split_units:
+            mycomps = list(_compatible_units(x))
+            mycomps[0] = '(' + mycomps[0]
+            mycomps[-1] += ')'
+            comp_units = comp_units + mycomps
+        return tuple(comp_units)
+
+    my_base_unit = None 
+    # Search for the unit in the unit lib
+    found = _find_lib_unit(unit)
+    if found is not None:
+        my_base_unit = found[0]
+    
+    if my_base_unit == None: # if didn't find it in the lib, try removing a power
+        powercheck = unit.split('^') # check to see if unit is taken to a power
+        unit = powercheck[0]
+        if len(powercheck) > 1:
+            try:
+                return _compatible_units(unit, int(powercheck[1])) # pass w power arg
+            except:
+                return () # if power is invalid, return empty string
+
+    
+    if my_base_unit is None: # check for metrix prefix
+        for prefix in metric_mult:
+            if unit[:len(prefix)].casefold() == prefix.casefold():
+                return _compatible_units(unit[len(prefix):], power) 
+
+    if my_base_unit is None: # If you still don't find a base unit, return empty list
+        return ()
+    else:
+        if power == 1:
+            return tuple(unit_lib[my_base_unit].keys()) # return list of keys for that base unit
+        else:
+            return tuple([key + '^' + str(power) for key in unit_lib[my_base_unit].keys() ]) # return list of key with power modifier
 
 
 units = Units()
 
+def benchmark(n = 10**6, repeat = 20, stdout = sys.stdout):
+    ''' Print the time to compile unit strings and convert scalars and arrays of n values, comparing array conversion with
+        copying the array (a bound set by memory bandwidth).
+    '''
+    strings = ['psi', 'kg*m^-3', 'mm^2', 'kN*s', 'C', 'lb*in^-3']
+    compile_unit.cache_clear()
+    compile_conversion.cache_clear()
+    start = time.perf_counter()
+    for unit in strings:
+        compile_unit(unit)
+    print('Compile: %.1f us per unit string' % (1e6*(time.perf_counter() - start)/len(strings)), file = stdout)
+    start = time.perf_counter()
+    for ii in range(10000):
+        units.convert(650.0, 'psi', 'Pa')
+    print('Scalar convert (cached): %.2f us' % (1e6*(time.perf_counter() - start)/10000), file = stdout)
+
+    x = np.random.default_rng(0).random(n)*1e6
+    for from_unit, to_unit in (('Pa', 'psi'), ('K', 'C')):
+        units.convert(x, from_unit, to_unit) # (compile, and touch the memory)
+        start = time.perf_counter()
+        for ii in range(repeat):
+            units.convert(x, from_unit, to_unit)
+        t_convert = (time.perf_counter() - start)/repeat
+        start = time.perf_counter()
+        for ii in range(repeat):
+            x.copy()
+        t_copy = (time.perf_counter() - start)/repeat
+        print('Convert %d values %s -> %s: %.2f ms (%.1f GB/s), copy: %.2f ms (%.1f GB/s)' % (n, from_unit, to_unit, 1e3*t_convert,
+              2*x.nbytes/t_convert/1e9, 1e3*t_copy, 2*x.nbytes/t_copy/1e9), file = stdout)
+
+if __name__ == '__main__':
+    benchmark()
+
 
 ### FUNCTIONALITY TESTING ###
 # print( 0 == units.convert(-273.15, 'C', 'K'))
@@ -1,4 +1,4 @@
-function [ tout, recording_vars] = Integration(inputs,mode,tspan)
+function [ tout, recording_vars] = Integration(inputs,mode,tspan,progress_on)
 % Integrate necesary differential equations for rocket engine modeling 
 % using Euler's method. This includes real combustion properties and 
 % supercharging.
@@ -53,6 +53,8 @@ function [ tout, recording_vars] = Integration(inputs,mode,tspan)
 %           - combustion_on: 1 for hot-fire, 0 for cold-flow
 %           - flight_on: 1 for flight conditions, 0 for ground conditions
 %       - tspan: vector of time values over which to record outputs
+%       - progress_on: (optional) print the simulated time as integration
+%       progresses, for the Python GUI to show the progress of a run
 %   OUTPUS:
 %       - tspan: output time vector
 %       - F_thrust: thrust over tspan
@@ -85,6 +87,10 @@ InitializeRecord(tspan, {'F_thrust', 'p_cc', 'p_oxtank', 'p_oxpresstank', ...
     'm_dot_ox_crit', 'M_e', 'p_exit', 'p_shock'});
 options = odeset('Events', @(t,y) TerminalFunction(t,y,inputs, mode),...
     'MaxStep',0.01);
+if nargin >= 4 && progress_on
+    options = odeset(options, 'OutputFcn', ...
+        @(t,y,flag) ProgressFunction(t, flag, tspan(end)));
+end
 if strcmp(mode.type,'liquid')
     odefun = @(t,y) LiquidModel(t,y,inputs,mode);
 elseif strcmp(mode.type,'hybrid')
@@ -296,6 +302,19 @@ direction = [0, 0];
 value = [state.m_lox + state.m_gox, state.m_fuel];  % mass of propellants
 end
 
+function status = ProgressFunction(t, flag, t_final)
+%ProgressFunction Prints the simulated time every 0.1 s of simulated time,
+%as 'Progress: t = <time> s of <t_final> s'.
+persistent next_report
+status = 0; % never stop the integration
+if strcmp(flag, 'init')
+    next_report = 0;
+elseif isempty(flag) && t(end) >= next_report
+    fprintf('Progress: t = %.2f s of %.2f s\n', t(end), t_final);
+    next_report = t(end) + 0.1;
+end
+end
+
 function [state_0, x0] = InitializeHybridState(inputs, mode)
 %INITIALIZEHYBRIDSTATE Initializes the state vector for a hybrid system.
 %   Uses the inputs to create an initial state vector for a hybrid
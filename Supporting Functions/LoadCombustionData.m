@@ -0,0 +1,50 @@
+function [ comb_data ] = LoadCombustionData(filename)
+%LoadCombustionData Load the CombData struct of a combustion data .MAT
+%file (as created by CombustionDataProcess.m), keeping the most recently
+%used tables loaded so that they are only read again once their file
+%changes. The cache lasts as long as the MATLAB session, and is shared by
+%every page.
+% Inputs:
+%   filename: combustion data .MAT file
+% Outputs:
+%   comb_data: CombData struct of the file
+
+persistent tables keys hits misses
+
+% Tables kept loaded
+max_tables = 8;
+
+if isempty(tables)
+    tables = {};
+    keys = {};
+    hits = 0;
+    misses = 0;
+end
+
+% Key the file on its name, modification time and size, so edited files
+% are reloaded
+file_info = dir(filename);
+if isempty(file_info)
+    error('LoadCombustionData:notFound', 'Combustion data file %s not found.', filename);
+end
+key = sprintf('%s|%.10f|%d', filename, file_info.datenum, file_info.bytes);
+
+i_table = find(strcmp(keys, key), 1);
+if isempty(i_table)
+    misses = misses + 1;
+    comb_data = load(filename);
+    comb_data = comb_data.CombData;
+else
+    hits = hits + 1;
+    comb_data = tables{i_table};
+    tables(i_table) = [];
+    keys(i_table) = [];
+end
+
+% Most recently used table first, dropping the least recently used
+tables = [{comb_data}, tables(1:min(end, max_tables - 1))];
+keys = [{key}, keys(1:min(end, max_tables - 1))];
+
+fprintf('Combustion table cache: %d hits, %d misses, %d tables\n', hits, misses, length(tables));
+
+end
@@ -20,6 +20,7 @@ function record = PerformanceCode(inputs, mode, test_data, options)
 %           - print_on: turns on summary printing
 %           - RAS_on: turns on RAS .eng file generation
 %           - RAS_name: file name of .eng file
+%           - progress_on: print the simulated time during integration
 %   OUTPUTS:
 %       - Isp: specific impulse [s]
 %       - time: time vector over burn for F_thrust
@@ -56,6 +57,7 @@ default_options.plots_on = true; % plot results
 default_options.RAS_on = true; % create .eng thrust curve for use in OpenRocket or RASAero
 default_options.RAS_name = 'F_thrust_RASAERO.txt'; % name of .eng file (don't include location!)
 default_options.print_on = true; % print out summary information
+default_options.progress_on = false; % print progress of the integration
 if nargin < 4
     options = default_options;
 else
@@ -80,6 +82,9 @@ else
     if ~isfield(options, 'RAS_name')
         options.RAS_name = default_options.RAS_name;
     end
+    if ~isfield(options, 'progress_on')
+        options.progress_on = default_options.progress_on;
+    end
     if ~(contains(options.RAS_name,'/') || contains(options.RAS_name,'\\'))
         options.RAS_name = ['./Outputs/' options.RAS_name]; % if no file location specified, put in Outputs
     end
@@ -111,7 +116,7 @@ inputs.Throttle = @Throttle;
 %% Run Integration Function
 tic
 [time, record] = ...
-    Integration(inputs,mode,tspan);
+    Integration(inputs,mode,tspan,options.progress_on);
 
 F_thrust = record.F_thrust;
 p_cc = record.p_cc;
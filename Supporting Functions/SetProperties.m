@@ -0,0 +1,16 @@
+function [ obj ] = SetProperties(obj, values)
+%SetProperties Set the properties of a classdef object (e.g. a Pressurant
+%or Gas) to the fields of a struct of the same names, as pushed by the
+%Python GUI's bulk workspace build.
+% Inputs:
+%   obj: object to set the properties of
+%   values: struct of property values
+% Outputs:
+%   obj: object with its properties set
+
+names = fieldnames(values);
+for ii = 1:numel(names)
+    obj.(names{ii}) = values.(names{ii});
+end
+
+end
@@ -0,0 +1,37 @@
+%% Save Regression Case
+% Runs PerformanceCode on the inputs in the workspace and saves them with
+% the record to a .mat file, which the native Python backend can be checked
+% against with:
+%   python -m PythonLib.Regression "Test Cases/regression_liquid.mat"
+% Set up inputs, mode, test_data and options first (e.g. by running the
+% input section of SimulateLiquid.m).
+
+regression_file = fullfile('Test Cases', ['regression_' mode.type '.mat']);
+
+options.plots_on = 0;
+options.RAS_on = 0;
+record = PerformanceCode(inputs, mode, test_data, options);
+
+% Objects can't be loaded outside of MATLAB, so save them as structs
+saved_inputs = inputs;
+if isfield(saved_inputs, 'Throttle')
+    saved_inputs = rmfield(saved_inputs, 'Throttle');
+end
+if ~isfield(saved_inputs, 'comb_data') && mode.combustion_on
+    saved_inputs.comb_data = load(saved_inputs.CombustionData);
+    saved_inputs.comb_data = saved_inputs.comb_data.CombData;
+end
+for pressurant = {'ox_pressurant', 'fuel_pressurant'}
+    if isfield(saved_inputs, pressurant{1})
+        saved_pressurant = struct(saved_inputs.(pressurant{1}));
+        saved_pressurant.gas_properties = struct(saved_pressurant.gas_properties);
+        saved_inputs.(pressurant{1}) = saved_pressurant;
+    end
+end
+
+regression.inputs = saved_inputs;
+regression.mode = mode;
+regression.options = options;
+regression.record = record;
+save(regression_file, '-struct', 'regression')
+fprintf('Saved regression case to %s\n', regression_file);
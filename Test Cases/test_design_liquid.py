@@ -0,0 +1,35 @@
+''' Tests of the finite-difference Jacobian of PythonLib/DesignLiquid.py when perturbed designs fail to run. From the PropSim
+    folder, run with: python -m pytest "Test Cases"
+'''
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')) # the PropSim folder
+from PythonLib import DesignLiquid
+
+A = np.arange(1, 1 + len(DesignLiquid.GOALS)*len(DesignLiquid.VARIABLES)).reshape(len(DesignLiquid.GOALS), -1)/10
+
+class FakePool():
+    ''' Evaluates linear residuals A @ x, failing (NaN residuals) where fails(x) is true, as DesignEvaluator does. '''
+    def __init__(self, fails):
+        self.fails = fails
+
+    def evaluate(self, points):
+        return [(np.full(len(DesignLiquid.GOALS), np.nan), {'message': 'ValueError: infeasible'}) if self.fails(x) else
+                (A @ x, {}) for x in points]
+
+def test_failed_column_retried_with_smaller_step():
+    x = np.zeros(len(DesignLiquid.VARIABLES))
+    pool = FakePool(lambda x: x[2] >= DesignLiquid.FD_STEP) # only the full step of variable 2 fails
+    r, J = DesignLiquid.finite_difference_jacobian(pool, x)
+    assert np.all(np.isfinite(J))
+    assert np.allclose(J, A)
+
+def test_failed_column_raises():
+    x = np.zeros(len(DesignLiquid.VARIABLES))
+    pool = FakePool(lambda x: x[2] > 0) # every step of variable 2 fails
+    with pytest.raises(RuntimeError, match = 'The design failed to run'):
+        DesignLiquid.finite_difference_jacobian(pool, x, A @ x)
@@ -0,0 +1,28 @@
+''' Tests of the van der Waals equation of state of PythonLib/VanDerWaals.py. From the PropSim folder, run with:
+    python -m pytest "Test Cases"
+'''
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')) # the PropSim folder
+from PythonLib.VanDerWaals import pvdw, tvdw, rhovdw, rhovdw_roots
+
+R = 8.3144621/0.044013 # constants of Integration.py for N2O
+A = 0.38828/0.044013**2
+B = 44.15/0.044013*1e-6
+
+def test_tvdw_inverts_pvdw():
+    T = np.linspace(230, 309, 9)
+    rho = np.linspace(5, 200, 9)
+    assert np.allclose(tvdw(pvdw(T, rho, R, A, B), rho, R, A, B), T, rtol = 1e-12)
+    assert abs(tvdw(pvdw(290.0, 50.0, R, A, B), 50.0, R, A, B) - 290) < 1e-9
+
+def test_rhovdw_matches_roots():
+    p = np.linspace(1e5, 7e6, 9)
+    T = np.linspace(250, 309, 9)
+    expected = [rhovdw_roots(p_i, T_i, R, A, B) for p_i, T_i in zip(p, T)]
+    assert np.allclose(rhovdw(p, T, R, A, B), expected, rtol = 1e-10)
+    assert np.allclose([rhovdw(p_i, T_i, R, A, B) for p_i, T_i in zip(p.tolist(), T.tolist())], expected, rtol = 1e-10)
+    assert np.allclose(pvdw(T, rhovdw(p, T, R, A, B), R, A, B), p, rtol = 1e-10)